@@ -6,7 +6,6 @@ import numpy as np
 import pandas as pd
 import os
 import pickle
-import copy
 
 
 class ValidationObject(object):
@@ -34,6 +33,10 @@ class ValidationObject(object):
         ...
     min_periods_pearson : Integer
         ...
+    mask : np.array, optional
+        Boolean mask with one entry per row of `data`. Only time steps with
+        True are validated (for example a time of day, see
+        :py:func:`~.tools.get_time_filter_masks`). Default: None.
 
     Attributes
     ----------
@@ -51,10 +54,15 @@ class ValidationObject(object):
         Indicates the origin of the validation feedin time series.
         This parameter will be set as an attribute of ValidationObject and is
         used for giving filenames etc.
+    mask : np.array or None
+        Boolean mask of the validated time steps.
     validation_series : pandas.Series
-            Validation feedin output time series.
+            Validation feedin output time series (only time steps of `mask`).
     simulation_series : pandas.Series
-            Simulated feedin output time series.
+            Simulated feedin output time series (only time steps of `mask`).
+    key_figures : Dictionary
+        Key figures calculated on first access by :py:func:`~.get_key_figures`
+        from the aligned values of `data`.
     bias : pd.Series
         Bias of `simulation_series` from `validation_series`.
     mean_bias : Float
@@ -75,7 +83,7 @@ class ValidationObject(object):
     """
     def __init__(self, object_name, data, output_method=None,
                  weather_data_name=None, validation_name=None, approach=None,
-                 min_periods_pearson=None):
+                 min_periods_pearson=None, mask=None):
         self.object_name = object_name
         self.data = data
         self.output_method = output_method
@@ -83,19 +91,72 @@ class ValidationObject(object):
         self.validation_name = validation_name
         self.approach = approach
         self.min_periods_pearson = min_periods_pearson
+        self.mask = None if mask is None else np.asarray(mask, dtype=bool)
 
-        self.validation_series = data.iloc[:, 0].dropna()
-        self.simulation_series = data.iloc[:, 1].dropna()
-        self.bias = self.get_bias()
-        self.mean_bias = self.bias.mean()
-        self.rmse = self.get_rmse()
         self.rmse_monthly = None
-        self.rmse_normalized = self.get_rmse(normalized=True)
-        self.standard_deviation = self.get_standard_deviation(self.bias)
-        self.pearson_s_r = self.get_pearson_s_r()
+        self._validation_series = None
+        self._simulation_series = None
+        self._key_figures = None
+        self._bias = None
+        self._rmse_normalized = None
 
     # TODO: check if correct values
 
+    @property
+    def key_figures(self):
+        r"""
+        Key figures of `data` calculated by :py:func:`~.get_key_figures`.
+
+        The key figures are calculated on first access in one pass over the
+        aligned values of `data` and then cached.
+
+        """
+        if self._key_figures is None:
+            self._key_figures = get_key_figures(get_key_figure_sums(
+                self.data.iloc[:, 0].values, self.data.iloc[:, 1].values,
+                mask=self.mask))
+        return self._key_figures
+
+    @property
+    def validation_series(self):
+        if self._validation_series is None:
+            self._validation_series = self.get_series(0)
+        return self._validation_series
+
+    @property
+    def simulation_series(self):
+        if self._simulation_series is None:
+            self._simulation_series = self.get_series(1)
+        return self._simulation_series
+
+    @property
+    def bias(self):
+        if self._bias is None:
+            self._bias = self.get_bias()
+        return self._bias
+
+    @property
+    def mean_bias(self):
+        return self.key_figures['mean_bias']
+
+    @property
+    def rmse(self):
+        return self.key_figures['rmse']
+
+    @property
+    def rmse_normalized(self):
+        if self._rmse_normalized is None:
+            self._rmse_normalized = self.get_rmse(normalized=True)
+        return self._rmse_normalized
+
+    @property
+    def standard_deviation(self):
+        return self.key_figures['standard_deviation']
+
+    @property
+    def pearson_s_r(self):
+        return self.get_pearson_s_r()
+
     def get_standard_deviation(self, data_series):
         r"""
         Calculate standard deviation of a data series.
@@ -136,24 +197,33 @@ class ValidationObject(object):
 
         """
         if (time_scale is None or time_scale == 'annual'):
-            rmse = np.sqrt(((self.simulation_series -
-                             self.validation_series)**2).sum() /
-                           len(self.simulation_series))
+            rmse = self.key_figures['rmse']
         if time_scale == 'monthly':
-            rmse = []
-            for month in range(12):
-                sim_series = self.simulation_series['{0}-{1}'.format(
-                    self.simulation_series.index[-1].year, month + 1)]
-                val_series = self.validation_series['{0}-{1}'.format(
-                    self.simulation_series.index[-1].year, month + 1)]
-                monthly_rmse = np.sqrt(((sim_series - val_series)**2).sum() /
-                                       len(self.simulation_series))
-                rmse.append(monthly_rmse)
+            rmse = list(self.get_grouped_key_figures('month')['rmse'])
         if normalized:
             rmse = (rmse /
                     self.validation_series.resample('A').mean().values * 100)
         return rmse
 
+    def get_series(self, column):
+        r"""
+        Returns a column of `data` without nan values and masked time steps.
+
+        Parameters
+        ----------
+        column : Integer
+            Position of the column in `data`.
+
+        Returns
+        -------
+        pd.Series
+
+        """
+        series = self.data.iloc[:, column]
+        if self.mask is not None:
+            series = series[self.mask]
+        return series.dropna()
+
     def get_bias(self):
         r"""
         Compare two series concerning their deviation (bias).
@@ -176,12 +246,18 @@ class ValidationObject(object):
             Contains the mean biases (floats) for each month of the year.
 
         """
-        mean_biases = []
-        for month in range(12):
-            mean_bias = self.bias['{0}-{1}'.format(
-                self.bias.index[10].year, month + 1)].mean()
-            mean_biases.append(mean_bias)
-        return mean_biases
+        return list(self.get_grouped_key_figures('month')['mean_bias'])
+
+    def get_grouped_key_figures(self, period='month', by_year=False):
+        r"""
+        Calculates the key figures for each calendar period.
+
+        See :py:func:`~.get_grouped_key_figures` for the parameters and the
+        returned data frame.
+
+        """
+        return get_grouped_key_figures(self.data, period=period,
+                                       by_year=by_year, mask=self.mask)
 
     def get_pearson_s_r(self):
         r"""
@@ -194,24 +270,608 @@ class ValidationObject(object):
             of the input series.
 
         """
-        correlation = self.data.corr(
-            method='pearson', min_periods=self.min_periods_pearson).iloc[1, 0]
-        return correlation
+        if (self.min_periods_pearson is not None and
+                self.key_figures['count'] < self.min_periods_pearson):
+            return np.nan
+        return self.key_figures['pearson_s_r']
 
 
-def correlation(val_obj, sample_resolution=None):
+def get_key_figure_sums(validation_values, simulation_values, codes=None,
+                        number_of_groups=None, mask=None):
+    r"""
+    Calculates the sums needed for the key figures of two series in one pass.
+
+    Only time steps where both values are not nan are taken into account. The
+    values are shifted by the first valid validation value before summing up
+    to reduce rounding errors - the key figures do not depend on this shift.
+    If `codes` are given, the sums are calculated for each group in one
+    grouped reduction (np.bincount).
+
+    Parameters
+    ----------
+    validation_values : np.array
+        Validation feedin time series values.
+    simulation_values : np.array
+        Simulated feedin time series values.
+    codes : np.array, optional
+        Integer group code (0, 1, ...) of each time step, for example the
+        month of the time step minus one. Default: None.
+    number_of_groups : Integer, optional
+        Minimum number of groups. Only used if `codes` are given. Default:
+        None.
+    mask : np.array, optional
+        Boolean mask. Only time steps with True are taken into account.
+        Default: None.
+
+    Returns
+    -------
+    Dictionary
+        Number of valid time steps ('count'), sums of the (shifted) validation
+        and simulation values ('sum_validation', 'sum_simulation'), their sums
+        of squares ('sum_validation_squared', 'sum_simulation_squared'), the
+        sum of their products ('sum_product') and the shift ('shift'). If
+        `codes` are given, the values (except 'shift') are arrays with one
+        entry per group.
+
     """
+    validation_values = np.asarray(validation_values, dtype=np.float64)
+    simulation_values = np.asarray(simulation_values, dtype=np.float64)
+    valid = ~(np.isnan(validation_values) | np.isnan(simulation_values))
+    if mask is not None:
+        valid &= np.asarray(mask, dtype=bool)
+    values = np.vstack((validation_values[valid], simulation_values[valid]))
+    shift = values[0, 0] if values.shape[1] > 0 else 0.0
+    values -= shift
+    if codes is not None:
+        codes = np.asarray(codes)[valid]
+        minlength = number_of_groups or 0
+
+        def group_sum(weights=None):
+            return np.bincount(codes, weights=weights, minlength=minlength)
+
+        return {'count': group_sum(),
+                'sum_validation': group_sum(values[0]),
+                'sum_simulation': group_sum(values[1]),
+                'sum_validation_squared': group_sum(values[0] ** 2),
+                'sum_simulation_squared': group_sum(values[1] ** 2),
+                'sum_product': group_sum(values[0] * values[1]),
+                'shift': shift}
+    # Sums of squares and cross products in one matrix product
+    products = values.dot(values.transpose())
+    sums = values.sum(axis=1)
+    return {'count': values.shape[1], 'sum_validation': sums[0],
+            'sum_simulation': sums[1],
+            'sum_validation_squared': products[0, 0],
+            'sum_simulation_squared': products[1, 1],
+            'sum_product': products[0, 1], 'shift': shift}
 
 
+def get_period_codes(index, period='month', by_year=False):
+    r"""
+    Returns integer codes of the calendar periods of the time steps.
+
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+        Time steps.
+    period : String
+        Calendar period. Options: 'month' (1 - 12), 'week' (ISO week 1 - 53),
+        'season' ('winter' (Dec - Feb), 'spring', 'summer', 'autumn') and
+        'hour' (hour of the day 0 - 23). Default: 'month'.
+    by_year : Boolean
+        If True the periods of different years are distinguished, for example
+        January 2015 and January 2016. Weeks belong to their ISO year and a
+        winter to the year of its January and February (December 2015 belongs
+        to winter 2016). Default: False.
+
+    Returns
+    -------
+    codes : np.array
+        Code (0, 1, ...) of the period of each time step.
+    labels : pd.DataFrame
+        Labels of the periods with one row per code and the column `period`
+        (and 'year' if `by_year` is True).
+
+    """
+    # Year of the period of each time step
+    years = np.asarray(index.year)
+    if period == 'month':
+        codes = np.asarray(index.month) - 1
+        period_labels = np.arange(1, 13)
+    elif period == 'week':
+        if hasattr(index, 'isocalendar'):
+            iso_calendar = index.isocalendar()
+            weeks = iso_calendar.week
+            years = np.asarray(iso_calendar.year, dtype=np.int64)
+        else:
+            weeks = np.asarray(index.week)
+            months = np.asarray(index.month)
+            years = (years - ((weeks >= 52) & (months == 1)) +
+                     ((weeks == 1) & (months == 12)))
+        codes = np.asarray(weeks, dtype=np.int64) - 1
+        period_labels = np.arange(1, 54)
+    elif period == 'season':
+        codes = np.asarray(index.month) % 12 // 3
+        period_labels = np.array(['winter', 'spring', 'summer', 'autumn'])
+        # December belongs to the winter of the following year
+        years = years + (np.asarray(index.month) == 12)
+    elif period == 'hour':
+        codes = np.asarray(index.hour)
+        period_labels = np.arange(24)
+    else:
+        raise ValueError("`period` must be 'month', 'week', 'season' or " +
+                         "'hour' but is {0}".format(period))
+    codes = codes.astype(np.int64)
+    number_of_periods = len(period_labels)
+    if not by_year:
+        return codes, pd.DataFrame({period: period_labels})
+    years = years.astype(np.int64)
+    first_year = years.min() if len(years) > 0 else 0
+    codes = (years - first_year) * number_of_periods + codes
+    number_of_years = (years.max() - first_year + 1) if len(years) > 0 else 0
+    labels = pd.DataFrame({
+        'year': np.repeat(np.arange(number_of_years) + first_year,
+                          number_of_periods),
+        period: np.tile(period_labels, number_of_years)})
+    return codes, labels
+
+
+def get_grouped_key_figures(data, period='month', by_year=False, mask=None):
+    r"""
+    Calculates the key figures of a validation for each calendar period.
+
+    All key figures are calculated in one grouped reduction over integer
+    period codes (see :py:func:`~.get_period_codes`).
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Validation (first column) and simulated (second column) feedin time
+        series with DatetimeIndex.
+    period : String
+        Calendar period. See :py:func:`~.get_period_codes`. Default: 'month'.
+    by_year : Boolean
+        If True the periods of different years are distinguished. Periods
+        without valid time steps are then dropped. Default: False.
+    mask : np.array, optional
+        Boolean mask. Only time steps with True are taken into account.
+        Default: None.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per period with the columns of the period labels (see
+        :py:func:`~.get_period_codes`) and the key figures returned by
+        :py:func:`~.get_key_figures` ('count', 'mean_bias', 'rmse',
+        'standard_deviation', 'pearson_s_r', 'mean_validation').
+
+    """
+    codes, labels = get_period_codes(data.index, period=period,
+                                     by_year=by_year)
+    key_figures = get_key_figures(get_key_figure_sums(
+        data.iloc[:, 0].values, data.iloc[:, 1].values, codes=codes,
+        number_of_groups=len(labels), mask=mask))
+    # Constant shifts are broadcast to the groups
+    for key, value in key_figures.items():
+        labels[key] = np.broadcast_to(value, len(labels))
+    labels['count'] = labels['count'].astype(np.int64)
+    if by_year:
+        labels = labels[labels['count'] > 0].reset_index(drop=True)
+    return labels
+
+
+def get_key_figures(sums):
+    r"""
+    Calculates key figures from the sums of :py:func:`~.get_key_figure_sums`.
+
+    All operations are element-wise, so the sums can also be arrays (for
+    example one entry per month).
+
+    Parameters
+    ----------
+    sums : Dictionary
+        See :py:func:`~.get_key_figure_sums`.
+
+    Returns
+    -------
+    Dictionary
+        Number of valid time steps ('count'), mean bias of the simulation from
+        the validation series ('mean_bias'), root mean square error ('rmse'),
+        standard deviation of the bias ('standard_deviation'), Pearson's
+        correlation coefficient ('pearson_s_r') and the mean of the validation
+        series ('mean_validation').
+
+    """
+    count = sums['count']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_validation = sums['sum_validation'] / count
+        mean_simulation = sums['sum_simulation'] / count
+        mean_bias = mean_simulation - mean_validation
+        mean_squared_bias = (
+            sums['sum_simulation_squared'] - 2 * sums['sum_product'] +
+            sums['sum_validation_squared']) / count
+        variance_validation = (sums['sum_validation_squared'] / count -
+                               mean_validation ** 2)
+        variance_simulation = (sums['sum_simulation_squared'] / count -
+                               mean_simulation ** 2)
+        covariance = (sums['sum_product'] / count -
+                      mean_validation * mean_simulation)
+        pearson_s_r = np.clip(covariance / np.sqrt(
+            variance_validation * variance_simulation), -1.0, 1.0)
+    return {'count': count, 'mean_bias': mean_bias,
+            'rmse': np.sqrt(np.maximum(mean_squared_bias, 0)),
+            'standard_deviation': np.sqrt(np.maximum(
+                mean_squared_bias - mean_bias ** 2, 0)),
+            'pearson_s_r': pearson_s_r,
+            'mean_validation': mean_validation + sums['shift']}
+
+
+class KeyFigureAccumulator(object):
+    r"""
+    Accumulates the key figures of a validation chunk by chunk.
+
+    Instead of the whole validation and simulated feedin time series only the
+    number of valid time steps, the means, the sums of squared deviations from
+    the means and the co-moment of both series are stored. Chunks (for example
+    months or files) are added with :py:meth:`~.update`, accumulators of
+    different chunks or workers are combined with :py:meth:`~.merge` by the
+    parallel algorithm of Chan et al. The result does not depend on the order
+    in which the chunks are added.
+
+    Parameters
+    ----------
+    object_name : String
+        Name of the validated object (name of wind farm or region).
+        Default: None.
+
+    Attributes
+    ----------
+    object_name : String
+        Name of the validated object (name of wind farm or region).
+    count : Integer
+        Number of time steps where both series are not nan.
+    mean_validation : Float
+        Mean of the validation feedin time series.
+    mean_simulation : Float
+        Mean of the simulated feedin time series.
+    m2_validation : Float
+        Sum of squared deviations of the validation values from their mean.
+    m2_simulation : Float
+        Sum of squared deviations of the simulated values from their mean.
+    co_moment : Float
+        Sum of the products of the deviations of both series from their
+        means.
+
     """
-    data = pd.DataFrame([val_obj.validation_series,
-                         val_obj.simulation_series]).transpose()
-    b = data.resample(sample_resolution).agg({'corr': lambda x: x[data.columns[0]].corr(
-        x[data.columns[1]])})
-    corr = b['corr'].drop(b['corr'].columns[1], axis=1)
-    corr.columns = ['{0} {1}'.format(val_obj.object_name,
-                    val_obj.weather_data_name)]
-    return corr
+    def __init__(self, object_name=None):
+        self.object_name = object_name
+        self.count = 0
+        self.mean_validation = 0.0
+        self.mean_simulation = 0.0
+        self.m2_validation = 0.0
+        self.m2_simulation = 0.0
+        self.co_moment = 0.0
+
+    def update(self, validation_values, simulation_values):
+        r"""
+        Adds a chunk of time steps.
+
+        Only time steps where both values are not nan are taken into account.
+
+        Parameters
+        ----------
+        validation_values : np.array or pd.Series
+            Validation feedin time series values of the chunk.
+        simulation_values : np.array or pd.Series
+            Simulated feedin time series values of the chunk (same length as
+            `validation_values`).
+
+        Returns
+        -------
+        self : KeyFigureAccumulator
+
+        """
+        validation_values = np.asarray(validation_values, dtype=np.float64)
+        simulation_values = np.asarray(simulation_values, dtype=np.float64)
+        valid = ~(np.isnan(validation_values) | np.isnan(simulation_values))
+        if not valid.any():
+            return self
+        chunk = KeyFigureAccumulator()
+        chunk.count = int(valid.sum())
+        validation_values = validation_values[valid]
+        simulation_values = simulation_values[valid]
+        chunk.mean_validation = validation_values.mean()
+        chunk.mean_simulation = simulation_values.mean()
+        validation_deviations = validation_values - chunk.mean_validation
+        simulation_deviations = simulation_values - chunk.mean_simulation
+        chunk.m2_validation = validation_deviations.dot(validation_deviations)
+        chunk.m2_simulation = simulation_deviations.dot(simulation_deviations)
+        chunk.co_moment = validation_deviations.dot(simulation_deviations)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        r"""
+        Merges the accumulated time steps of another accumulator into this one.
+
+        Parameters
+        ----------
+        other : KeyFigureAccumulator
+            Accumulator of other time steps (for example of another worker).
+
+        Returns
+        -------
+        self : KeyFigureAccumulator
+
+        """
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        factor = self.count * other.count / count
+        delta_validation = other.mean_validation - self.mean_validation
+        delta_simulation = other.mean_simulation - self.mean_simulation
+        self.mean_validation += delta_validation * other.count / count
+        self.mean_simulation += delta_simulation * other.count / count
+        self.m2_validation += (other.m2_validation +
+                               delta_validation ** 2 * factor)
+        self.m2_simulation += (other.m2_simulation +
+                               delta_simulation ** 2 * factor)
+        self.co_moment += (other.co_moment +
+                           delta_validation * delta_simulation * factor)
+        self.count = count
+        return self
+
+    @property
+    def key_figures(self):
+        r"""
+        Key figures of the accumulated time steps.
+
+        Returns
+        -------
+        Dictionary
+            Same keys as the dictionary returned by
+            :py:func:`~.get_key_figures`.
+
+        """
+        if self.count == 0:
+            return {'count': 0, 'mean_bias': np.nan, 'rmse': np.nan,
+                    'standard_deviation': np.nan, 'pearson_s_r': np.nan,
+                    'mean_validation': np.nan}
+        mean_bias = self.mean_simulation - self.mean_validation
+        variance_bias = max((self.m2_simulation + self.m2_validation -
+                             2 * self.co_moment) / self.count, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pearson_s_r = np.clip(self.co_moment / np.sqrt(
+                self.m2_validation * self.m2_simulation), -1.0, 1.0)
+        return {'count': self.count, 'mean_bias': mean_bias,
+                'rmse': np.sqrt(variance_bias + mean_bias ** 2),
+                'standard_deviation': np.sqrt(variance_bias),
+                'pearson_s_r': pearson_s_r,
+                'mean_validation': self.mean_validation}
+
+
+def merge_key_figure_accumulators(accumulators):
+    r"""
+    Merges several accumulators (for example of parallel workers).
+
+    Parameters
+    ----------
+    accumulators : List
+        Contains :class:`~.KeyFigureAccumulator` objects. They are not
+        changed.
+
+    Returns
+    -------
+    KeyFigureAccumulator
+
+    """
+    accumulator = KeyFigureAccumulator(
+        accumulators[0].object_name if accumulators else None)
+    for other in accumulators:
+        accumulator.merge(other)
+    return accumulator
+
+
+def get_correlation_data(val_obj_list):
+    r"""
+    Stacks the time series of several validation objects.
+
+    Parameters
+    ----------
+    val_obj_list : List
+        Contains :class:`~.ValidationObject` objects.
+
+    Returns
+    -------
+    validation_df : pd.DataFrame
+        Validation feedin time series (columns) on the union of the time
+        indices of the validation objects.
+    simulation_df : pd.DataFrame
+        Simulated feedin time series with the same index as `validation_df`.
+        Column names of both data frames are
+        '{object_name} {weather_data_name}' of the validation objects.
+
+    """
+    names = ['{0} {1}'.format(val_obj.object_name, val_obj.weather_data_name)
+             for val_obj in val_obj_list]
+    data = pd.concat([val_obj.data.iloc[:, :2] for val_obj in val_obj_list],
+                     axis=1).sort_index()
+    validation_df = data.iloc[:, 0::2]
+    simulation_df = data.iloc[:, 1::2]
+    validation_df.columns = names
+    simulation_df.columns = names
+    return validation_df, simulation_df
+
+
+def get_cumulative_sums(validation_values, simulation_values, mask=None):
+    r"""
+    Cumulative sums of the key figure sums along the time axis.
+
+    Parameters
+    ----------
+    validation_values : np.array
+        Validation feedin time series values with shape (time steps, series).
+    simulation_values : np.array
+        Simulated feedin time series values with the shape of
+        `validation_values`.
+    mask : np.array, optional
+        Boolean mask with shape (time steps, ). Only time steps with True are
+        taken into account. Default: None.
+
+    Returns
+    -------
+    Dictionary
+        Same keys as the dictionary returned by
+        :py:func:`~.get_key_figure_sums`. The values (except 'shift') are the
+        cumulative sums with shape (time steps + 1, series) starting with
+        zeros, so that the sums of time steps a to b - 1 are the difference of
+        rows b and a.
+
+    """
+    validation_values = np.asarray(validation_values, dtype=np.float64)
+    simulation_values = np.asarray(simulation_values, dtype=np.float64)
+    valid = ~(np.isnan(validation_values) | np.isnan(simulation_values))
+    if mask is not None:
+        valid &= np.asarray(mask, dtype=bool)[:, np.newaxis]
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore'):
+        # Shift by the mean of the valid values to reduce rounding errors
+        shift = np.where(valid, validation_values, 0).sum(axis=0) / np.maximum(
+            count, 1)
+    validation_values = np.where(valid, validation_values - shift, 0)
+    simulation_values = np.where(valid, simulation_values - shift, 0)
+    zeros = np.zeros((1, validation_values.shape[1]))
+
+    def cumulative_sum(values):
+        return np.vstack((zeros, np.cumsum(values, axis=0)))
+
+    return {'count': cumulative_sum(valid),
+            'sum_validation': cumulative_sum(validation_values),
+            'sum_simulation': cumulative_sum(simulation_values),
+            'sum_validation_squared': cumulative_sum(validation_values ** 2),
+            'sum_simulation_squared': cumulative_sum(simulation_values ** 2),
+            'sum_product': cumulative_sum(
+                validation_values * simulation_values),
+            'shift': shift}
+
+
+def get_correlations(validation_df, simulation_df, sample_resolution=None,
+                     window=None, method='pearson', mask=None,
+                     min_periods=2):
+    r"""
+    Calculates correlation coefficients of many pairs of time series at once.
+
+    The correlations are calculated per time bucket (`sample_resolution`) or
+    in a rolling window (`window`) from differences of cumulative sums of all
+    series (see :py:func:`~.get_cumulative_sums`). Time steps can be filtered
+    with `mask` (for example a time of day, see
+    :py:func:`~.tools.get_time_of_day_mask`) without copying the data.
+
+    Parameters
+    ----------
+    validation_df : pd.DataFrame
+        Validation feedin time series with a sorted DatetimeIndex. See
+        :py:func:`~.get_correlation_data`.
+    simulation_df : pd.DataFrame
+        Simulated feedin time series with the index and columns of
+        `validation_df`.
+    sample_resolution : String, optional
+        Frequency of the time buckets, for example 'M' for monthly
+        correlations. If None and `window` is None, the correlation of the
+        whole time series is calculated. Default: None.
+    window : Integer, optional
+        Length of a rolling window in time steps. Not used if
+        `sample_resolution` is given. Default: None.
+    method : String
+        Options: 'pearson', 'spearman' (only per time bucket). Default:
+        'pearson'.
+    mask : np.array or pd.Series, optional
+        Boolean mask with one entry per time step. Default: None.
+    min_periods : Integer
+        Minimum number of valid time steps for a correlation coefficient.
+        Default: 2.
+
+    Returns
+    -------
+    pd.DataFrame
+        Correlation coefficients with the time buckets (labels like in
+        pd.DataFrame.resample) or the time steps (end of the rolling window)
+        as index and the columns of `validation_df`.
+
+    """
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+    index = validation_df.index
+    if window is not None and sample_resolution is None:
+        if method != 'pearson':
+            raise ValueError("Rolling correlations are only available for " +
+                             "method 'pearson'.")
+        cumulative_sums = get_cumulative_sums(
+            validation_df.values, simulation_df.values, mask=mask)
+        sums = {key: (value if key == 'shift' else
+                      value[window:] - value[:-window])
+                for key, value in cumulative_sums.items()}
+        result_index = index[window - 1:]
+    else:
+        if sample_resolution is None:
+            sizes = np.array([len(index)])
+            result_index = index[:1]
+        else:
+            bucket_sizes = pd.Series(
+                np.zeros(len(index)), index=index).resample(
+                    sample_resolution).size()
+            sizes = bucket_sizes.values
+            result_index = bucket_sizes.index
+        edges = np.concatenate(([0], np.cumsum(sizes)))
+        validation_values = validation_df.values
+        simulation_values = simulation_df.values
+        if method == 'spearman':
+            # Spearman's rank correlation is the Pearson correlation of the
+            # ranks within each bucket
+            valid = ~(np.isnan(validation_values) |
+                      np.isnan(simulation_values))
+            if mask is not None:
+                valid &= mask[:, np.newaxis]
+            codes = np.repeat(np.arange(len(sizes)), sizes)
+            validation_values = pd.DataFrame(np.where(
+                valid, validation_values, np.nan)).groupby(codes).rank().values
+            simulation_values = pd.DataFrame(np.where(
+                valid, simulation_values, np.nan)).groupby(codes).rank().values
+        elif method != 'pearson':
+            raise ValueError("`method` must be 'pearson' or 'spearman' but " +
+                             "is {0}".format(method))
+        cumulative_sums = get_cumulative_sums(
+            validation_values, simulation_values, mask=mask)
+        sums = {key: (value if key == 'shift' else
+                      value[edges[1:]] - value[edges[:-1]])
+                for key, value in cumulative_sums.items()}
+    key_figures = get_key_figures(sums)
+    correlations = np.where(key_figures['count'] >= min_periods,
+                            key_figures['pearson_s_r'], np.nan)
+    return pd.DataFrame(correlations, index=result_index,
+                        columns=validation_df.columns)
+
+
+def correlation(val_obj, sample_resolution=None):
+    r"""
+    Calculates the correlation of the series of a validation object.
+
+    Parameters
+    ----------
+    val_obj : ValidationObject
+    sample_resolution : String, optional
+        Frequency of the time buckets. See :py:func:`~.get_correlations`.
+        Default: None.
+
+    Returns
+    -------
+    pd.DataFrame
+        Pearson correlation coefficients per time bucket with the column
+        '{object_name} {weather_data_name}'.
+
+    """
+    return get_correlations(*get_correlation_data([val_obj]),
+                            sample_resolution=sample_resolution)
+
 
 if __name__ == "__main__":
     # Load validation objects - choose power output or hourly/monthly energy output
@@ -223,47 +883,33 @@ if __name__ == "__main__":
                         'validation_sets_2015_open_FRED_ArgeNetz_simple_hourly_energy_output.p')
     path_2 = os.path.join(os.path.dirname(__file__), 'dumps/validation_objects',
                         'validation_sets_2015_MERRA_ArgeNetz_simple_hourly_energy_output.p')
-    val_objs = pickle.load(open(path,'rb'))
-    val_objs_2 = pickle.load(open(path_2,'rb'))
-    for obj in val_objs_2:
-        val_obj = val_objs.append(obj)
+    with open(path, 'rb') as file:
+        val_objs = pickle.load(file)
+    with open(path_2, 'rb') as file:
+        val_objs.extend(pickle.load(file))
     # Choose resolution of resampling
     sample_resolution = 'M'
+    # All series are stacked once - time periods are applied as masks
+    validation_df, simulation_df = get_correlation_data(val_objs)
+    validation_df.index = validation_df.index.tz_convert('UTC')
+    simulation_df.index = validation_df.index
     # ##################### Correlation dataframe ###############################
-    df = pd.DataFrame()
-    for val_obj in val_objs:
-        output = correlation(val_obj, sample_resolution)
-        df = pd.concat([df, output], axis=1)
-    df.to_csv('correlations.csv')
+    get_correlations(validation_df, simulation_df,
+                     sample_resolution=sample_resolution).to_csv(
+        'correlations.csv')
 
     ###################### Tageszeiten  #####################
     time_periods = [(4, 8), (8, 16), (16, 22), (22, 4)]
     for time_period in time_periods:
-        val_objs_copy = copy.deepcopy(val_objs)
-        for val_obj in val_objs_copy:
-            # Set all time series to UTC (will be different in the future, now
-            # it's an easy way)
-            val_obj.simulation_series.index = val_obj.simulation_series.index.tz_convert(
-                    'UTC')
-            val_obj.validation_series.index =  val_obj.validation_series.index.tz_convert(
-                    'UTC')
-            # Selecet time steps
-            val_obj.simulation_series = tools.select_certain_time_steps(
-                val_obj.simulation_series, time_period)
-            val_obj.validation_series = tools.select_certain_time_steps(
-                val_obj.validation_series, time_period)
+        mask = tools.get_time_of_day_mask(validation_df.index, time_period)
         # Get correlation
-        df = pd.DataFrame()
-        for val_obj in val_objs:
-            output = correlation(val_obj, sample_resolution)
-            df = pd.concat([df, output], axis=1)
-        df.to_csv('correlations_{0}_{1}.csv'.format(time_period[0],
-                                                    time_period[1]))
+        get_correlations(validation_df, simulation_df,
+                         sample_resolution=sample_resolution,
+                         mask=mask).to_csv('correlations_{0}_{1}.csv'.format(
+                             time_period[0], time_period[1]))
         ############### Tageszeiten yearly correlation ########################
         # Get correlation
-        df = pd.DataFrame()
-        for val_obj in val_objs:
-            output = correlation(val_obj, 'Y')
-            df = pd.concat([df, output], axis=1)
-        df.to_csv('correlations_yearly_{0}_{1}.csv'.format(time_period[0],
-                                                           time_period[1]))
+        get_correlations(validation_df, simulation_df, sample_resolution='Y',
+                         mask=mask).to_csv(
+            'correlations_yearly_{0}_{1}.csv'.format(time_period[0],
+                                                    time_period[1]))
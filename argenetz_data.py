@@ -22,11 +22,15 @@ from windpowerlib import power_output
 import visualization_tools
 import analysis_tools
 import tools
+import data_quality
+import storage
 
 # Other imports
 from matplotlib import pyplot as plt
 import pandas as pd
 import numpy as np
+import multiprocessing
+import hashlib
 import os
 import pickle
 
@@ -112,6 +116,211 @@ def read_file_to_list(filename):
             list.append(line)
     return list
 
+
+def read_file(filename, column_names, column_name_map, datapath=None):
+    r"""
+    Reads the selected columns of an ArgeNetz csv file.
+
+    Only the index column and the columns in `column_names` are parsed
+    (`usecols`) with float dtype.
+
+    Parameters
+    ----------
+    filename : String
+        Name of data file.
+    column_names : List
+        Names of the columns to be read. Columns missing in the file are
+        skipped.
+    column_name_map : Dictionary
+        New column names with the column names of the file as keys.
+    datapath : String, optional
+        Path where the data file is stored. Default: None ('./data/ArgeNetz').
+
+    Returns
+    -------
+    pd.DataFrame
+        Data with the string time stamps of the file as index and the new
+        column names.
+
+    """
+    if datapath is None:
+        datapath = os.path.join(os.path.dirname(__file__), 'data/ArgeNetz')
+    path = os.path.join(datapath, filename)
+    # Read header only to select the columns
+    header = list(pd.read_csv(path, sep=';', nrows=0))
+    columns = [column for column in column_names if column in header]
+    df = pd.read_csv(
+        path, sep=';', decimal=',', thousands='.', index_col=0,
+        usecols=[header[0]] + columns,
+        dtype=dict({column: np.float64 for column in columns},
+                   **{header[0]: str}))
+    return df[columns].rename(columns=column_name_map)
+
+
+def _read_file(args):
+    return read_file(*args)
+
+
+def read_files(filenames, column_names, column_name_map, datapath=None,
+               processes=1, concat=True):
+    r"""
+    Reads the selected columns of several ArgeNetz csv files.
+
+    The files are parsed in `processes` worker processes and concatenated
+    once.
+
+    Parameters
+    ----------
+    filenames : List
+        Names of the data files in chronological order.
+    column_names : List
+        See :py:func:`~.read_file`.
+    column_name_map : Dictionary
+        See :py:func:`~.read_file`.
+    datapath : String, optional
+        See :py:func:`~.read_file`.
+    processes : Integer
+        Number of worker processes. If 1 the files are read in the current
+        process. Default: 1.
+    concat : Boolean
+        If False a list with one data frame per file is returned. Default:
+        True.
+
+    Returns
+    -------
+    pd.DataFrame or List
+        Data of all files (rows in the order of `filenames`).
+
+    """
+    tasks = [(filename, column_names, column_name_map, datapath) for
+             filename in filenames]
+    if processes == 1:
+        df_parts = [_read_file(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            df_parts = pool.map(_read_file, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    if not concat:
+        return df_parts
+    return pd.concat(df_parts)
+
+
+def get_file_specifications(year):
+    r"""
+    Returns the column names file and the period string of the time stamps.
+
+    """
+    if year == 2015:
+        return 'helper_files/column_names_2015.txt', 'PT5M'
+    if (year == 2016 or year == 2017):
+        return 'helper_files/column_names_2016_2017.txt', 'PT1M'
+    raise ValueError("No ArgeNetz data available for {0}".format(year))
+
+
+def get_partition_filename(partition_folder, path):
+    r"""
+    Returns the filename of the partition dump of a source file.
+
+    The name contains a hash of the absolute path of the source file, so
+    files with the same name in different folders get different partitions.
+
+    """
+    path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:10]
+    return os.path.join(partition_folder, '{0}_{1}.p'.format(
+        os.path.splitext(os.path.basename(path))[0], path_hash))
+
+
+def get_partitions(filenames, year, partition_folder, datapath=None,
+                   filter_interpolated_data=True, processes=1):
+    r"""
+    Reads ArgeNetz csv files incrementally.
+
+    Each source file is parsed once and dumped as a partition into
+    `partition_folder`. A manifest of the source files (path, size,
+    modification time and hash, see :py:func:`~.tools.get_changed_files`) is
+    kept in this folder, so only new or changed files are parsed again. The
+    intervals of implausible data (see
+    :py:func:`~.data_quality.get_quality_intervals`) are detected in the data
+    of all files at once, so runs crossing the boundary of two files are
+    found, and dumped into this folder. They are only scanned again if a
+    file was parsed again.
+
+    Parameters
+    ----------
+    filenames : List
+        Names of the data files in chronological order.
+    year : Integer
+        Year of the data.
+    partition_folder : String
+        Folder of the partition dumps and the manifest.
+    datapath : String, optional
+        Path where the data files are stored. Default: None
+        ('./data/ArgeNetz').
+    filter_interpolated_data : Boolean
+        If True the intervals of the partitions are returned. Default: True.
+    processes : Integer
+        Number of worker processes files are read and scanned in. Default: 1.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Data of all files with readable column names and UTC DatetimeIndex.
+    intervals : pd.DataFrame or None
+        Interval table of all partitions (see
+        :py:func:`~.data_quality.scan_data_quality`) if
+        `filter_interpolated_data` is True.
+
+    """
+    if datapath is None:
+        datapath = os.path.join(os.path.dirname(__file__), 'data/ArgeNetz')
+    if not os.path.exists(partition_folder):
+        os.makedirs(partition_folder)
+    manifest_filename = os.path.join(partition_folder, 'manifest.p')
+    manifest = tools.load_manifest(manifest_filename)
+    paths = [os.path.join(datapath, filename) for filename in filenames]
+    changed_paths, fingerprints = tools.get_changed_files(paths, manifest)
+    changed_paths.extend([
+        path for path in paths if path not in changed_paths and
+        not os.path.exists(get_partition_filename(partition_folder, path))])
+    if changed_paths:
+        print('---- Parsing {0} new or changed ArgeNetz files. ----'.format(
+            len(changed_paths)))
+        filename_column_names, replace = get_file_specifications(year)
+        column_names = read_file_to_list(filename_column_names)
+        df_parts = read_files(
+            [os.path.basename(path) for path in changed_paths], column_names,
+            dict(zip(column_names, new_column_names(year))),
+            datapath=datapath, processes=processes, concat=False)
+        for path, df_part in zip(changed_paths, df_parts):
+            # Convert string index to Datetime index (one vectorized parse)
+            df_part.index = pd.to_datetime(
+                df_part.index.str.replace(replace, '', regex=False),
+                utc=True)
+            with open(get_partition_filename(partition_folder, path),
+                      'wb') as file:
+                pickle.dump(df_part, file)
+            manifest[path] = fingerprints[path]
+        tools.dump_manifest(manifest, manifest_filename)
+    df_parts = []
+    for path in paths:
+        with open(get_partition_filename(partition_folder, path),
+                  'rb') as file:
+            df_parts.append(pickle.load(file))
+    df = pd.concat(df_parts)
+    if filter_interpolated_data:
+        # The dumped intervals are only reused if the data is unchanged (see
+        # :py:func:`~.data_quality.get_data_signature`)
+        intervals = data_quality.get_quality_intervals(
+            df, os.path.join(partition_folder, 'partitions.p'),
+            processes=processes, window_size=10, tolerance=0.0011)
+    else:
+        intervals = None
+    return df, intervals
+
+
 def new_column_names(year):
     """
     Returns column names for ArgeNetz data depending on the year as list.
@@ -149,7 +358,8 @@ def new_column_names(year):
 
 
 def get_data(filename_files, year, filename_pickle='pickle_dump.p',
-             pickle_load=False, filter_interpolated_data=True):
+             pickle_load=False, filter_interpolated_data=True, processes=1,
+             partition_folder=None, columns=None):
     r"""
     Fetches data of the requested files and renames columns.
 
@@ -159,6 +369,16 @@ def get_data(filename_files, year, filename_pickle='pickle_dump.p',
         Filename of file containing filenames of csv file to be read.
     year : Integer
         Year of data to be fetched.
+    processes : Integer
+        Number of worker processes the files are read in and the power output
+        columns are checked for interpolated data in. Default: 1.
+    partition_folder : String, optional
+        Folder of the parsed source files (see :py:func:`~.get_partitions`).
+        If None '{pickle dump}_partitions' is used. Default: None.
+    columns : List, optional
+        Columns to be returned. Only these columns are read from the store
+        if `pickle_load` is True. If None all columns are returned.
+        Default: None.
 
     Returns
     -------
@@ -170,29 +390,18 @@ def get_data(filename_files, year, filename_pickle='pickle_dump.p',
                                         'dumps/validation_data',
                                         filename_pickle))
     if pickle_load:
-        df = pickle.load(open(path, 'rb'))
+        df = storage.load_frame(path, columns=columns)
     else:
-        if year == 2015:
-            filename_column_names = 'helper_files/column_names_2015.txt'
-            replace = 'PT5M'
-        if (year == 2016 or year == 2017):
-            filename_column_names = 'helper_files/column_names_2016_2017.txt'
-            replace = 'PT1M'
         with open(filename_files) as file:
-            df = pd.DataFrame()
-            for line in file:
-                name = line.strip()
-                df_part = restructure_data(name, filename_column_names,
-                                           filter_cols=True)
-                df_part.rename(columns={
-                    old_name: new_name for old_name, new_name in
-                    zip(read_file_to_list(filename_column_names),
-                        new_column_names(year))},
-                               inplace=True)
-                df = pd.concat([df, df_part])
-        # Convert string index to Datetime index
-        df.index = [pd.to_datetime(index.replace(replace, ''), utc=True) for
-                    index in df.index]
+            filenames = [line.strip() for line in file if line.strip()]
+        if partition_folder is None:
+            partition_folder = '{0}_partitions'.format(
+                os.path.splitext(path)[0])
+        # Only new or changed files are parsed and scanned
+        df, intervals = get_partitions(
+            filenames, year, partition_folder,
+            filter_interpolated_data=filter_interpolated_data,
+            processes=processes)
         # Convert to local time zone
         df.index = df.index.tz_convert('Europe/Berlin')
         # Add frequency attribute
@@ -201,15 +410,16 @@ def get_data(filename_files, year, filename_pickle='pickle_dump.p',
         if filter_interpolated_data:
             print('---- The interpolated data of ArgeNetz data in {0} '.format(
                       year) + 'is being filtered. ----')
-            df_corrected = df.copy()
-            for column_name in list(df):
-                if 'power_output' in column_name:
-                    df_corrected[column_name] = tools.filter_interpolated_data(
-                        df[column_name], window_size=10, tolerance=0.0011,
-                        replacement_character=np.nan, plot=False)
-            df = df_corrected
-            print('---- Filtering of {0} Done. ----'.format(year))
-        pickle.dump(df, open(path, 'wb'))
+            df = data_quality.apply_intervals(
+                df, intervals, checks=['interpolated'],
+                replacement_character=np.nan)
+            gaps = intervals[intervals['check'] == 'interpolated']
+            print('---- Filtering of {0} Done: {1} gaps with '.format(
+                      year, len(gaps)) +
+                  '{0} time steps removed. ----'.format(gaps['length'].sum()))
+        storage.dump_frame(df, storage.get_storage_folder(path))
+        if columns is not None:
+            df = df[columns]
     return df
 
 
@@ -272,7 +482,8 @@ def plot_argenetz_data(df, save_folder, y_limit=None, x_limit=None):
 
 def get_argenetz_data(year, pickle_load=False, filename='pickle_dump.p',
                       csv_load=False, csv_dump=True,
-                      filter_interpolated_data=True, plot=False, x_limit=None):
+                      filter_interpolated_data=True, plot=False, x_limit=None,
+                      processes=1, columns=None):
     r"""
     Fetches ArgeNetz data for specified year and plots feedin.
 
@@ -301,6 +512,10 @@ def get_argenetz_data(year, pickle_load=False, filename='pickle_dump.p',
     x_limit : list of floats or integers
         Values for xmin and xmax in case of `plot` being True and x limits
         wanted. Default: None.
+    processes : Integer
+        Number of worker processes used in :py:func:`~.get_data`. Default: 1.
+    columns : List, optional
+        Columns to be returned. See :py:func:`~.get_data`. Default: None.
 
     Returns
     -------
@@ -309,14 +524,16 @@ def get_argenetz_data(year, pickle_load=False, filename='pickle_dump.p',
         get_data()).
     """
     if pickle_load:
-        argenetz_df = pickle.load(open(filename, 'rb'))
+        argenetz_df = storage.load_frame(filename, columns=columns)
     elif csv_load:
         argenetz_df = pd.read_csv(filename.replace('.p', '.csv'))
     else:
         # Load data with get_data(); data frame is dumped in this function
-        argenetz_df = get_data('helper_files/filenames_{0}.txt'.format(year),
-                               year, filename, pickle_load=pickle_load,
-                               filter_interpolated_data=filter_interpolated_data)
+        argenetz_df = get_data(
+            'helper_files/filenames_{0}.txt'.format(year), year, filename,
+            pickle_load=pickle_load,
+            filter_interpolated_data=filter_interpolated_data,
+            processes=processes, columns=columns)
     if csv_dump:
         argenetz_df.to_csv(filename.replace('.p', '.csv'))
     if plot:
@@ -0,0 +1,211 @@
+"""
+The ``corrections`` module contains functions to correct the simulated power
+output of wind farms by availability and curtailment factors.
+
+Correction factors are time series with values between 0 and 1 - one column
+per wind farm named like the wind farm (for example 'wf_9'). They can be
+derived from any validation data source:
+- 'availability': installed power reported by the data source relative to its
+  maximum (share of turbines in operation), see
+  :py:func:`~.get_availability_factors`
+- 'curtailment': measured power output relative to the possible (theoretical)
+  power output, see :py:func:`~.get_curtailment_factors`. The Enertrag data
+  contains the relative curtailment of wind farm 9 directly (see
+  :py:func:`~.enertrag_data.get_enertrag_curtailment_data`).
+
+The factors of all sources are joined into one data frame with the frequency
+of the simulation (see :py:func:`~.join_factors`), which can be cached like
+other time series (see :py:mod:`~.result_cache`), and applied to all simulated
+time series in one vectorized operation (see :py:func:`~.apply_factors`).
+
+"""
+
+# Other imports
+import pandas as pd
+import numpy as np
+
+
+available_factors = ['availability', 'curtailment']
+
+
+def get_wind_farm_name(column_name):
+    r"""
+    Returns the wind farm name of a column ('wf_1' for 'wf_1_measured').
+
+    """
+    return '_'.join(column_name.split('_')[:2])
+
+
+def get_availability_factors(df, wind_farm_names):
+    r"""
+    Derives availability factors from the installed power of wind farms.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Data with columns '{wind farm}_installed_power' (ArgeNetz data).
+    wind_farm_names : List
+        Names of the wind farms, for example: ['wf_1', 'wf_3']. Wind farms
+        without installed power column are skipped.
+
+    Returns
+    -------
+    pd.DataFrame
+        Installed power relative to the maximum installed power of each wind
+        farm (columns).
+
+    """
+    column_names = ['{0}_installed_power'.format(wind_farm_name) for
+                    wind_farm_name in wind_farm_names if
+                    '{0}_installed_power'.format(wind_farm_name) in df]
+    installed_power = df[column_names].values
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factors = installed_power / np.nanmax(installed_power, axis=0)
+    return pd.DataFrame(factors, index=df.index, columns=[
+        get_wind_farm_name(column_name) for column_name in column_names])
+
+
+def get_curtailment_factors(df, wind_farm_names):
+    r"""
+    Derives curtailment factors from the possible power output of wind farms.
+
+    The factor is 1 where the possible power output is zero.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Data with columns '{wind farm}_power_output' and
+        '{wind farm}_theoretical_power' (ArgeNetz data).
+    wind_farm_names : List
+        Names of the wind farms, for example: ['wf_1', 'wf_3']. Wind farms
+        without these columns are skipped.
+
+    Returns
+    -------
+    pd.DataFrame
+        Measured power output relative to the possible power output (clipped
+        to 0 - 1) of each wind farm (columns).
+
+    """
+    names = [wind_farm_name for wind_farm_name in wind_farm_names if
+             '{0}_power_output'.format(wind_farm_name) in df and
+             '{0}_theoretical_power'.format(wind_farm_name) in df]
+    power_output = df[['{0}_power_output'.format(name) for
+                       name in names]].values
+    theoretical_power = df[['{0}_theoretical_power'.format(name) for
+                            name in names]].values
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factors = np.clip(power_output / theoretical_power, 0, 1)
+    factors[theoretical_power == 0] = 1
+    return pd.DataFrame(factors, index=df.index, columns=names)
+
+
+def get_factors(df, wind_farm_names, factors=None):
+    r"""
+    Derives correction factors of wind farms from a data source.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Data of the source. See :py:func:`~.get_availability_factors` and
+        :py:func:`~.get_curtailment_factors`.
+    wind_farm_names : List
+        Names of the wind farms, for example: ['wf_1', 'wf_3'].
+    factors : List, optional
+        Kinds of factors to be derived (see `available_factors`). If None all
+        available factors are derived. Default: None.
+
+    Returns
+    -------
+    pd.DataFrame
+        Product of the factors of each wind farm (columns).
+
+    """
+    if factors is None:
+        factors = available_factors
+    functions = {'availability': get_availability_factors,
+                 'curtailment': get_curtailment_factors}
+    for factor in factors:
+        if factor not in functions:
+            raise ValueError(
+                "`factors` must be in {0} but contains {1}".format(
+                    available_factors, factor))
+    return multiply_factors([functions[factor](df, wind_farm_names) for
+                             factor in factors])
+
+
+def multiply_factors(factor_dfs):
+    r"""
+    Multiplies the factors of the same wind farms of several data frames.
+
+    Missing values of a data frame are ignored if another data frame contains
+    a factor of the wind farm for the time step.
+
+    """
+    factor_df = pd.concat(factor_dfs, axis=1)
+    return factor_df.T.groupby(level=0, sort=False).prod(min_count=1).T
+
+
+def join_factors(factor_dfs, frequency):
+    r"""
+    Joins the correction factors of several sources.
+
+    Parameters
+    ----------
+    factor_dfs : List
+        Correction factors (pd.DataFrame with one column per wind farm) of
+        the sources.
+    frequency : String or pd.DateOffset
+        Frequency the factors are resampled to (mean).
+
+    Returns
+    -------
+    pd.DataFrame
+        Correction factors of all wind farms (columns) with frequency
+        `frequency`. Factors of the same wind farm from several sources are
+        multiplied.
+
+    """
+    factor_dfs = [factor_df.resample(frequency).mean() for
+                  factor_df in factor_dfs if not factor_df.columns.empty]
+    if not factor_dfs:
+        return pd.DataFrame(index=pd.DatetimeIndex([]))
+    return multiply_factors(factor_dfs)
+
+
+def apply_factors(calculation_df, factor_df):
+    r"""
+    Multiplies simulated time series by the correction factors of their wind
+    farms.
+
+    All columns are corrected in one vectorized operation. Columns of wind
+    farms without factors are not changed. Time steps without factor are set
+    to nan.
+
+    Parameters
+    ----------
+    calculation_df : pd.DataFrame
+        Simulated time series. Column names start with the name of the wind
+        farm, for example: 'wf_9_calculated_simple'.
+    factor_df : pd.DataFrame
+        Correction factors of the wind farms (columns). See
+        :py:func:`~.join_factors`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Corrected time series.
+
+    """
+    factor_names = list(factor_df)
+    if not factor_names:
+        return calculation_df
+    factors = factor_df.reindex(calculation_df.index).values
+    # Last column: factor 1 for wind farms without correction
+    factors = np.column_stack([factors, np.ones(len(factors))])
+    positions = [factor_names.index(get_wind_farm_name(column_name)) if
+                 get_wind_farm_name(column_name) in factor_names else
+                 len(factor_names) for column_name in list(calculation_df)]
+    return pd.DataFrame(calculation_df.values * factors[:, positions],
+                        index=calculation_df.index,
+                        columns=calculation_df.columns)
@@ -0,0 +1,385 @@
+"""
+The ``data_quality`` module contains functions to detect implausible values in
+measured feed-in time series (ArgeNetz, Enertrag, GreenWind).
+
+The following checks are available:
+- 'interpolated': linearly interpolated values (indicator for missing data),
+  see :py:func:`~.tools.get_interpolation_mask`
+- 'constant': frozen values that do not change over many time steps
+- 'negative': negative power output
+- 'above_capacity': power output above the installed power of the wind farm
+
+The detected time steps are stored as intervals (one row per run of flagged
+time steps of a column and check), so filtering the data is an interval
+operation and the results of a scan can be dumped and reused.
+
+"""
+
+# Imports from lib_validation
+import tools
+
+# Other imports
+import pandas as pd
+import numpy as np
+import multiprocessing
+import hashlib
+import os
+import pickle
+
+
+available_checks = ['interpolated', 'constant', 'negative', 'above_capacity']
+
+
+def get_constant_mask(values, min_length=10, exclude_zero=True):
+    r"""
+    Flags values that do not change over at least `min_length` time steps.
+
+    Parameters
+    ----------
+    values : np.array
+        Time series values.
+    min_length : Integer
+        Minimum number of time steps of a run of equal values. Default: 10.
+    exclude_zero : Boolean
+        If True runs of zeros (for example low wind speeds) are not flagged.
+        Default: True.
+
+    Returns
+    -------
+    np.array
+        Boolean mask with True for the time steps of constant runs.
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.zeros(0, dtype=bool)
+    # Number of the run of equal values of each time step (nan values are
+    # never equal)
+    run_numbers = np.cumsum(np.concatenate(
+        ([True], values[1:] != values[:-1]))) - 1
+    mask = np.bincount(run_numbers)[run_numbers] >= min_length
+    mask &= ~np.isnan(values)
+    if exclude_zero:
+        mask &= values != 0
+    return mask
+
+
+def get_check_mask(series, check, installed_power=None, window_size=10,
+                   tolerance=0.0011, constant_length=10,
+                   capacity_tolerance=0.0):
+    r"""
+    Flags the time steps of a series that do not pass a check.
+
+    Parameters
+    ----------
+    series : pd.Series
+        Power output time series.
+    check : String
+        Name of the check. See `available_checks`.
+    installed_power : np.array or Float, optional
+        Installed power in the unit of `series`. Only needed for the check
+        'above_capacity'. Default: None.
+    window_size : Integer
+        See :py:func:`~.tools.get_interpolation_mask`. Default: 10.
+    tolerance : Float
+        See :py:func:`~.tools.get_interpolation_mask`. Default: 0.0011.
+    constant_length : Integer
+        See `min_length` in :py:func:`~.get_constant_mask`. Default: 10.
+    capacity_tolerance : Float
+        Relative tolerance of the installed power. Default: 0.0.
+
+    Returns
+    -------
+    np.array
+        Boolean mask with True for the flagged time steps.
+
+    """
+    values = series.values
+    if check == 'interpolated':
+        return tools.get_interpolation_mask(values, window_size=window_size,
+                                            tolerance=tolerance)
+    if check == 'constant':
+        return get_constant_mask(values, min_length=constant_length)
+    with np.errstate(invalid='ignore'):
+        if check == 'negative':
+            return values < 0
+        if check == 'above_capacity':
+            if installed_power is None:
+                return np.zeros(len(values), dtype=bool)
+            return values > (np.asarray(installed_power, dtype=np.float64) *
+                             (1 + capacity_tolerance))
+    raise ValueError("`check` must be in {0} but is {1}".format(
+        available_checks, check))
+
+
+def get_installed_power(df, column_name, installed_power=None):
+    r"""
+    Returns the installed power belonging to a power output column.
+
+    The installed power is taken from `installed_power` if the column or its
+    wind farm ('wf_1' for 'wf_1_power_output') is a key of it, else from the
+    column '{wind farm}_installed_power' of `df` (ArgeNetz data).
+
+    """
+    wind_farm = '_'.join(column_name.split('_')[:2])
+    if installed_power is not None:
+        for key in [column_name, wind_farm]:
+            if key in installed_power:
+                return installed_power[key]
+    installed_power_column = '{0}_installed_power'.format(wind_farm)
+    if installed_power_column in df:
+        return df[installed_power_column].values
+    return None
+
+
+def _scan_column(series, checks, installed_power, kwargs):
+    intervals_list = []
+    for check in checks:
+        intervals = tools.get_runs(
+            get_check_mask(series, check, installed_power=installed_power,
+                           **kwargs),
+            series.index)
+        intervals.insert(0, 'check', check)
+        intervals.insert(0, 'column_name', series.name)
+        intervals_list.append(intervals)
+    return pd.concat(intervals_list, ignore_index=True)
+
+
+def scan_data_quality(df, column_names=None, checks=None,
+                      installed_power=None, processes=1, **kwargs):
+    r"""
+    Detects implausible values in power output time series.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Measured feed-in time series (columns) with DatetimeIndex.
+    column_names : List, optional
+        Columns to be checked. If None all columns containing 'power_output'
+        are checked. Default: None.
+    checks : List, optional
+        Checks to be done. If None all `available_checks` are done.
+        Default: None.
+    installed_power : Dictionary, optional
+        Installed power of columns or wind farms. See
+        :py:func:`~.get_installed_power`. Default: None.
+    processes : Integer
+        Number of worker processes the columns are distributed to. If 1 the
+        columns are checked in the current process. Default: 1.
+    kwargs :
+        Parameters of :py:func:`~.get_check_mask` like `window_size`,
+        `tolerance`, `constant_length` and `capacity_tolerance`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Interval table with one row per run of flagged time steps and the
+        columns 'column_name', 'check', 'start', 'end' (first and last flagged
+        time step) and 'length' (number of time steps).
+
+    """
+    if column_names is None:
+        column_names = [column_name for column_name in list(df) if
+                        'power_output' in column_name]
+    if checks is None:
+        checks = available_checks
+    tasks = [(df[column_name], checks,
+              get_installed_power(df, column_name, installed_power), kwargs)
+             for column_name in column_names]
+    if processes == 1:
+        results = [_scan_column(*task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.starmap(_scan_column, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    if not results:
+        return pd.DataFrame(
+            columns=['column_name', 'check', 'start', 'end', 'length'])
+    return pd.concat(results, ignore_index=True)
+
+
+def get_interval_mask(index, intervals):
+    r"""
+    Converts intervals into a mask of an index.
+
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+        Sorted time steps.
+    intervals : pd.DataFrame
+        Interval table with the columns 'start' and 'end'. See
+        :py:func:`~.scan_data_quality`.
+
+    Returns
+    -------
+    np.array
+        Boolean mask with True for the time steps lying in an interval.
+
+    """
+    starts = index.searchsorted(pd.Index(intervals['start']), side='left')
+    ends = index.searchsorted(pd.Index(intervals['end']), side='right')
+    coverage = np.zeros(len(index) + 1, dtype=np.int64)
+    np.add.at(coverage, starts, 1)
+    np.add.at(coverage, ends, -1)
+    return np.cumsum(coverage[:-1]) > 0
+
+
+def apply_intervals(df, intervals, checks=None, replacement_character=np.nan):
+    r"""
+    Sets the values of flagged intervals to `replacement_character`.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Measured feed-in time series (columns) with DatetimeIndex.
+    intervals : pd.DataFrame
+        Interval table. See :py:func:`~.scan_data_quality`.
+    checks : List, optional
+        Only intervals of these checks are applied. If None all intervals are
+        applied. Default: None.
+    replacement_character : Integer, Float or np.nan
+        Default: np.nan.
+
+    Returns
+    -------
+    pd.DataFrame
+        Copy of `df` with replaced values.
+
+    """
+    if checks is not None:
+        intervals = intervals[intervals['check'].isin(checks)]
+    corrected_df = df.copy()
+    for column_name, column_intervals in intervals.groupby('column_name'):
+        if column_name in corrected_df:
+            corrected_df.loc[get_interval_mask(df.index, column_intervals),
+                             column_name] = replacement_character
+    return corrected_df
+
+
+def get_quality_report(intervals):
+    r"""
+    Summarizes an interval table.
+
+    Parameters
+    ----------
+    intervals : pd.DataFrame
+        Interval table. See :py:func:`~.scan_data_quality`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Number of intervals and flagged time steps for each column (index) and
+        check (columns).
+
+    """
+    return intervals.groupby(['column_name', 'check'])['length'].agg(
+        ['count', 'sum']).unstack('check').fillna(0).astype(int)
+
+
+def get_intervals_filename(filename):
+    r"""
+    Returns the filename of the interval dump belonging to a data dump.
+
+    For example: 'dumps/validation_data/arge_netz_data_2015_intervals.p' for
+    'dumps/validation_data/arge_netz_data_2015.p'.
+
+    """
+    return '{0}_intervals.p'.format(os.path.splitext(filename)[0])
+
+
+def get_data_signature(df):
+    r"""
+    Returns length, first and last time step, columns and content hash of a
+    data frame.
+
+    The signature is dumped together with the intervals to decide whether a
+    dump can be reused for a data frame. The content hash (SHA1 of the hashes
+    of the rows including the index) changes if any value of the data frame
+    is changed, so intervals of changed data are not reused.
+
+    """
+    content_hash = hashlib.sha1(
+        pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return (len(df.index), df.index[0] if len(df.index) else None,
+            df.index[-1] if len(df.index) else None, tuple(df.columns),
+            content_hash.hexdigest())
+
+
+def get_quality_intervals(df, filename, pickle_load=True, **kwargs):
+    r"""
+    Loads the interval table of a data frame or scans the data frame.
+
+    The interval table is loaded from the dump belonging to `filename` (see
+    :py:func:`~.get_intervals_filename`) if it was created for a data frame
+    with the same signature (see :py:func:`~.get_data_signature`). Otherwise
+    `df` is scanned by :py:func:`~.scan_data_quality` and the interval table
+    is dumped together with the signature and the parameters of the scan.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Measured feed-in time series (columns) with DatetimeIndex.
+    filename : String
+        Name (including path) of the data dump of `df`.
+    pickle_load : Boolean
+        If False `df` is scanned in any case. Default: True.
+    kwargs :
+        Parameters of :py:func:`~.scan_data_quality`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Interval table. See :py:func:`~.scan_data_quality`.
+
+    """
+    intervals_filename = get_intervals_filename(filename)
+    signature = get_data_signature(df)
+    # The number of processes does not change the intervals
+    scan_parameters = {key: value for key, value in kwargs.items() if
+                       key != 'processes'}
+    if pickle_load and os.path.exists(intervals_filename):
+        with open(intervals_filename, 'rb') as file:
+            dump = pickle.load(file)
+        if (dump['signature'] == signature and
+                dump['scan_parameters'] == scan_parameters):
+            return dump['intervals']
+    intervals = scan_data_quality(df, **kwargs)
+    with open(intervals_filename, 'wb') as file:
+        pickle.dump({'signature': signature,
+                     'scan_parameters': scan_parameters,
+                     'intervals': intervals}, file)
+    return intervals
+
+
+if __name__ == "__main__":
+    # Import here as the loaders import plotting libraries
+    import argenetz_data
+    import enertrag_data
+    import greenwind_data
+
+    year = 2016
+    validation_folder = os.path.join(os.path.dirname(__file__),
+                                     'dumps/validation_data')
+    filenames = {
+        'ArgeNetz': os.path.join(validation_folder,
+                                 'arge_netz_data_{0}.p'.format(year)),
+        'Enertrag': os.path.join(validation_folder,
+                                 'enertrag_data_{0}.p'.format(year)),
+        'GreenWind': os.path.join(validation_folder,
+                                  'greenwind_data_{0}.p'.format(year))}
+    data_frames = {
+        'ArgeNetz': argenetz_data.get_argenetz_data(
+            year, pickle_load=True, filename=filenames['ArgeNetz'],
+            csv_dump=False),
+        'Enertrag': enertrag_data.get_enertrag_data(
+            pickle_load=True, filename=filenames['Enertrag']),
+        'GreenWind': greenwind_data.get_greenwind_data(
+            year, pickle_load=True, filename=filenames['GreenWind'])}
+    for validation_name, df in data_frames.items():
+        intervals = get_quality_intervals(df, filenames[validation_name])
+        print('---- Data quality of {0} data ({1}) ----'.format(
+            validation_name, year))
+        print(get_quality_report(intervals))
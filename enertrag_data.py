@@ -15,14 +15,31 @@ column 'wf_9_power_output'.
 DateTimeIndex in 'Europe/Berlin' time zone.
 """
 
+# Imports from lib_validation
+import storage
+
 # Other imports
 from matplotlib import pyplot as plt
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
+import multiprocessing
 import os
 import pickle
 
 
+# Variables of the turbine files (column names of the files as keys)
+turbine_variables = OrderedDict([
+    ('Zählerstand[kWh]', 'meter'),
+    ('Windgeschwindigkeit[m/s]', 'wind_speed'),
+    ('Leistung[kW]', 'power_output'),
+    ('Gondelposition', 'wind_dir')])
+
+# Curtailment data in base resolution (key None) and resampled (frequency
+# strings as keys) - see :py:func:`~.get_enertrag_curtailment_data`
+_curtailment_cache = {}
+
+
 def read_data(filename):
     r"""
     Fetches data from a csv file.
@@ -43,9 +60,159 @@ def read_data(filename):
     return df
 
 
+def read_turbine_file(filename, variables, datapath=None):
+    r"""
+    Reads the selected variables of the csv file of a wind turbine.
+
+    Only the index column and the columns of `variables` are parsed
+    (`usecols`) with float dtype.
+
+    Parameters
+    ----------
+    filename : String
+        Name of data file.
+    variables : List
+        Column names of the file to be read (see `turbine_variables`).
+    datapath : String, optional
+        Path where the data file is stored. Default: None ('./data/Enertrag').
+
+    Returns
+    -------
+    Tuple (np.array, Dictionary)
+        Time stamps in UTC as datetime64[ns] and the values (np.array) with
+        the column names of the file as keys.
+
+    """
+    if datapath is None:
+        datapath = os.path.join(os.path.dirname(__file__), 'data/Enertrag')
+    path = os.path.join(datapath, filename)
+    # Read header only to select the columns
+    header = list(pd.read_csv(path, sep=',', nrows=0))
+    columns = [column for column in variables if column in header]
+    df = pd.read_csv(
+        path, sep=',', decimal='.', index_col=0,
+        usecols=[header[0]] + columns,
+        dtype=dict({column: np.float64 for column in columns},
+                   **{header[0]: str}))
+    times = pd.to_datetime(df.index).values.astype('datetime64[ns]')
+    return times, {column: df[column].values for column in columns}
+
+
+def _read_turbine_file(args):
+    return read_turbine_file(*args)
+
+
+def read_turbine_files(filenames, variables, datapath=None, processes=1):
+    r"""
+    Reads the turbine files into one array (turbine x time) per variable.
+
+    The files are parsed in `processes` worker processes. The time stamps of
+    all files are aligned on their union, the arrays are allocated once.
+
+    Parameters
+    ----------
+    filenames : List
+        Names of the data files of the turbines.
+    variables : List
+        See :py:func:`~.read_turbine_file`.
+    datapath : String, optional
+        See :py:func:`~.read_turbine_file`.
+    processes : Integer
+        Number of worker processes. If 1 the files are read in the current
+        process. Default: 1.
+
+    Returns
+    -------
+    Tuple (np.array, Dictionary)
+        Sorted union of the time stamps (UTC, datetime64[ns]) and one array
+        of shape (number of files, number of time stamps) for each variable
+        (column names of the files as keys). Missing values are nan.
+
+    """
+    tasks = [(filename, variables, datapath) for filename in filenames]
+    if processes == 1:
+        parts = [_read_turbine_file(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            parts = pool.map(_read_turbine_file, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    times = np.unique(np.concatenate([part[0] for part in parts]))
+    arrays = {variable: np.full((len(filenames), len(times)), np.nan)
+              for variable in variables}
+    for number, (part_times, values) in enumerate(parts):
+        positions = np.searchsorted(times, part_times)
+        for variable, variable_values in values.items():
+            arrays[variable][number, positions] = variable_values
+    return times, arrays
+
+
+def resample_arrays(times, arrays, frequency):
+    r"""
+    Resamples arrays (row x time) to the mean of time intervals.
+
+    All rows are resampled in one pass. The intervals start at multiples of
+    `frequency` since 1970-01-01 UTC (equal to midnight of the local time
+    zone for frequencies like '30T' or 'H' in time zones with full hour
+    offsets).
+
+    Parameters
+    ----------
+    times : np.array
+        Sorted time stamps in UTC (datetime64[ns]).
+    arrays : Dictionary
+        Arrays of shape (number of rows, number of time stamps).
+    frequency : String or pd.DateOffset
+        Fixed frequency like '30T'.
+
+    Returns
+    -------
+    Tuple (np.array, Dictionary)
+        Start of the intervals (UTC, datetime64[ns]) and the mean values of
+        the arrays (nan for intervals without values).
+
+    """
+    step = pd.tseries.frequencies.to_offset(frequency).nanos
+    int_times = times.astype(np.int64)
+    first = int_times[0] // step
+    codes = int_times // step - first
+    number_of_intervals = codes[-1] + 1
+    new_times = ((first + np.arange(number_of_intervals)) * step).astype(
+        'datetime64[ns]')
+    resampled_arrays = {}
+    for variable, values in arrays.items():
+        rows = values.shape[0]
+        flat_codes = (np.arange(rows)[:, np.newaxis] * number_of_intervals +
+                      codes).ravel()
+        valid = ~np.isnan(values.ravel())
+        sums = np.bincount(flat_codes[valid], weights=values.ravel()[valid],
+                           minlength=rows * number_of_intervals)
+        counts = np.bincount(flat_codes[valid],
+                             minlength=rows * number_of_intervals)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        means[counts == 0] = np.nan
+        resampled_arrays[variable] = means.reshape(rows, number_of_intervals)
+    return new_times, resampled_arrays
+
+
+def get_farm_output_filename(filename):
+    r"""
+    Returns the dump filename of the wind farm power output only.
+
+    For example: 'dumps/validation_data/enertrag_data_farm.p' for
+    'dumps/validation_data/enertrag_data.p'.
+
+    """
+    return '{0}_farm{1}'.format(*os.path.splitext(filename))
+
+
 def get_enertrag_data(pickle_load=False, filename='enertrag_dump.p',
                       resample=True, plot=False, x_limit=None,
-                      frequency='30T', curtailment=True):
+                      frequency='30T', curtailment=True, columns=None,
+                      farm_output_only=False, processes=1):
     # TODO: add plots to check data
     r"""
     Fetches Enertrag data.
@@ -72,6 +239,19 @@ def get_enertrag_data(pickle_load=False, filename='enertrag_dump.p',
     curtailment : Boolean
         If True an average (30min) curtailment of the wind farm power output is
         added.
+    columns : List, optional
+        Columns to be returned. Only these columns are read from the store
+        if `pickle_load` is True. If None all columns are returned.
+        Default: None.
+    farm_output_only : Boolean
+        If True only the power output of the turbines is read and only the
+        power output of the wind farm ('wf_9_power_output') is returned. It is
+        dumped to (and loaded from) a separate store with the suffix '_farm'
+        (see :py:func:`~.get_farm_output_filename`), so the store of the
+        complete data is not replaced. Default: False.
+    processes : Integer
+        Number of worker processes the turbine files are parsed in. See
+        :py:func:`~.read_turbine_files`. Default: 1.
 
     Returns
     -------
@@ -79,55 +259,80 @@ def get_enertrag_data(pickle_load=False, filename='enertrag_dump.p',
         Enertrag wind farm data.
 
     """
+    if farm_output_only:
+        filename = get_farm_output_filename(filename)
     if pickle_load:
-        enertrag_df = pickle.load(open(filename, 'rb'))
+        enertrag_df = storage.load_frame(filename, columns=columns)
     else:
         filename_files = os.path.join(os.path.dirname(__file__),
                                       'helper_files/filenames_enertrag.txt')
-        enertrag_df = pd.DataFrame()
         with open(filename_files) as file:
-            for line in file:
-                name = line.strip()
-                df_part = read_data(name)
+            names = [line.strip() for line in file if line.strip()]
+        variables = (['Leistung[kW]'] if farm_output_only else
+                     list(turbine_variables))
+        times, arrays = read_turbine_files(names, variables,
+                                           processes=processes)
+        if resample:
+            times, arrays = resample_arrays(times, arrays, frequency)
+        # Time zone aware index
+        index = pd.DatetimeIndex(times).tz_localize('UTC').tz_convert(
+            'Europe/Berlin')
+        # Columns of the turbines and power output of the wind farm
+        data = OrderedDict()
+        if not farm_output_only:
+            for number, name in enumerate(names):
                 turbine_name = name.split('_')[1].split('.')[0]
-                # Rename columns
-                df_part.rename(columns={
-                    'Zählerstand[kWh]': 'wf_9_{0}_meter'.format(turbine_name),
-                    'Windgeschwindigkeit[m/s]': 'wf_9_{0}_wind_speed'.format(
-                        turbine_name),
-                    'Leistung[kW]': 'wf_9_{0}_power_output'.format(
-                        turbine_name),
-                    'Gondelposition': 'wf_9_{0}_wind_dir'.format(
-                        turbine_name)}, inplace=True)
-                # Add to DataFrame
-                enertrag_df = pd.concat([enertrag_df, df_part], axis=1)
-            # Convert index to DatetimeIndex and make time zone aware
-            enertrag_df.index = pd.to_datetime(enertrag_df.index).tz_localize(
-                'UTC').tz_convert('Europe/Berlin')
-            if resample:
-                enertrag_df = enertrag_df.resample(frequency).mean()
-            # Add frequency attribute
-            freq = pd.infer_freq(enertrag_df.index)
-            enertrag_df.index.freq = pd.tseries.frequencies.to_offset(freq)
-            # Get wind farm power output
-            enertrag_df['wf_9_power_output'] = enertrag_df.loc[
-                :, [column for column in list(enertrag_df) if
-                    'power_output' in column]].sum(skipna=True, axis=1)
-            pickle.dump(enertrag_df, open(filename, 'wb'))
+                for variable in variables:
+                    data['wf_9_{0}_{1}'.format(
+                        turbine_name, turbine_variables[variable])] = (
+                        arrays[variable][number])
+        data['wf_9_power_output'] = np.nansum(arrays['Leistung[kW]'], axis=0)
+        enertrag_df = pd.DataFrame(data, index=index)
+        # Add frequency attribute
+        freq = pd.infer_freq(enertrag_df.index)
+        enertrag_df.index.freq = pd.tseries.frequencies.to_offset(freq)
+        storage.dump_frame(enertrag_df, storage.get_storage_folder(filename))
+        if columns is not None:
+            enertrag_df = enertrag_df[columns]
     return enertrag_df
 
 
-def get_enertrag_curtailment_data(frequency):
+def get_enertrag_curtailment_data(frequency=None):
     r"""
+    Returns the relative curtailment of the wind farm.
+
+    The csv file is parsed once per process. The data in its base resolution
+    (15 min) and the data resampled to each requested frequency are cached in
+    memory, so the returned data frames must not be changed.
+
+    Parameters
+    ----------
+    frequency : String or pd.DateOffset, optional
+        Frequency the curtailment is resampled to (mean). If None the data is
+        returned in its base resolution. Default: None.
+
+    Returns
+    -------
+    pd.DataFrame
+        Relative curtailment in column 'curtail_rel' with DatetimeIndex in
+        'Europe/Berlin' time zone.
 
     """
-    data = read_data(
-        'windpark_nechlin_production_and_curtailment_2016_15min.csv')
-    data.index = pd.to_datetime(data.index).tz_localize(
-        'UTC').tz_convert('Europe/Berlin')
-    curtailment_data = data.drop(
-        ['power_rel', 'wind_mean'], axis=1).resample(frequency).mean()
-    return curtailment_data
+    key = (None if frequency is None else
+           pd.tseries.frequencies.to_offset(frequency).freqstr)
+    if key not in _curtailment_cache:
+        if key is None:
+            data = read_data(
+                'windpark_nechlin_production_and_curtailment_2016_15min.csv')
+            data.index = pd.to_datetime(data.index).tz_localize(
+                'UTC').tz_convert('Europe/Berlin')
+            _curtailment_cache[key] = data.drop(['power_rel', 'wind_mean'],
+                                                axis=1)
+        else:
+            _curtailment_cache[key] = get_enertrag_curtailment_data().resample(
+                frequency).mean()
+    return _curtailment_cache[key]
+
 
 if __name__ == "__main__":
     # Decide whether to resample to a certain frequency
@@ -0,0 +1,162 @@
+"""
+The ``fleet_simulation`` module contains functions to calculate the power
+output of many wind farms at once.
+
+The turbines of all wind farms are grouped by turbine type and hub height. The
+wind speed at hub height and the power output of one turbine are calculated
+once per group as numpy arrays over all time steps and grid points used by the
+wind farms. The power output of the wind farms is then the product of these
+arrays with a sparse matrix containing the number of turbines of each group
+in each wind farm.
+
+"""
+
+# Imports from Windpowerlib
+from windpowerlib import wind_speed
+
+# Other imports
+from scipy import sparse
+import pandas as pd
+import numpy as np
+
+
+def get_turbine_groups(wind_farm_list):
+    r"""
+    Groups the turbines of all wind farms by turbine type and hub height.
+
+    Parameters
+    ----------
+    wind_farm_list : List
+        Contains :class:`~.windpowerlib.wind_farm.WindFarm` objects.
+
+    Returns
+    -------
+    turbines : List
+        Contains one :class:`~.windpowerlib.wind_turbine.WindTurbine` object
+        per group (turbine type, hub height).
+    turbine_counts : scipy.sparse.csr_matrix
+        Number of turbines of each group (columns) in each wind farm (rows).
+
+    """
+    groups = {}
+    turbines = []
+    rows, columns, counts = [], [], []
+    for farm_number, wind_farm in enumerate(wind_farm_list):
+        for turbine_type in wind_farm.wind_turbine_fleet:
+            turbine = turbine_type['wind_turbine']
+            key = (turbine.object_name, turbine.hub_height)
+            if key not in groups:
+                groups[key] = len(turbines)
+                turbines.append(turbine)
+            rows.append(farm_number)
+            columns.append(groups[key])
+            counts.append(turbine_type['number_of_turbines'])
+    # Entries of the same group in one wind farm are summed up
+    turbine_counts = sparse.csr_matrix(
+        (counts, (rows, columns)), shape=(len(wind_farm_list), len(turbines)))
+    return turbines, turbine_counts
+
+
+def wind_speed_hub(weather_list, hub_height, obstacle_height=0):
+    r"""
+    Calculates the wind speed at hub height for several grid points.
+
+    Like in :py:meth:`~.windpowerlib.modelchain.ModelChain.wind_speed_hub` with
+    `wind_speed_model` 'logarithmic', the wind speed of the height closest to
+    `hub_height` is used.
+
+    Parameters
+    ----------
+    weather_list : List
+        Contains weather data frames (pd.DataFrame) with the same index and
+        columns, one for each grid point. See
+        :py:func:`~.tools.get_weather_data_of_farms`.
+    hub_height : Float
+        Hub height in m.
+    obstacle_height : Float
+        Height of obstacles in m. Default: 0.
+
+    Returns
+    -------
+    np.array
+        Wind speed at hub height in m/s with shape (time steps, grid points).
+
+    """
+    heights = np.array(weather_list[0]['wind_speed'].columns)
+    closest_height = heights[np.argmin(np.abs(heights - hub_height))]
+    wind_speed_data = np.column_stack(
+        [weather['wind_speed'][closest_height].values for
+         weather in weather_list])
+    if closest_height == hub_height:
+        return wind_speed_data
+    roughness_length = np.column_stack(
+        [weather['roughness_length'].iloc[:, 0].values for
+         weather in weather_list])
+    return wind_speed.logarithmic_profile(
+        wind_speed_data, closest_height, hub_height, roughness_length,
+        obstacle_height)
+
+
+def power_output_simple_farms(wind_farm_list, weather_list,
+                              obstacle_height=0):
+    r"""
+    Calculates the power output of several wind farms by a simple method.
+
+    Vectorized version of
+    :py:func:`~.modelchain_usage.power_output_simple` for many wind farms:
+    The wind speed at hub height is calculated by the logarithmic wind profile,
+    the power output of the turbines from their power curves without density
+    correction and the power output of the wind farms by aggregation of the
+    power output of their turbines.
+
+    Parameters
+    ----------
+    wind_farm_list : List
+        Contains :class:`~.windpowerlib.wind_farm.WindFarm` objects.
+    weather_list : List
+        Contains one weather data frame (pd.DataFrame) for each wind farm in
+        `wind_farm_list` as returned by
+        :py:func:`~.tools.get_weather_data_of_farms`. Equal weather data
+        frames (wind farms with the same closest grid point) are only used
+        once.
+    obstacle_height : Float
+        Height of obstacles in m. Default: 0.
+
+    Returns
+    -------
+    pd.DataFrame
+        Simulated power output of the wind farms in W. Column names are the
+        `object_name` attributes of the wind farms.
+
+    """
+    # Grid points used by the wind farms
+    unique_weather = []
+    farm_cells = []
+    for weather in weather_list:
+        for cell, cell_weather in enumerate(unique_weather):
+            if cell_weather is weather or cell_weather.equals(weather):
+                break
+        else:
+            cell = len(unique_weather)
+            unique_weather.append(weather)
+        farm_cells.append(cell)
+    number_of_cells = len(unique_weather)
+    turbines, turbine_counts = get_turbine_groups(wind_farm_list)
+    # Power output of one turbine of each group at each grid point with shape
+    # (time steps, groups * grid points)
+    turbine_power_output = np.hstack([np.interp(
+        wind_speed_hub(unique_weather, turbine.hub_height, obstacle_height),
+        turbine.power_curve['wind_speed'], turbine.power_curve['power'],
+        left=0, right=0) for turbine in turbines])
+    # Number of turbines of each group at each grid point in each wind farm
+    # with shape (groups * grid points, wind farms)
+    counts = turbine_counts.tocoo()
+    farm_matrix = sparse.csr_matrix(
+        (counts.data, (counts.col * number_of_cells +
+                       np.array(farm_cells)[counts.row], counts.row)),
+        shape=(len(turbines) * number_of_cells, len(wind_farm_list)))
+    farm_power_output = farm_matrix.transpose().dot(
+        turbine_power_output.transpose()).transpose()
+    return pd.DataFrame(
+        data=farm_power_output, index=weather_list[0].index,
+        columns=[wind_farm.object_name for wind_farm in wind_farm_list])
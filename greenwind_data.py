@@ -1,16 +1,16 @@
 """
 The ``greenwind_data`` module contains functions to read and dump measured
-feed-in time series from a GreenWind wind farm.
-
-# The following data is available (year 2016) for the 17 turbines:
-# - meter (Zählerstand) in kW
-# - power output in kW
-# - wind speed in m/s
-# - wind direction (gondel position) in °
-# ATTENTION: gondel position is not correct!!
-#
-# Additionally the sum of the power output of all wind turbines is available in
-# column 'wf_9_power_output'.
+feed-in time series from GreenWind wind farms.
+
+The data of each wind farm is stored in one csv file per year ('WF1_2015.csv',
+...). The wind farms of the files are assumed to be the GreenWind wind farms
+of :py:mod:`~.wind_farm_specifications` in the same order (WF1: 'wf_6', WF2:
+'wf_7', WF3: 'wf_8'). The columns of a file are prefixed with the name of its
+wind farm. If a file does not contain the power output of the wind farm
+('{wind farm}_power_output'), it is the sum of the power output of the
+turbines ('{wind farm}_{turbine}_power_output').
+
+Time stamps that occur more than once in a file (WF1) are only read once.
 
 DateTimeIndex in 'Europe/Berlin' time zone.
 """
@@ -19,15 +19,24 @@ DateTimeIndex in 'Europe/Berlin' time zone.
 import visualization_tools
 import analysis_tools
 import tools
+import storage
 
 # Other imports
 from matplotlib import pyplot as plt
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
+import multiprocessing
+import hashlib
 import os
 import pickle
 
 
+# Wind farm names of the files (see module docstring)
+wind_farm_names = OrderedDict([('WF1', 'wf_6'), ('WF2', 'wf_7'),
+                               ('WF3', 'wf_8')])
+
+
 def read_data(filename):
     r"""
     Fetches data from a csv file.
@@ -48,9 +57,238 @@ def read_data(filename):
     return df
 
 
+def get_new_time_step_mask(times, last_time=None):
+    r"""
+    Flags the time steps that are later than all previous time steps.
+
+    Time steps that occur again (duplicates or repeated blocks of time steps)
+    are not flagged, so the first occurrence is kept.
+
+    Parameters
+    ----------
+    times : np.array
+        Time stamps as integers (for example nanoseconds since 1970).
+    last_time : Integer, optional
+        Latest time stamp of previous data (for example of the previous chunk
+        of a file). Default: None.
+
+    Returns
+    -------
+    np.array
+        Boolean mask with True for the time steps to be kept.
+
+    """
+    if len(times) == 0:
+        return np.zeros(0, dtype=bool)
+    if last_time is None:
+        last_time = np.iinfo(np.int64).min
+    previous_maximum = np.maximum.accumulate(
+        np.concatenate(([last_time], times[:-1])))
+    return times > previous_maximum
+
+
+def get_turbine_power_output_columns(columns, wind_farm_name):
+    r"""
+    Returns the columns containing the power output of the turbines of a wind
+    farm.
+
+    These are the columns '{wind farm}_{turbine}_power_output' (like the
+    turbine columns of the Enertrag data). Other power columns (for example
+    theoretical, reactive or installed power) are not selected.
+
+    """
+    prefix = '{0}_'.format(wind_farm_name)
+    return [column for column in columns if column.startswith(prefix) and
+            column.endswith('_power_output') and
+            column != '{0}power_output'.format(prefix)]
+
+
+def rename_columns(df, wind_farm_name):
+    r"""
+    Prefixes the columns of a file with the name of its wind farm and adds
+    the power output of the wind farm if missing (see module docstring).
+
+    """
+    df = df.rename(columns={
+        column: (column if column.startswith('{0}_'.format(wind_farm_name))
+                 else '{0}_{1}'.format(wind_farm_name, column)) for
+        column in df.columns})
+    power_output_column = '{0}_power_output'.format(wind_farm_name)
+    if power_output_column not in df:
+        df[power_output_column] = df[get_turbine_power_output_columns(
+            df.columns, wind_farm_name)].sum(axis=1, min_count=1)
+    return df
+
+
+def read_file(filename, frequency=None, datapath=None, chunksize=100000):
+    r"""
+    Reads a GreenWind csv file in chunks.
+
+    Each chunk is de-duplicated (see :py:func:`~.get_new_time_step_mask`)
+    and, if `frequency` is given, reduced to sums and numbers of values per
+    interval, so the resampled data is built without holding the complete
+    file in memory.
+
+    Parameters
+    ----------
+    filename : String
+        Name of data file, for example 'WF1_2015.csv'.
+    frequency : String or pd.DateOffset, optional
+        Fixed frequency like '30T' the data is resampled to (mean). The
+        intervals start at multiples of `frequency` since 1970-01-01 UTC. If
+        None the data is not resampled. Default: None.
+    datapath : String, optional
+        Path where the data file is stored. Default: None
+        ('./data/GreenWind').
+    chunksize : Integer
+        Number of rows per chunk. Default: 100000.
+
+    Returns
+    -------
+    pd.DataFrame
+        Data with UTC DatetimeIndex and the column names of the file.
+
+    """
+    if datapath is None:
+        datapath = os.path.join(os.path.dirname(__file__), 'data/GreenWind')
+    step = (pd.tseries.frequencies.to_offset(frequency).nanos if
+            frequency is not None else None)
+    last_time = None
+    parts = []
+    counts = []
+    try:
+        chunks = pd.read_csv(os.path.join(datapath, filename), sep=',',
+                             decimal='.', index_col=0, chunksize=chunksize)
+    except pd.errors.EmptyDataError:
+        # File without header
+        return pd.DataFrame(index=pd.DatetimeIndex([], tz='UTC'))
+    for chunk in chunks:
+        times = pd.to_datetime(chunk.index, utc=True)
+        int_times = times.values.astype('datetime64[ns]').astype(np.int64)
+        keep = get_new_time_step_mask(int_times, last_time)
+        if keep.any():
+            last_time = int_times[keep][-1]
+        chunk = chunk[keep].astype(np.float64)
+        if step is None:
+            chunk.index = times[keep]
+            parts.append(chunk)
+        else:
+            codes = int_times[keep] // step
+            parts.append(chunk.groupby(codes).sum())
+            counts.append(chunk.notna().groupby(codes).sum())
+    if step is None:
+        return pd.concat(parts)
+    # Intervals can be spread over two chunks
+    sums = pd.concat(parts).groupby(level=0).sum()
+    numbers = pd.concat(counts).groupby(level=0).sum()
+    means = sums / numbers.where(numbers > 0)
+    if means.empty:
+        # File without data
+        means.index = pd.DatetimeIndex([], tz='UTC')
+        return means
+    codes = np.arange(means.index.min(), means.index.max() + 1)
+    means = means.reindex(codes)
+    means.index = pd.to_datetime(codes * step, utc=True)
+    return means
+
+
+def _read_file(args):
+    return read_file(*args)
+
+
+def get_partition_filename(partition_folder, path, frequency=None):
+    r"""
+    Returns the filename of the partition dump of a source file.
+
+    The name contains a hash of the absolute path of the source file, so
+    files with the same name in different folders get different partitions.
+
+    """
+    path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:10]
+    return os.path.join(partition_folder, '{0}_{1}_{2}.p'.format(
+        os.path.splitext(os.path.basename(path))[0], path_hash,
+        pd.tseries.frequencies.to_offset(frequency).freqstr if
+        frequency is not None else 'raw'))
+
+
+def get_partitions(filenames, partition_folder, frequency=None,
+                   datapath=None, processes=1):
+    r"""
+    Reads GreenWind csv files incrementally.
+
+    Each source file is parsed once (for each `frequency`) and dumped as a
+    partition into `partition_folder`. A manifest of the source files (see
+    :py:func:`~.tools.get_changed_files`) is kept in this folder for each
+    frequency, so only new or changed files are parsed again.
+
+    Parameters
+    ----------
+    filenames : List
+        Names of the data files, for example ['WF1_2015.csv'].
+    partition_folder : String
+        Folder of the partition dumps and the manifest.
+    frequency : String or pd.DateOffset, optional
+        See :py:func:`~.read_file`. Default: None.
+    datapath : String, optional
+        Path where the data files are stored. Default: None
+        ('./data/GreenWind').
+    processes : Integer
+        Number of worker processes files are read in. Default: 1.
+
+    Returns
+    -------
+    pd.DataFrame
+        Data of all files with UTC DatetimeIndex. See
+        :py:func:`~.rename_columns` for the column names.
+
+    """
+    if datapath is None:
+        datapath = os.path.join(os.path.dirname(__file__), 'data/GreenWind')
+    if not os.path.exists(partition_folder):
+        os.makedirs(partition_folder)
+    manifest_filename = get_partition_filename(partition_folder, 'manifest',
+                                               frequency)
+    manifest = tools.load_manifest(manifest_filename)
+    paths = [os.path.join(datapath, filename) for filename in filenames]
+    changed_paths, fingerprints = tools.get_changed_files(paths, manifest)
+    changed_paths.extend([
+        path for path in paths if path not in changed_paths and
+        not os.path.exists(get_partition_filename(partition_folder, path,
+                                                  frequency))])
+    if changed_paths:
+        print('---- Parsing {0} new or changed GreenWind files. ----'.format(
+            len(changed_paths)))
+        tasks = [(os.path.basename(path), frequency, datapath) for
+                 path in changed_paths]
+        if processes == 1:
+            df_parts = [_read_file(task) for task in tasks]
+        else:
+            pool = multiprocessing.Pool(processes)
+            try:
+                df_parts = pool.map(_read_file, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        for path, df_part in zip(changed_paths, df_parts):
+            df_part = rename_columns(df_part, wind_farm_names[
+                os.path.basename(path).split('_')[0]])
+            with open(get_partition_filename(partition_folder, path,
+                                             frequency), 'wb') as file:
+                pickle.dump(df_part, file)
+            manifest[path] = fingerprints[path]
+        tools.dump_manifest(manifest, manifest_filename)
+    df_parts = []
+    for path in paths:
+        with open(get_partition_filename(partition_folder, path, frequency),
+                  'rb') as file:
+            df_parts.append(pickle.load(file))
+    return pd.concat(df_parts, axis=1)
+
+
 def get_greenwind_data(year, pickle_load=False, filename='greenwind_dump.p',
                       resample=True, plot=False, x_limit=None,
-                      frequency='30T'):
+                      frequency='30T', columns=None, processes=1,
+                      partition_folder=None):
     # TODO: add plots to check data
     r"""
     Fetches GreenWind data.
@@ -77,6 +315,16 @@ def get_greenwind_data(year, pickle_load=False, filename='greenwind_dump.p',
         wanted. Default: None.
     frequency : String (or freq object...?)
         # TODO add
+    columns : List, optional
+        Columns to be returned. Only these columns are read from the store
+        if `pickle_load` is True. If None all columns are returned.
+        Default: None.
+    processes : Integer
+        Number of worker processes the files are read in. Default: 1.
+    partition_folder : String, optional
+        Folder of the partition dumps of the files (see
+        :py:func:`~.get_partitions`). If None the folder
+        '{filename without extension}_partitions' is used. Default: None.
 
     Returns
     -------
@@ -85,27 +333,26 @@ def get_greenwind_data(year, pickle_load=False, filename='greenwind_dump.p',
 
     """
     if pickle_load:
-        greenwind_df = pickle.load(open(filename, 'rb'))
+        greenwind_df = storage.load_frame(filename, columns=columns)
     else:
-        filenames = [
-            # 'WF1_{0}.csv'.format(year), # TODO: WF1: doppelte Zeitschritte
-            'WF2_{0}.csv'.format(year),
-                     'WF3_{0}.csv'.format(year)]
-        greenwind_df = pd.DataFrame()
-        for name in filenames:
-            df_part = read_data(name)
-            # Add to DataFrame
-            greenwind_df = pd.concat([greenwind_df, df_part], axis=1)
-        # Convert index to DatetimeIndex and make time zone aware
-        greenwind_df.index = pd.to_datetime(greenwind_df.index).tz_localize(
-            'UTC').tz_convert('Europe/Berlin')
-        if resample:
-            greenwind_df = greenwind_df.resample(frequency).mean()
-        else:
-            # Add frequency attribute
-            freq = pd.infer_freq(greenwind_df.index)
-            greenwind_df.index.freq = pd.tseries.frequencies.to_offset(freq)
-        pickle.dump(greenwind_df, open(filename, 'wb'))
+        filenames = ['{0}_{1}.csv'.format(name, year) for
+                     name in wind_farm_names]
+        if partition_folder is None:
+            partition_folder = '{0}_partitions'.format(
+                os.path.splitext(filename)[0])
+        # Only new or changed files are parsed
+        greenwind_df = get_partitions(
+            filenames, partition_folder,
+            frequency=frequency if resample else None, processes=processes)
+        # Convert to local time zone
+        greenwind_df.index = greenwind_df.index.tz_convert('Europe/Berlin')
+        # Add frequency attribute
+        freq = (frequency if resample else
+                pd.infer_freq(greenwind_df.index))
+        greenwind_df.index.freq = pd.tseries.frequencies.to_offset(freq)
+        storage.dump_frame(greenwind_df, storage.get_storage_folder(filename))
+        if columns is not None:
+            greenwind_df = greenwind_df[columns]
     return greenwind_df
 
 
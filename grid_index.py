@@ -0,0 +1,177 @@
+"""
+The ``grid_index`` module contains a spatial index of the grid points of a
+weather data set and functions to dump and load it next to the weather data
+dump.
+
+The grid points are sorted by latitude and longitude. Therefore the position of
+a grid point in the index is the position of its time series in a weather
+store (see :py:mod:`~.weather_store`) and the position of its block of rows in
+a weather data frame sorted by (lat, lon, time).
+
+"""
+
+# Other imports
+from scipy.spatial import cKDTree
+import numpy as np
+import os
+import pickle
+
+
+class GridIndex(object):
+    r"""
+    Spatial index of the grid points of a weather data set.
+
+    Parameters
+    ----------
+    coordinates : np.array or List
+        Coordinates [lat, lon] of the grid points with shape (grid points, 2).
+
+    Attributes
+    ----------
+    coordinates : np.array
+        Coordinates [lat, lon] of the grid points with shape (grid points, 2).
+    tree : scipy.spatial.cKDTree
+        k-d tree of `coordinates`.
+
+    """
+    def __init__(self, coordinates):
+        self.coordinates = np.asarray(coordinates, dtype=np.float64)
+        self.tree = cKDTree(self.coordinates)
+
+    def query(self, coordinates_list, k=1):
+        r"""
+        Finds the `k` grid points closest to each location.
+
+        Parameters
+        ----------
+        coordinates_list : List or np.array
+            Contains coordinates [lat, lon] of the locations.
+        k : Integer
+            Number of closest grid points per location. Default: 1.
+
+        Returns
+        -------
+        distances : np.array
+            Distances of the locations to the grid points with shape
+            (locations, ) if `k` is 1, else (locations, k).
+        positions : np.array
+            Positions of the grid points in `coordinates` with the shape of
+            `distances`.
+
+        """
+        return self.tree.query(np.atleast_2d(coordinates_list), k=k)
+
+    def query_radius(self, coordinates_list, radius):
+        r"""
+        Finds all grid points within `radius` of each location.
+
+        Parameters
+        ----------
+        coordinates_list : List or np.array
+            Contains coordinates [lat, lon] of the locations.
+        radius : Float
+            Radius in degrees.
+
+        Returns
+        -------
+        np.array
+            Contains one list of positions of grid points in `coordinates` for
+            each location.
+
+        """
+        return self.tree.query_ball_point(np.atleast_2d(coordinates_list),
+                                          r=radius)
+
+
+def get_index_filename(filename):
+    r"""
+    Returns the filename of the grid index belonging to a weather data dump.
+
+    For example: 'dumps/weather/weather_df_MERRA_2015_grid_index.p' for
+    'dumps/weather/weather_df_MERRA_2015.p'.
+
+    """
+    return '{0}_grid_index.p'.format(os.path.splitext(filename)[0])
+
+
+def get_grid_coordinates(data_frame):
+    r"""
+    Returns the sorted coordinates of the grid points of a weather data frame.
+
+    The unique (lat, lon) pairs are taken directly from the index values
+    instead of grouping all rows of `data_frame`.
+
+    Parameters
+    ----------
+    data_frame : pd.DataFrame
+        Weather data with MultiIndex (time, lat, lon) as index.
+
+    Returns
+    -------
+    np.array
+        Coordinates [lat, lon] of the grid points sorted by lat and lon with
+        shape (grid points, 2).
+
+    """
+    return np.unique(np.array(
+        [data_frame.index.get_level_values(1).values,
+         data_frame.index.get_level_values(2).values],
+        dtype=np.float64).transpose(), axis=0)
+
+
+def dump_grid_index(coordinates, filename):
+    r"""
+    Creates a grid index and dumps it next to the weather data dump.
+
+    Parameters
+    ----------
+    coordinates : np.array
+        Coordinates [lat, lon] of the grid points sorted by lat and lon.
+    filename : String
+        Name (including path) of the weather data dump.
+
+    Returns
+    -------
+    GridIndex
+
+    """
+    grid_index = GridIndex(coordinates)
+    with open(get_index_filename(filename), 'wb') as file:
+        pickle.dump(grid_index, file)
+    return grid_index
+
+
+def get_grid_index(filename, coordinates=None):
+    r"""
+    Loads the grid index belonging to a weather data dump.
+
+    If the grid index has not been dumped yet or its grid points differ from
+    `coordinates` (weather data dumped again with another grid), it is created
+    from `coordinates` and dumped.
+
+    Parameters
+    ----------
+    filename : String
+        Name (including path) of the weather data dump.
+    coordinates : np.array, optional
+        Coordinates [lat, lon] of the grid points sorted by lat and lon. If
+        None the dumped grid index is not checked. Only optional if the grid
+        index has been dumped before. Default: None.
+
+    Returns
+    -------
+    GridIndex
+
+    """
+    index_filename = get_index_filename(filename)
+    if os.path.exists(index_filename):
+        with open(index_filename, 'rb') as file:
+            grid_index = pickle.load(file)
+        if coordinates is None or np.array_equal(
+                grid_index.coordinates,
+                np.asarray(coordinates, dtype=np.float64)):
+            return grid_index
+    if coordinates is None:
+        raise ValueError("No grid index found for {0} - ".format(filename) +
+                         "`coordinates` have to be given.")
+    return dump_grid_index(coordinates, filename)
@@ -1,11 +1,16 @@
 # Imports from Windpowerlib
 from windpowerlib import wind_farm as wf
+import windpowerlib
 
 # Imports from lib_validation
 import visualization_tools
 import tools
 import latex_tables
 import modelchain_usage
+import fleet_simulation
+import result_cache
+import corrections
+import weather_store
 from wind_farm_specifications import (get_joined_wind_farm_data,
                                       get_wind_farm_data)
 from merra_weather_data import get_merra_data
@@ -20,6 +25,7 @@ import os
 import pandas as pd
 import numpy as np
 import pickle
+from collections import OrderedDict
 
 # ----------------------------- Set parameters ------------------------------ #
 year = 2015
@@ -44,15 +50,14 @@ restriction_list = [
 min_periods_pearson = None  # Integer
 # TODO: add logging info ?!
 
-# Pickle load time series data frame - if one of the above pickle_load options
-# is set to False, `pickle_load_time_series_df` is automatically set to False
-pickle_load_time_series_df = True
+# Results of all stages (weather data, validation data, wind farm data,
+# simulation, time series data frame, validation objects) are cached with keys
+# depending on their inputs and parameters - a stage is only calculated again
+# if its inputs changed. Set to False to calculate all stages again.
+use_result_cache = True
 
-pickle_load_merra = True
-pickle_load_open_fred = True
-pickle_load_arge = True
-pickle_load_enertrag = True
-pickle_load_wind_farm_data = True
+# Number of processes for the simulation of the wind farms and approaches
+processes = 1
 
 csv_load_time_series_df = False  # Load time series data frame from csv dump
 csv_dump_time_series_df = False  # Dump df as csv
@@ -76,6 +81,12 @@ validation_data_list = [
     'Enertrag',
     # 'GreenWind'
     ]
+# Availability and curtailment factors of the validation data sources the
+# simulated power output is corrected with (see `corrections` module)
+correction_factors = {
+    'Enertrag': ['curtailment'],
+    # 'ArgeNetz': ['availability', 'curtailment']
+    }
 
 output_methods = [
     'half_hourly',  # Only if possible
@@ -108,11 +119,16 @@ key_figures_print = [
     # 'standard_deviation'  # Includes standard deviation in key figures latex o.
     ]
 
-# Select time of day you want to observe or None for all day
-time_period = (
-#       6, 22  # time of day to be selected (from h to h)
-         None   # complete time series will be observed
-        ) 
+# Select times of day you want to observe or None for all day - all time
+# periods are evaluated in one run
+time_periods = [
+    None,  # complete time series will be observed
+#    (6, 22),  # time of day to be selected (from h to h)
+    ]
+# Select weekdays (0: Monday, ..., 6: Sunday) and months (1 - 12) you want to
+# observe or None for all
+weekdays = None
+months = None
 
 # Start and end date for time period to be plotted when 'feedin_comparison' is
 # selected. (not for monthly output)
@@ -141,15 +157,21 @@ wind_farm_pickle_folder = os.path.join(os.path.dirname(__file__),
                                        'dumps/wind_farm_data')
 time_series_df_folder = os.path.join(os.path.dirname(__file__),
                                      'dumps/time_series_dfs')
+power_curve_cache_folder = os.path.join(os.path.dirname(__file__),
+                                        'dumps/power_curves')
+result_cache_folder = os.path.join(os.path.dirname(__file__),
+                                   'dumps/result_cache')
+data_folder = os.path.join(os.path.dirname(__file__), 'data')
+# Folder of the open_FRED NetCDF files. If given, the open_FRED weather store
+# is extracted from these files (see `read_of_weather_data` module) instead of
+# being created from the csv file 'fred_data_{year}_sh.csv'.
+open_fred_netcdf_folder = None
 
 # Heights for which temperature of MERRA shall be calculated
 temperature_heights = [60, 64, 65, 105, 114]
 
-# If pickle_load options not all True:
-if (not pickle_load_merra or not pickle_load_open_fred or not
-        pickle_load_arge or not pickle_load_enertrag or not
-        pickle_load_wind_farm_data):
-    pickle_load_time_series_df = False
+cache = result_cache.ResultCache(result_cache_folder,
+                                 enabled=use_result_cache)
 
 # ---------------------------------- Warning -------------------------------- #
 if (year == 2015 and validation_data_list[0] == 'Enertrag' and
@@ -158,6 +180,181 @@ if (year == 2015 and validation_data_list[0] == 'Enertrag' and
                      "validation data or year 2016")
 
 
+# ------------------------------ Result cache keys -------------------------- #
+def get_code_signature(module_names):
+    r"""
+    Returns a hash of the source code of modules of lib_validation.
+
+    The signature is used as an input of the stages implemented by these
+    modules, so cached results are not used anymore if the code changed. The
+    source files are read without importing the modules (modules like
+    `read_of_weather_data` need optional dependencies).
+
+    """
+    sources = []
+    for module_name in module_names:
+        with open(os.path.join(os.path.dirname(__file__),
+                               '{0}.py'.format(module_name))) as file:
+            sources.append(file.read())
+    return result_cache.get_hash(sources)
+
+
+def get_wind_farm_data_key():
+    r"""
+    Returns the result cache key of the wind farm data of all validation data.
+
+    """
+    return cache.get_key(
+        'wind_farm_data', year, validation_data_list,
+        getattr(windpowerlib, '__version__', None),
+        get_code_signature(['wind_farm_specifications']))
+
+
+def get_weather_data_key(weather_data_name):
+    r"""
+    Returns the result cache key of the weather data dump of a weather data
+    set.
+
+    """
+    store_modules = ['weather_store', 'grid_index']
+    if weather_data_name == 'MERRA':
+        source = os.path.join(data_folder, 'Merra',
+                              'weather_data_GER_{0}.csv'.format(year))
+        code_signature = get_code_signature(
+            ['merra_weather_data'] + store_modules)
+    elif open_fred_netcdf_folder is not None:
+        # Only the grid cells closest to the wind farms are extracted
+        return cache.get_key('weather_data', weather_data_name, year,
+                             get_wind_farm_data_key(),
+                             result_cache.get_file_signature(
+                                 [open_fred_netcdf_folder]),
+                             get_code_signature(
+                                 ['read_of_weather_data'] + store_modules))
+    else:
+        source = os.path.join(data_folder, 'open_FRED',
+                              'fred_data_{0}_sh.csv'.format(year))
+        code_signature = get_code_signature(
+            ['open_fred_weather_data'] + store_modules)
+    return cache.get_key('weather_data', weather_data_name, year,
+                         temperature_heights,
+                         result_cache.get_file_signature([source]),
+                         code_signature)
+
+
+def get_validation_data_key(weather_data_name):
+    r"""
+    Returns the result cache key of the validation data resampled to the
+    frequency of a weather data set.
+
+    """
+    return cache.get_key(
+        'validation_data', weather_data_name, year, validation_data_list,
+        get_wind_farm_data_key(), result_cache.get_file_signature(
+            [os.path.join(data_folder, validation_data_name) for
+             validation_data_name in validation_data_list] +
+            [os.path.join(os.path.dirname(__file__), 'helper_files')]),
+        get_code_signature(['argenetz_data', 'enertrag_data',
+                            'greenwind_data', 'data_quality', 'storage',
+                            'tools']))
+
+
+def get_approach_parameters(wind_farm_name, approach):
+    r"""
+    Returns the signatures of the files the simulation of a wind farm with an
+    approach depends on (besides weather and wind farm data).
+
+    """
+    paths = []
+    if approach in ['efficiency_curve', 'eff_curve_smooth',
+                    'linear_interpolation']:
+        paths.append(os.path.join(os.path.dirname(__file__), 'helper_files',
+                                  'wind_efficiency_curve_1.csv'))
+    return result_cache.get_file_signature(paths)
+
+
+def get_simulation_code_signature():
+    r"""
+    Returns the windpowerlib version and a hash of the simulation code.
+
+    The parameters of the approaches are hard-coded in
+    :py:func:`~.modelchain_usage.calculate_approach`, so cached simulation
+    results are not used anymore if the code of the simulation modules or the
+    windpowerlib version changed.
+
+    """
+    return (getattr(windpowerlib, '__version__', None),
+            get_code_signature(['modelchain_usage', 'fleet_simulation',
+                                'tools']))
+
+
+def get_simulation_keys(weather_data_name):
+    r"""
+    Returns the result cache keys of the power output of each wind farm and
+    approach simulated with a weather data set.
+
+    Wind farms and approaches in `restriction_list` are not simulated.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Result cache keys with the column names
+        '{wind farm}_calculated_{approach}' as keys.
+
+    """
+    weather_data_key = get_weather_data_key(weather_data_name)
+    code_signature = get_simulation_code_signature()
+    simulation_keys = OrderedDict()
+    for wind_farm_data in return_wind_farm_data():
+        wind_farm_name = wind_farm_data['object_name']
+        if wind_farm_name in restriction_list:
+            continue
+        for approach in approach_list:
+            if approach in restriction_list:
+                continue
+            simulation_keys['{0}_calculated_{1}'.format(
+                wind_farm_name, approach)] = cache.get_key(
+                    'simulation', weather_data_key, year, wind_farm_data,
+                    approach, code_signature,
+                    get_approach_parameters(wind_farm_name, approach))
+    return simulation_keys
+
+
+def get_corrections_key(weather_data_name):
+    r"""
+    Returns the result cache key of the correction factors with the frequency
+    of a weather data set.
+
+    """
+    return cache.get_key(
+        'corrections', weather_data_name, year, correction_factors,
+        result_cache.get_file_signature(
+            [os.path.join(data_folder, validation_data_name) for
+             validation_data_name in correction_factors]),
+        get_code_signature(['corrections', 'argenetz_data', 'enertrag_data',
+                            'storage']))
+
+
+def get_simulation_key(weather_data_name):
+    r"""
+    Returns the result cache key of the (corrected) power output of all wind
+    farms and approaches simulated with a weather data set.
+
+    """
+    return cache.get_key('simulation',
+                         list(get_simulation_keys(weather_data_name).items()),
+                         get_corrections_key(weather_data_name))
+
+
+def get_time_series_key(weather_data_name):
+    r"""
+    Returns the result cache key of the time series data frame of a weather
+    data set.
+
+    """
+    return cache.get_key('time_series', get_simulation_key(weather_data_name),
+                         get_validation_data_key(weather_data_name))
+
+
 # -------------------------- Validation Feedin Data ------------------------- #
 def get_validation_data(frequency):
     r"""
@@ -182,13 +379,15 @@ def get_validation_data(frequency):
         # Get wind farm data
         wind_farm_data_arge = get_wind_farm_data(
             'farm_specification_argenetz_{0}.p'.format(year),
-            wind_farm_pickle_folder, pickle_load_wind_farm_data)
+            wind_farm_pickle_folder, pickle_load=False)
         # Get ArgeNetz Data
         arge_data = get_argenetz_data(
-            year, pickle_load=pickle_load_arge,
+            year, pickle_load=False,
             filename=os.path.join(validation_pickle_folder,
                                   'arge_netz_data_{0}.p'.format(year)),
-            csv_dump=False, plot=plot_arge_feedin)
+            csv_dump=False, plot=plot_arge_feedin,
+            columns=['{0}_power_output'.format(data['object_name']) for
+                     data in wind_farm_data_arge])
         # Select only columns containing the power output and rename them
         arge_data = arge_data[['{0}_power_output'.format(data['object_name'])
                                for data in wind_farm_data_arge]].rename(
@@ -199,21 +398,70 @@ def get_validation_data(frequency):
     if ('Enertrag' in validation_data_list and year == 2016):
         # Get Enertrag Data
         enertrag_data = get_enertrag_data(
-            pickle_load=pickle_load_enertrag,
+            pickle_load=False,
             filename=os.path.join(validation_pickle_folder, 'enertrag_data.p'),
-            resample=True, plot=False, x_limit=None)
+            resample=True, plot=False, x_limit=None,
+            columns=['wf_9_power_output'], farm_output_only=True)
         # Select aggregated power output of wind farm (rename)
         enertrag_data = enertrag_data[['wf_9_power_output']].rename(
             columns={'wf_9_power_output': 'wf_9_measured'})
         # Resample the DataFrame columns with `frequency` and add to list
         validation_df_list.append(enertrag_data.resample(frequency).mean())
     if 'GreenWind' in validation_data_list:
-        # Get GreenWind data
-        pass
+        # Get wind farm data
+        wind_farm_data_gw = get_wind_farm_data(
+            'farm_specification_GreenWind_{0}.p'.format(year),
+            wind_farm_pickle_folder, pickle_load=False)
+        # Get GreenWind data - resampled to `frequency` while reading
+        greenwind_data = get_greenwind_data(
+            year, pickle_load=False,
+            filename=os.path.join(validation_pickle_folder,
+                                  'greenwind_data_{0}.p'.format(year)),
+            resample=True, frequency=frequency,
+            columns=['{0}_power_output'.format(data['object_name']) for
+                     data in wind_farm_data_gw])
+        # Rename the power output columns
+        greenwind_data = greenwind_data.rename(
+            columns={col: col.replace('power_output', 'measured') for col in
+                     greenwind_data.columns})
+        validation_df_list.append(greenwind_data.resample(frequency).mean())
     # Join DataFrames - power output in MW
     validation_df = pd.concat(validation_df_list, axis=1) / 1000
     return validation_df
 
+
+def get_correction_factors(frequency):
+    r"""
+    Returns the correction factors of all sources in `correction_factors`.
+
+    Parameters
+    ----------
+    frequency : String or pd.DateOffset
+        Frequency of the simulated power output.
+
+    Returns
+    -------
+    pd.DataFrame
+        Correction factors of the wind farms (columns). See
+        :py:func:`~.corrections.join_factors`.
+
+    """
+    factor_dfs = []
+    if ('Enertrag' in correction_factors and year == 2016 and
+            'curtailment' in correction_factors['Enertrag']):
+        factor_dfs.append(get_enertrag_curtailment_data(frequency)[
+            ['curtail_rel']].rename(columns={'curtail_rel': 'wf_9'}))
+    if 'ArgeNetz' in correction_factors:
+        arge_data = get_argenetz_data(
+            year, pickle_load=False,
+            filename=os.path.join(validation_pickle_folder,
+                                  'arge_netz_data_{0}.p'.format(year)),
+            csv_dump=False)
+        factor_dfs.append(corrections.get_factors(
+            arge_data, wind_farm_names, correction_factors['ArgeNetz']))
+    return corrections.join_factors(factor_dfs, frequency)
+
+
 # ------------------------------ Wind farm data ----------------------------- #
 def return_wind_farm_data():
         r"""
@@ -231,17 +479,65 @@ def return_wind_farm_data():
             validation_data_name is not 'Enertrag']
         if (year == 2016 and 'Enertrag' in validation_data_list):
             filenames += ['farm_specification_enertrag_2016.p']
-        return get_joined_wind_farm_data(filenames, wind_farm_pickle_folder,
-                                         pickle_load_wind_farm_data)
+        return cache.get(get_wind_farm_data_key(),
+                         lambda: get_joined_wind_farm_data(
+                             filenames, wind_farm_pickle_folder,
+                             pickle_load=False))
 
 
 # ------------------------- Power output simulation ------------------------- #
+def dump_weather_data(weather_data_name, filename_weather):
+    r"""
+    Reads the csv file of a weather data set and dumps the data frame (and the
+    weather store) to `filename_weather`.
+
+    If `open_fred_netcdf_folder` is given, the open_FRED weather store (and no
+    data frame) is extracted from the NetCDF files instead - only the grid
+    cells closest to the wind farms.
+
+    Returns
+    -------
+    String
+        `filename_weather`.
+
+    """
+    if weather_data_name == 'MERRA':
+        get_merra_data(year, heights=temperature_heights,
+                       filename=filename_weather)
+    if weather_data_name == 'open_FRED':
+        if open_fred_netcdf_folder is not None:
+            # Import here as xarray is only needed for the NetCDF files
+            import read_of_weather_data
+            coordinates = np.array([wind_farm_data['coordinates'] for
+                                    wind_farm_data in return_wind_farm_data()])
+            # Bounding box of the wind farms with a margin of more than one
+            # grid cell (0.0625 degrees)
+            lat_min, lon_min = coordinates.min(axis=0) - 0.1
+            lat_max, lon_max = coordinates.max(axis=0) + 0.1
+            read_of_weather_data.get_of_weather_data_from_netcdf(
+                year, lat_min, lat_max, lon_min, lon_max,
+                list(read_of_weather_data.get_helper_dict(year)),
+                filename_weather, coordinates_list=coordinates,
+                main_path=open_fred_netcdf_folder, processes=processes)
+        else:
+            fred_path = os.path.join(data_folder, 'open_FRED',
+                                     'fred_data_{0}_sh.csv'.format(year))
+            get_open_fred_data(
+                filename=fred_path, pickle_filename=filename_weather,
+                pickle_load=False)
+    return filename_weather
+
+
 def get_calculated_data(weather_data_name):
     r"""
     Calculates time series with different approaches.
 
     Data is saved in a DataFrame that can later be joined with the validation
-    data frame.
+    data frame. The power output of each wind farm and approach is cached
+    (see :py:func:`~.get_simulation_keys`) - only the time series that are not
+    cached yet are calculated (see
+    :py:meth:`~.result_cache.ResultCache.get_results`). The power output is
+    corrected by the factors of `correction_factors`.
 
     Parameters
     ----------
@@ -252,7 +548,48 @@ def get_calculated_data(weather_data_name):
     -------
     calculation_df : pd.DataFrame
         Calculated power output in MW. Column names are as follows:
-        'wf_1_calculated_{0}'.format(approach) etc.
+        'wf_1_calculated_{0}'.format(approach) etc. The columns are ordered
+        by wind farm and then by approach (order of `approach_list`).
+
+    """
+    calculated = cache.get_results(
+        get_simulation_keys(weather_data_name),
+        lambda column_names: calculate_power_output(weather_data_name,
+                                                    column_names))
+    # Series that are None could not be calculated with their approach
+    calculation_df_list = [calculation_df for calculation_df in
+                           calculated.values() if calculation_df is not None]
+    if not calculation_df_list:
+        raise ValueError(
+            "No power output calculated with {0} data - ".format(
+                weather_data_name) +
+            "all wind farms or approaches are in `restriction_list` or " +
+            "the approaches are not applicable.")
+    calculation_df = pd.concat(calculation_df_list, axis=1)
+    # Correct the power output of all wind farms at once
+    factor_df = cache.get(get_corrections_key(weather_data_name),
+                          lambda: get_correction_factors(
+                              calculation_df.index.freq))
+    return corrections.apply_factors(calculation_df, factor_df)
+
+
+def calculate_power_output(weather_data_name, column_names):
+    r"""
+    Calculates the power output of wind farms with different approaches.
+
+    Parameters
+    ----------
+    weather_data_name : String
+        Weather data for which the feed-in is calculated.
+    column_names : List
+        Time series to be calculated named '{wind farm}_calculated_{approach}'.
+
+    Returns
+    -------
+    Dictionary
+        Calculated power output in MW as pd.DataFrame with one column for
+        each column name (keys in the order of `column_names`) - None if the
+        approach is not applicable.
 
     """
     # Get weather data
@@ -261,153 +598,110 @@ def get_calculated_data(weather_data_name):
                                     'weather_df_{0}_{1}.p'.format(
                                         weather_data_name, year))
     # Read csv files that contains weather data (pd.DataFrame is dumped)
-    # to save time below
-    if weather_data_name == 'MERRA':
-        if not pickle_load_merra:
-            get_merra_data(year, heights=temperature_heights,
-                           filename=filename_weather)
-    if weather_data_name == 'open_FRED':
-        if not pickle_load_open_fred:
-            fred_path = os.path.join(
-                os.path.dirname(__file__), 'data/open_FRED',
-                'fred_data_{0}_sh.csv'.format(year))
-            get_open_fred_data(
-                filename=fred_path, pickle_filename=filename_weather,
-                pickle_load=False)
+    # if the dump is missing or the csv file changed - weather data extracted
+    # from NetCDF files is only dumped as weather store
+    weather_data_key = get_weather_data_key(weather_data_name)
+    if (not cache.contains(weather_data_key) or not (
+            os.path.exists(filename_weather) or os.path.exists(
+                weather_store.get_store_folder(filename_weather)))):
+        cache.dump(weather_data_key, dump_weather_data(weather_data_name,
+                                                       filename_weather))
 
-    # Get wind farm data
-    wind_farm_data_list = return_wind_farm_data()
+    # Get wind farm data and initialise the wind farms with missing series
+    wind_farm_list = [
+        wf.WindFarm(**wind_farm_data) for
+        wind_farm_data in return_wind_farm_data() if any(
+            column_name.startswith('{0}_calculated_'.format(
+                wind_farm_data['object_name'])) for
+            column_name in column_names)]
+    # Get weather data for the coordinates of all wind farms at once
+    weather_list = tools.get_weather_data_of_farms(
+        weather_data_name, [wind_farm.coordinates for
+                            wind_farm in wind_farm_list],
+        pickle_load=True, filename=filename_weather, year=year,
+        temperature_heights=temperature_heights)
     # Initialise calculation_df_list and calculate power output
     calculation_df_list = []
-    for wind_farm_data in wind_farm_data_list:
-        # Initialise wind farm
-        wind_farm = wf.WindFarm(**wind_farm_data)
-        # Get weather data for specific coordinates
-        weather = tools.get_weather_data(
-            weather_data_name, wind_farm.coordinates, pickle_load=True,
-            filename=filename_weather, year=year,
-            temperature_heights=temperature_heights)
-        # Calculate power output and store in list
-        if 'simple' in approach_list:
-            calculation_df_list.append(modelchain_usage.power_output_simple(
-                wind_farm.wind_turbine_fleet, weather).to_frame(
-                    name='{0}_calculated_simple'.format(
-                        wind_farm.object_name)))
-        if 'density_correction' in approach_list:
-            calculation_df_list.append(modelchain_usage.power_output_simple(
-                wind_farm.wind_turbine_fleet, weather,
-                density_correction=True).to_frame(
-                    name='{0}_calculated_density_correction'.format(
-                        wind_farm.object_name)))
-        if 'smooth_wf' in approach_list:
-            calculation_df_list.append(modelchain_usage.power_output_wind_farm(
-                wind_farm, weather, cluster=False, density_correction=False,
-                wake_losses_method=None, smoothing=True,
-                block_width=0.5, roughness_length=weather[
-                    'roughness_length'][0].mean(),
-                standard_deviation_method='turbulence_intensity',
-                wind_farm_efficiency=None).to_frame(
-                    name='{0}_calculated_smooth_wf'.format(
-                        wind_farm.object_name)))
-        if 'constant_efficiency_90_%' in approach_list:
-            calculation_df_list.append(modelchain_usage.power_output_wind_farm(
-                wind_farm, weather, cluster=False, density_correction=False,
-                wake_losses_method='constant_efficiency', smoothing=False,
-                wind_farm_efficiency=0.9).to_frame(
-                    name='{0}_calculated_constant_efficiency_90_%'.format(
-                        wind_farm.object_name)))
-        if 'constant_efficiency_80_%' in approach_list:
-            calculation_df_list.append(modelchain_usage.power_output_wind_farm(
-                wind_farm, weather, cluster=False, density_correction=False,
-                wake_losses_method='constant_efficiency', smoothing=False,
-                wind_farm_efficiency=0.8).to_frame(
-                    name='{0}_calculated_constant_efficiency_80_%'.format(
-                        wind_farm.object_name)))
-        if 'efficiency_curve' in approach_list:
-            efficiency_curve = tools.get_wind_efficiency_curve()
-            calculation_df_list.append(modelchain_usage.power_output_wind_farm(
-                wind_farm, weather, cluster=False, density_correction=False,
-                wake_losses_method='wind_efficiency_curve', smoothing=False,
-                wind_farm_efficiency=efficiency_curve).to_frame(
-                name='{0}_calculated_efficiency_curve'.format(
-                    wind_farm.object_name)))
-        if 'eff_curve_smooth' in approach_list:
-            efficiency_curve = tools.get_wind_efficiency_curve()
-            calculation_df_list.append(modelchain_usage.power_output_wind_farm(
-                wind_farm, weather, cluster=False, density_correction=False,
-                wake_losses_method='wind_efficiency_curve', smoothing=True,
-                wind_farm_efficiency=efficiency_curve,
-                roughness_length=weather[
-                    'roughness_length'][0].mean()).to_frame(
-                name='{0}_calculated_eff_curve_smooth'.format(
-                    wind_farm.object_name)))
-        if 'linear_interpolation' in approach_list:
-            if len(list(weather['wind_speed'])) > 1:
-                efficiency_curve = tools.get_wind_efficiency_curve()
-                calculation_df_list.append(
-                    modelchain_usage.power_output_wind_farm(
-                        wind_farm, weather, cluster=False,
-                        density_correction=False,
-                        wake_losses_method='wind_efficiency_curve',
-                        smoothing=True, wind_farm_efficiency=efficiency_curve,
-                        wind_speed_model='interpolation_extrapolation',
-                        roughness_length=weather[
-                            'roughness_length'][0].mean()).to_frame(
-                        name='{0}_calculated_linear_interpolation'.format(
-                            wind_farm.object_name)))
-    # Join DataFrames - power output in MW
-    calculation_df = pd.concat(calculation_df_list, axis=1) / (1 * 10 ** 6)
-    for column_name in list(calculation_df):
-        if column_name.split('_')[1] == '9':
-            curtailment = get_enertrag_curtailment_data(
-                weather.index.freq).rename({'curtail_rel': 'curtailment'},
-                                           axis=1)
-            # Add curtailment to data frame
-            df = pd.concat([calculation_df[[column_name]], curtailment],
-                           axis=1)
-            calculation_df[column_name] = df[column_name] * df['curtailment']
-    return calculation_df
+    simple_farms = [farm_number for farm_number, wind_farm in
+                    enumerate(wind_farm_list) if
+                    '{0}_calculated_simple'.format(
+                        wind_farm.object_name) in column_names]
+    if simple_farms:
+        # Calculate power output of these wind farms at once
+        calculation_df_list.append(fleet_simulation.power_output_simple_farms(
+            [wind_farm_list[farm_number] for farm_number in simple_farms],
+            [weather_list[farm_number] for farm_number in simple_farms]
+        ).rename(columns=lambda name: '{0}_calculated_simple'.format(name)))
+    # Calculate power output of the other approaches for each wind farm
+    calculation_df_list.extend(modelchain_usage.calculate_approaches(
+        wind_farm_list, weather_list, approach_list, processes=processes,
+        power_curve_cache_folder=power_curve_cache_folder,
+        tasks=[(farm_number, approach) for
+               farm_number, wind_farm in enumerate(wind_farm_list) for
+               approach in approach_list if approach != 'simple' and
+               '{0}_calculated_{1}'.format(
+                   wind_farm.object_name, approach) in column_names]))
+    # Power output in MW in the order of `column_names` - the 'simple'
+    # approach is calculated for all wind farms at once, but its columns keep
+    # their position among the approaches of their wind farm
+    calculated = OrderedDict(
+        (column_name, None) for column_name in column_names)
+    for calculation_df in calculation_df_list:
+        for column_name in list(calculation_df):
+            calculated[column_name] = (
+                calculation_df[[column_name]] / (1 * 10 ** 6))
+    return calculated
+
+
+def join_time_series_data(weather_data_name):
+    r"""
+    Joins validation and calculated data and aligns their missing values.
+
+    """
+    # Get validation and calculated data
+    calculation_df = get_calculated_data(weather_data_name)
+    validation_df = cache.get(
+        get_validation_data_key(weather_data_name),
+        lambda: get_validation_data(calculation_df.index.freq))
+    # Join data frames
+    time_series_df = pd.concat([validation_df, calculation_df], axis=1)
+    # Set values of all series of a wind farm to nan where one of the
+    # measured or calculated values is nan
+    time_series_df, availability_df = tools.align_missing_data(
+        time_series_df, wind_farm_names)
+    print('---- Data availability ({0} {1}) ----'.format(
+        weather_data_name, year))
+    print(availability_df)
+    return time_series_df
 
 
 def get_time_series_df(weather_data_name):
     r"""
     If there are any values in restriction_list, the columns containing these
-    strings are dropped. This takes place after dumping.
+    strings are dropped. This takes place after caching. If the data frame is
+    loaded from the result cache, only the remaining columns are read.
 
     """
     time_series_filename = os.path.join(time_series_df_folder,
                                         'time_series_df_{0}_{1}.p'.format(
                                             weather_data_name, year))
-    if pickle_load_time_series_df:
-        time_series_df = pickle.load(open(time_series_filename, 'rb'))
-    elif csv_load_time_series_df:
-        time_series_df = pd.read_csv(time_series_filename.replace('.p',
-                                                                  '.csv'))
-        pickle.dump(time_series_df, open(time_series_filename, 'wb'))
+    time_series_key = get_time_series_key(weather_data_name)
+    if csv_load_time_series_df:
+        time_series_df = pd.read_csv(
+            time_series_filename.replace('.p', '.csv'), index_col=0)
+        time_series_df.index = pd.to_datetime(
+            time_series_df.index, utc=True).tz_convert('Europe/Berlin')
+        cache.dump(time_series_key, time_series_df)
     else:
-        # Get validation and calculated data
-        calculation_df = get_calculated_data(weather_data_name)
-        validation_df = get_validation_data(calculation_df.index.freq)
-        # Join data frames
-        time_series_df = pd.concat([validation_df, calculation_df], axis=1)
-        # Set value of measured series to nan if respective calculated value
-        # is nan and the other way round
-        column_name_lists = [
-            [name for name in list(time_series_df) if wf_name in name] for
-            wf_name in wind_farm_names]
-        for column_name in column_name_lists:
-            # Nans of calculated data to measured data
-            time_series_df.loc[:, column_name[0]].loc[
-                time_series_df.loc[:, column_name[1]].loc[
-                    time_series_df.loc[
-                        :, column_name[1]].isnull() == True].index] = np.nan
-            # Nans of calculated data to measured data
-            for i in range(len(column_name) - 1):
-                time_series_df.loc[:, column_name[i+1]].loc[
-                    time_series_df.loc[:, column_name[0]].loc[
-                        time_series_df.loc[
-                        :, column_name[0]].isnull() == True].index] = np.nan
-        pickle.dump(time_series_df, open(time_series_filename, 'wb'))
+        columns = None
+        if cache.contains(time_series_key):
+            columns = [column_name for column_name in
+                       cache.get_columns(time_series_key) if not any(
+                           restriction in column_name for
+                           restriction in restriction_list)]
+        time_series_df = cache.get(
+            time_series_key, lambda: join_time_series_data(weather_data_name),
+            columns=columns)
     if csv_dump_time_series_df:
         time_series_df.to_csv(time_series_filename.replace('.p', '.csv'))
     # Drop columns that contain at least one item of `restriction_list` in
@@ -451,19 +745,85 @@ def join_dictionaries(list_of_dicts):
     return z
 
 
+def get_validation_objects(weather_data_name, time_series_df,
+                           time_series_pairs, masks):
+    r"""
+    Creates the validation objects of all output methods and time periods.
+
+    Returns
+    -------
+    Dictionary
+        Validation objects of a weather data set for each time period:
+        {time_period: {output_method: {approach: [ValidationObject, ...]}}}.
+
+    """
+    validation_objects = {time_period: initialize_dictionary(
+        dict_type='validation_objects')[weather_data_name] for
+        time_period in time_periods}
+    # The time series are resampled once for all pairs
+    if 'hourly' in output_methods:
+        hourly_df = time_series_df.resample('H').mean()
+        hourly_masks = tools.get_time_filter_masks(
+            hourly_df.index, time_periods, weekdays=weekdays, months=months)
+    if 'monthly' in output_methods:
+        # Time steps are filtered before resampling to monthly means
+        monthly_dfs = {time_period: time_series_df.where(
+            pd.Series(mask, index=time_series_df.index), axis=0).resample(
+                'M').mean() for time_period, mask in masks.items()}
+    for time_series_pair in time_series_pairs:
+        wf_string = '_'.join(list(time_series_pair)[0].split('_')[:2])
+        approach_string = '_'.join(list(time_series_pair)[1].split('_')[3:])
+        for time_period in time_periods:
+            val_obj_dict = validation_objects[time_period]
+            if 'half_hourly' in output_methods:
+                if time_series_pair.index.freq != 'H':
+                    val_obj_dict['half_hourly'][approach_string].append(
+                        ValidationObject(
+                            object_name=wf_string, data=time_series_pair,
+                            output_method='half_hourly',
+                            weather_data_name=weather_data_name,
+                            approach=approach_string,
+                            min_periods_pearson=min_periods_pearson,
+                            mask=masks[time_period]))
+            if 'hourly' in output_methods:
+                val_obj_dict['hourly'][approach_string].append(
+                    ValidationObject(
+                        object_name=wf_string,
+                        data=hourly_df.loc[:, list(time_series_pair)],
+                        output_method='hourly',
+                        weather_data_name=weather_data_name,
+                        approach=approach_string,
+                        min_periods_pearson=min_periods_pearson,
+                        mask=hourly_masks[time_period]))
+            if 'monthly' in output_methods:
+                val_obj_dict['monthly'][approach_string].append(
+                    ValidationObject(
+                        object_name=wf_string,
+                        data=monthly_dfs[time_period].loc[
+                            :, list(time_series_pair)],
+                        output_method='monthly',
+                        weather_data_name=weather_data_name,
+                        approach=approach_string,
+                        min_periods_pearson=min_periods_pearson))
+    # Delete entry in dict if half_hourly resolution not possible
+    for val_obj_dict in validation_objects.values():
+        if (time_series_pairs[0].index.freq == 'H' and
+                'half_hourly' in val_obj_dict):
+            del val_obj_dict['half_hourly']
+    return validation_objects
+
+
 # ------------------------------ Data Evaluation ---------------------------- #
 # Create list of wind farm names
 wind_farm_names = [data['object_name'] for data in return_wind_farm_data()]
-# Initialize dictionary for validation objects
-val_obj_dict = initialize_dictionary(dict_type='validation_objects')
+# Initialize dictionaries for validation objects of each time period
+val_obj_dicts = {time_period: initialize_dictionary(
+    dict_type='validation_objects') for time_period in time_periods}
 # Initialize dict for annual energy output of each weather data set
 annual_energy_dicts = {weather_data_name: None
                        for weather_data_name in weather_data_list}
 for weather_data_name in weather_data_list:
     time_series_df = get_time_series_df(weather_data_name)
-    if (pickle_load_time_series_df or csv_load_time_series_df):
-        # Check if all needed data exists
-        pass  # TODO: add
     # Create list of time series data frames (for each wind farm for each
     # approach) - measured and calculated data
     time_series_df_parts = [
@@ -508,134 +868,124 @@ for weather_data_name in weather_data_list:
                         measured_output * 100)
         # Add dictionary to `annual_energy_dicts`
         annual_energy_dicts[weather_data_name] = annual_energy_dict_weather
-    for time_series_pair in time_series_pairs:
-        wf_string = '_'.join(list(time_series_pair)[0].split('_')[:2])
-        approach_string = '_'.join(list(time_series_pair)[1].split('_')[3:])
-        if 'half_hourly' in output_methods:
-            if time_series_pair.index.freq != 'H':
-                val_obj_dict[weather_data_name]['half_hourly'][
-                    approach_string].append(ValidationObject(
-                        object_name=wf_string, data=time_series_pair,
-                        output_method='half_hourly',
-                        weather_data_name=weather_data_name,
-                        approach=approach_string,
-                        min_periods_pearson=min_periods_pearson))
-        if 'hourly' in output_methods:
-            hourly_series = time_series_pair.resample('H').mean()
-            val_obj_dict[weather_data_name]['hourly'][
-                approach_string].append(ValidationObject(
-                    object_name=wf_string, data=hourly_series,
-                    output_method='hourly',
-                    weather_data_name=weather_data_name,
-                    approach=approach_string,
-                    min_periods_pearson=min_periods_pearson))
-        if 'monthly' in output_methods:
-            monthly_series = time_series_pair.resample('M').mean()
-            val_obj_dict[weather_data_name]['monthly'][
-                approach_string].append(ValidationObject(
-                    object_name=wf_string, data=monthly_series,
-                    output_method='monthly',
-                    weather_data_name=weather_data_name,
-                    approach=approach_string,
-                    min_periods_pearson=min_periods_pearson))
-    # Delete entry in dict if half_hourly resolution not possible
-    if (time_series_pairs[0].index.freq == 'H' and
-            'half_hourly' in val_obj_dict[weather_data_name]):
-        del val_obj_dict[weather_data_name]['half_hourly']
+    # Masks of the time steps of each time period
+    masks = tools.get_time_filter_masks(
+        time_series_df.index, time_periods, weekdays=weekdays, months=months)
+    validation_objects_key = cache.get_key(
+        'validation_objects', get_time_series_key(weather_data_name),
+        restriction_list, approach_list, output_methods, time_periods,
+        weekdays, months, min_periods_pearson,
+        get_code_signature(['analysis_tools', 'tools']))
+    validation_objects = cache.get(
+        validation_objects_key, lambda: get_validation_objects(
+            weather_data_name, time_series_df, time_series_pairs, masks))
+    for time_period in time_periods:
+        val_obj_dicts[time_period][weather_data_name] = validation_objects[
+            time_period]
 
     ###### Visualization ######
-    if 'feedin_comparison' in visualization_methods:
-        # Specify folder and title add on for saving the plots
-        if feedin_comparsion_all_in_one:
-            plot_dfs = time_series_df_parts
-            approach_string = 'multiple'
-        else:
-            plot_dfs = time_series_pairs
-            approach_string = None
-        for plot_df in plot_dfs:
-            # Specify save folder and title add on
-            if time_period is not None:
-                save_folder_add_on = (
-                    '{0}_{1}/'.format(time_period[0], time_period[1]))
-                title_add_on = ' time of day: {0}:00 - {1}:00'.format(
-                    time_period[0], time_period[1])
+    for time_period in time_periods:
+        if 'feedin_comparison' in visualization_methods:
+            # Specify folder and title add on for saving the plots
+            if feedin_comparsion_all_in_one:
+                plot_dfs = time_series_df_parts
+                approach_string = 'multiple'
             else:
-                save_folder_add_on = 'None/'
-                title_add_on = ''
-            save_folder = 'Plots/{0}/{1}/{2}/time_period/{3}'.format(
-                year, weather_data_name, approach_string if
-                approach_string == 'multiple' else
-                '_'.join(list(plot_df)[1].split('_')[3:]), save_folder_add_on)
-            for method in output_methods:
-                if approach_string != 'multiple':
-                    approach_string = '_'.join(list(plot_df)[1].split(
-                        '_')[3:])
-                wf_string = '_'.join(list(plot_df)[0].split(
-                    '_')[:2])
-                for start_end in start_end_list:
-                    if (method == 'monthly' and start_end[0] is not None):
-                        # Do not plot
-                        pass
-                    elif (method == 'half_hourly' and
+                plot_dfs = time_series_pairs
+                approach_string = None
+            for plot_df in plot_dfs:
+                # Specify save folder and title add on
+                if time_period is not None:
+                    save_folder_add_on = (
+                        '{0}_{1}/'.format(time_period[0], time_period[1]))
+                    title_add_on = ' time of day: {0}:00 - {1}:00'.format(
+                        time_period[0], time_period[1])
+                else:
+                    save_folder_add_on = 'None/'
+                    title_add_on = ''
+                save_folder = 'Plots/{0}/{1}/{2}/time_period/{3}'.format(
+                    year, weather_data_name, approach_string if
+                    approach_string == 'multiple' else
+                    '_'.join(list(plot_df)[1].split('_')[3:]),
+                    save_folder_add_on)
+                for method in output_methods:
+                    if approach_string != 'multiple':
+                        approach_string = '_'.join(list(plot_df)[1].split(
+                            '_')[3:])
+                    wf_string = '_'.join(list(plot_df)[0].split(
+                        '_')[:2])
+                    for start_end in start_end_list:
+                        if (method == 'monthly' and start_end[0] is not None):
+                            # Do not plot
+                            pass
+                        elif (method == 'half_hourly' and
+                                weather_data_name == 'MERRA'):
+                            pass
+                        else:
+                            start_string = (start_end[0].split(':')[0] if
+                                            start_end[0] else '')
+                            end_string = (start_end[1].split(':')[0] if
+                                          start_end[0] else '')
+                            filename = (
+                                save_folder +
+                                '{0}_feedin_{1}_{2}_{3}_{4}_{5}{6}.png'.format(
+                                    method, wf_string, weather_data_name,
+                                    year, approach_string, start_string,
+                                    end_string))
+                            title = (
+                                '{0} power output of {1} calculated '.format(
+                                    method.replace('_', ' '), wf_string) +
+                                'with {0} data\n in {1} ({2} approach)'.format(
+                                    weather_data_name, year,
+                                    approach_string) +
+                                title_add_on)
+                            visualization_tools.plot_feedin_comparison(
+                                data=plot_df, method=method,
+                                filename=filename, title=title,
+                                tick_label=None, start=start_end[0],
+                                end=start_end[1], mask=masks[time_period])
+
+        if 'plot_correlation' in visualization_methods:
+            for time_series_pair in time_series_pairs:
+                # Specify save folder and title add on
+                if time_period is not None:
+                    save_folder_add_on = (
+                        '{0}_{1}/'.format(time_period[0], time_period[1]))
+                    title_add_on = ' time of day: {0}:00 - {1}:00'.format(
+                        time_period[0], time_period[1])
+                else:
+                    save_folder_add_on = 'None/'
+                    title_add_on = ''
+                save_folder = 'Plots/{0}/{1}/{2}/time_period/{3}'.format(
+                    year, weather_data_name,
+                    '_'.join(list(time_series_pair)[1].split('_')[3:]),
+                    save_folder_add_on)
+                for method in output_methods:
+                    if (method == 'half_hourly' and
                             weather_data_name == 'MERRA'):
+                        # Do not plot
                         pass
                     else:
-                        visualization_tools.plot_feedin_comparison(
-                            data=plot_df, method=method,
+                        approach_string = '_'.join(
+                            list(time_series_pair)[1].split('_')[3:])
+                        wf_string = '_'.join(
+                            list(time_series_pair)[0].split('_')[:2])
+                        visualization_tools.plot_correlation(
+                            data=time_series_pair, method=method,
                             filename=(
                                 save_folder +
-                                '{0}_feedin_{1}_{2}_{3}_{4}_{5}{6}.png'.format(
+                                '{0}_Correlation_{1}_{2}_{3}_{4}.png'.format(
                                     method, wf_string, weather_data_name, year,
-                                    approach_string,
-                                    (start_end[0].split(':')[0] if start_end[0]
-                                     else ''), (start_end[1].split(':')[0]
-                                                if start_end[0] else ''))),
+                                    approach_string)),
                             title=(
-                                '{0} power output of {1} calculated with {2} data\n in {3} ({4} approach)'.format(
-                                    method.replace('_', ' '), wf_string,
-                                    weather_data_name, year, approach_string) +
+                                '{0} power output of {1} calculated '.format(
+                                    method.replace('_', ' '), wf_string) +
+                                'with {0}\n {1} ({2} approach)'.format(
+                                    weather_data_name, year,
+                                    approach_string) +
                                 title_add_on),
-                            tick_label=None, start=start_end[0],
-                            end=start_end[1])
-
-    if 'plot_correlation' in visualization_methods:
-        for time_series_pair in time_series_pairs:
-            # Specify save folder and title add on
-            if time_period is not None:
-                save_folder_add_on = (
-                    '{0}_{1}/'.format(time_period[0], time_period[1]))
-                title_add_on = ' time of day: {0}:00 - {1}:00'.format(
-                    time_period[0], time_period[1])
-            else:
-                save_folder_add_on = 'None/'
-                title_add_on = ''
-            save_folder = 'Plots/{0}/{1}/{2}/time_period/{3}'.format(
-                year, weather_data_name,
-                '_'.join(list(time_series_pair)[1].split('_')[3:]),
-                save_folder_add_on)
-            for method in output_methods:
-                if (method == 'half_hourly' and
-                        weather_data_name == 'MERRA'):
-                    # Do not plot
-                    pass
-                else:
-                    approach_string = '_'.join(
-                        list(time_series_pair)[1].split('_')[3:])
-                    wf_string = '_'.join(
-                        list(time_series_pair)[0].split('_')[:2])
-                    visualization_tools.plot_correlation(
-                        data=time_series_pair, method=method,
-                        filename=(
-                            save_folder +
-                            '{0}_Correlation_{1}_{2}_{3}_{4}.png'.format(
-                                method, wf_string, weather_data_name, year,
-                                approach_string)),
-                        title=(
-                            '{0} power output of {1} calculated with {2}\n {3} ({4} '.format(
-                                method.replace('_', ' '), wf_string,
-                                weather_data_name, year, approach_string) +
-                            'approach)' + title_add_on),
-                        color='darkblue', marker_size=3)
+                            color='darkblue', marker_size=3,
+                            mask=masks[time_period])
 
 #         if 'box_plots' in visualization_methods:
 #             # Store all bias time series of a validation set in one
@@ -667,19 +1017,21 @@ for weather_data_name in weather_data_list:
 # ---------------------------------- LaTeX Output --------------------------- #
 path_latex_tables = os.path.join(os.path.dirname(__file__),
                                  latex_tables_folder)
-if time_period is not None:
-    filename_add_on = '_{0}_{1}'.format(time_period[0], time_period[1])
-else:
-    filename_add_on = ''
-
-# Write latex output
-latex_tables.write_latex_output(
-    latex_output=latex_output, weather_data_list=weather_data_list,
-    approach_list=approach_list, restriction_list=restriction_list,
-    val_obj_dict=val_obj_dict, annual_energy_dicts=annual_energy_dicts,
-    wind_farm_names=wind_farm_names, key_figures_print=key_figures_print,
-    output_methods=output_methods, path_latex_tables=path_latex_tables,
-    filename_add_on=filename_add_on, year=year)
+for time_period in time_periods:
+    if time_period is not None:
+        filename_add_on = '_{0}_{1}'.format(time_period[0], time_period[1])
+    else:
+        filename_add_on = ''
+
+    # Write latex output
+    latex_tables.write_latex_output(
+        latex_output=latex_output, weather_data_list=weather_data_list,
+        approach_list=approach_list, restriction_list=restriction_list,
+        val_obj_dict=val_obj_dicts[time_period],
+        annual_energy_dicts=annual_energy_dicts,
+        wind_farm_names=wind_farm_names, key_figures_print=key_figures_print,
+        output_methods=output_methods, path_latex_tables=path_latex_tables,
+        filename_add_on=filename_add_on, year=year)
 
 # ------------------------------- Extra plots ------------------------------- #
 # if 'annual_bars_weather' in extra_plots:
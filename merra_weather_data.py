@@ -10,6 +10,10 @@ Try is this would work with the whole dataframe (with all locations) - took lots
 # Imports from Windpowerlib
 from windpowerlib import temperature
 
+# Imports from lib_validation
+import weather_store
+import grid_index
+
 # Other imports
 import pandas as pd
 import os
@@ -23,7 +27,10 @@ def get_merra_data(year, raw_data=False, multi_index=True, heights=None,
 
     Data is revised: unnecessary columns are droped, columns are renamed - if
     `raw_data` is False (default). The data will be dumped as a MultiIndex
-    pandas DataFrame if `multi_index` is True (default).
+    pandas DataFrame if `multi_index` is True (default). In this case it is
+    additionally dumped into a weather store (see :py:mod:`~.weather_store`)
+    next to `filename`, from which the data of single grid points can be read
+    without loading the whole data frame.
 
     Parameters
     ----------
@@ -52,7 +59,8 @@ def get_merra_data(year, raw_data=False, multi_index=True, heights=None,
 
     """
     if pickle_load:
-        weather_df = pickle.load(open(filename, 'rb'))
+        with open(filename, 'rb') as file:
+            weather_df = pickle.load(file)
     else:
         print('---- MERRA-2 data of {0} is being loaded. ----'.format(year))
         # Load data from csv
@@ -91,7 +99,13 @@ def get_merra_data(year, raw_data=False, multi_index=True, heights=None,
         else:
             weather_df = data_frame
         print('---- Loading of MERRA-2 data of {0} Done. ----'.format(year))
-        pickle.dump(weather_df, open(filename, 'wb'))
+        with open(filename, 'wb') as file:
+            pickle.dump(weather_df, file)
+        if (multi_index and not raw_data):
+            weather_store.dump_weather_store(
+                weather_df, weather_store.get_store_folder(filename))
+            grid_index.dump_grid_index(weather_store.load_coordinates(
+                weather_store.get_store_folder(filename)), filename)
     return weather_df
 
 
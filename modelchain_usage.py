@@ -1,18 +1,79 @@
 # Imports from Windpowerlib
 from windpowerlib.modelchain import ModelChain
 from windpowerlib.wind_farm_modelchain import WindFarmModelChain
+from windpowerlib import power_output
 
 # Imports from lib_validation
 import tools
 
+# Other imports
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+import pandas as pd
+import multiprocessing
+import threading
+import hashlib
+import tempfile
+import pickle
+import copy
+import os
 
-def power_output_simple(wind_turbine_fleet, weather_df,
-                        wind_speed_model='logarithmic',
-                        density_model='barometric',
-                        temperature_model='linear_gradient',
-                        power_output_model='power_curve',
-                        density_correction=False,
-                        obstacle_height=0, hellman_exp=None):
+# Summarized wind farm power curves by key (see
+# :py:func:`~.get_power_curve_key`) - least recently used first
+_power_curve_cache = OrderedDict()
+_power_curve_cache_lock = threading.Lock()
+power_curve_cache_size = 32
+
+# Wind farms and weather data frames of the tasks of
+# :py:func:`~.calculate_approaches` - set in each worker process
+_task_data = {}
+
+
+def turbine_power_outputs(wind_turbine_fleet, weather_df,
+                          wind_speed_model='logarithmic',
+                          density_model='barometric',
+                          temperature_model='linear_gradient',
+                          power_output_model='power_curve',
+                          density_correction=False,
+                          obstacle_height=0, hellman_exp=None):
+    r"""
+    Calculate power output of each turbine type of a wind turbine fleet.
+
+    The wind turbine objects are not changed, so the same objects can be used
+    in several wind farms and threads at the same time.
+
+    Parameters
+    ----------
+    wind_turbine_fleet : List of Dictionaries
+        Wind turbines of wind farm. Dictionaries must have 'wind_turbine'
+        (contains wind turbine object) and 'number_of_turbines' (number of
+        turbine type in wind farm) as keys.
+    weather_df : pandas.DataFrame
+        DataFrame with time series for wind speed `wind_speed` in m/s and
+        roughness length `roughness_length` in m. TODO: add from wpl
+
+    Returns
+    -------
+    List
+        Contains the simulated power output (pd.Series) of one turbine of each
+        turbine type in the order of `wind_turbine_fleet`.
+
+    """
+    modelchain_data = {
+        'wind_speed_model': wind_speed_model,
+        'density_model': density_model,
+        'temperature_model': temperature_model,
+        'power_output_model': power_output_model,
+        'density_correction': density_correction,
+        'obstacle_height': obstacle_height,
+        'hellman_exp': hellman_exp}
+    # Initialise ModelChain and run model for each turbine type
+    return [ModelChain(turbine_type['wind_turbine'],
+                       **modelchain_data).run_model(weather_df).power_output
+            for turbine_type in wind_turbine_fleet]
+
+
+def power_output_simple(wind_turbine_fleet, weather_df, **kwargs):
     r"""
     Calculate power output of several wind turbines by a simple method.
 
@@ -33,27 +94,19 @@ def power_output_simple(wind_turbine_fleet, weather_df,
         DataFrame with time series for wind speed `wind_speed` in m/s and
         roughness length `roughness_length` in m. TODO: add from wpl
 
+    Other Parameters
+    ----------------
+    See :py:func:`~.turbine_power_outputs`.
+
     Returns
     -------
     pd.Series
         Simulated power output of wind farm.
 
     """
-    modelchain_data = {
-        'wind_speed_model': wind_speed_model,
-        'density_model': density_model,
-        'temperature_model': temperature_model,
-        'power_output_model': power_output_model,
-        'density_correction': density_correction,
-        'obstacle_height': obstacle_height,
-        'hellman_exp': hellman_exp}
-    for turbine_type in wind_turbine_fleet:
-        # Initialise ModelChain and run model
-        mc = ModelChain(turbine_type['wind_turbine'],
-                        **modelchain_data).run_model(weather_df)
-        # Write power output timeseries to WindTurbine object
-        turbine_type['wind_turbine'].power_output = mc.power_output
-    return tools.power_output_simple_aggregation(wind_turbine_fleet)
+    return tools.power_output_simple_aggregation(
+        wind_turbine_fleet, turbine_power_outputs(
+            wind_turbine_fleet, weather_df, **kwargs))
 
 
 def power_output_wind_farm(wind_farm, weather_df, cluster=False,
@@ -61,10 +114,15 @@ def power_output_wind_farm(wind_farm, weather_df, cluster=False,
                            wake_losses_method=None,
                            smoothing=True, block_width=0.5,
                            standard_deviation_method='turbulence_intensity',
-                           wind_farm_efficiency=None, **kwargs):
+                           wind_farm_efficiency=None,
+                           power_curve_cache_folder=None, **kwargs):
     r"""
     Calculate power output of... TODO: add to docstring
 
+    If `cluster` is False, the summarized power curve of the wind farm is
+    taken from the cache of :py:func:`~.get_summarized_power_curve`, so it is
+    calculated only once for the same turbine fleet and parameters.
+
     Parameters
     ----------
     wind_farm : object
@@ -105,6 +163,9 @@ def power_output_wind_farm(wind_farm, weather_df, cluster=False,
         curve (pd.DataFrame or Dictionary) contianing 'wind_speed' and
         'efficiency' columns/keys with wind speeds in m/s and the
         corresponding dimensionless wind farm efficiency. Default: None.
+    power_curve_cache_folder : String, optional
+        Folder for pickle dumps of the summarized power curves. See
+        :py:func:`~.get_summarized_power_curve`. Default: None.
 
     Other Parameters
     ----------------
@@ -143,30 +204,309 @@ def power_output_wind_farm(wind_farm, weather_df, cluster=False,
     pd.Series
         Simulated power output of wind farm.
     """
-    wf_modelchain_data = {
-        'cluster': cluster,
-        'density_correction': density_correction,
-        'wake_losses_method': wake_losses_method,
-        'smoothing': smoothing,
-        'block_width': block_width,
-        'standard_deviation_method': standard_deviation_method,
-        'wind_farm_efficiency': wind_farm_efficiency}
-    # Add to modelchain data
-    if 'wind_speed_model' in kwargs:
-        wf_modelchain_data['wind_speed_model'] = kwargs['wind_speed_model']
-    if 'temperature_model' in kwargs:
-        wf_modelchain_data['temperature_model'] = kwargs['temperature_model']
-    if 'density_model' in kwargs:
-        wf_modelchain_data['density_model'] = kwargs['density_model']
-    if 'power_output_model' in kwargs:
-        wf_modelchain_data['power_output_model'] = kwargs['power_output_model']
-    if 'density_correction' in kwargs:
-        wf_modelchain_data['density_correction'] = kwargs['density_correction']
-    if 'obstacle_height' in kwargs:
-        wf_modelchain_data['obstacle_height'] = kwargs['obstacle_height']
-    if 'hellman_exp' in kwargs:
-        wf_modelchain_data['hellman_exp'] = kwargs['hellman_exp']
-    wf_mc = WindFarmModelChain(wind_farm,
-                               **wf_modelchain_data).run_model(weather_df,
-                                                               **kwargs)
-    return wf_mc.power_output
+    if cluster:
+        wf_modelchain_data = {
+            'cluster': cluster,
+            'density_correction': density_correction,
+            'wake_losses_method': wake_losses_method,
+            'smoothing': smoothing,
+            'block_width': block_width,
+            'standard_deviation_method': standard_deviation_method,
+            'wind_farm_efficiency': wind_farm_efficiency}
+        # Add to modelchain data
+        for key in ['wind_speed_model', 'temperature_model', 'density_model',
+                    'power_output_model', 'obstacle_height', 'hellman_exp']:
+            if key in kwargs:
+                wf_modelchain_data[key] = kwargs[key]
+        wf_mc = WindFarmModelChain(wind_farm,
+                                   **wf_modelchain_data).run_model(
+            weather_df, **kwargs)
+        return wf_mc.power_output
+    # Get summarized power curve of the wind farm from the cache
+    wind_farm_power_plant = copy.copy(wind_farm)
+    wind_farm_power_plant.power_curve = get_summarized_power_curve(
+        wind_farm.wind_turbine_fleet, cache_folder=power_curve_cache_folder,
+        smoothing=smoothing, density_correction=density_correction,
+        wake_losses_method=wake_losses_method, block_width=block_width,
+        standard_deviation_method=standard_deviation_method,
+        wind_farm_efficiency=wind_farm_efficiency,
+        roughness_length=kwargs.get('roughness_length'),
+        turbulence_intensity=kwargs.get('turbulence_intensity'))
+    # Set hub height of the (copied) wind farm to its mean hub height
+    wind_farm_power_plant.mean_hub_height()
+    modelchain_data = {'density_correction': density_correction}
+    for key in ['wind_speed_model', 'temperature_model', 'density_model',
+                'power_output_model', 'obstacle_height', 'hellman_exp']:
+        if key in kwargs:
+            modelchain_data[key] = kwargs[key]
+    mc = ModelChain(wind_farm_power_plant,
+                    **modelchain_data).run_model(weather_df)
+    return mc.power_output
+
+
+def get_power_curve_key(wind_turbine_fleet, **kwargs):
+    r"""
+    Returns a key for a summarized power curve.
+
+    The key is a hash of the composition of the wind turbine fleet (turbine
+    types, hub heights, power curves and number of turbines) and of the
+    parameters of the summarized power curve.
+
+    Parameters
+    ----------
+    wind_turbine_fleet : List of Dictionaries
+        Wind turbines of wind farm. Dictionaries must have 'wind_turbine'
+        (contains wind turbine object) and 'number_of_turbines' (number of
+        turbine type in wind farm) as keys.
+
+    Other Parameters
+    ----------------
+    See :py:func:`~.get_summarized_power_curve`.
+
+    Returns
+    -------
+    String
+        Hexadecimal hash.
+
+    """
+    key = hashlib.sha1()
+    for turbine_type in wind_turbine_fleet:
+        turbine = turbine_type['wind_turbine']
+        key.update(repr((turbine.object_name, turbine.hub_height,
+                         turbine_type['number_of_turbines'])).encode())
+        key.update(pd.util.hash_pandas_object(
+            turbine.power_curve).values.tobytes())
+    for name, value in sorted(kwargs.items()):
+        key.update(name.encode())
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            key.update(pd.util.hash_pandas_object(value).values.tobytes())
+        else:
+            key.update(repr(value).encode())
+    return key.hexdigest()
+
+
+def get_summarized_power_curve(wind_turbine_fleet, cache_folder=None,
+                               **kwargs):
+    r"""
+    Returns the summarized power curve of a wind turbine fleet.
+
+    Summarized power curves are cached in memory by a key of the turbine fleet
+    and the parameters (see :py:func:`~.get_power_curve_key`). The least
+    recently used power curve is removed if the cache contains more than
+    `power_curve_cache_size` power curves. If `cache_folder` is given, the
+    power curves are additionally dumped to and loaded from this folder, so
+    they can be reused in later runs.
+
+    Parameters
+    ----------
+    wind_turbine_fleet : List of Dictionaries
+        Wind turbines of wind farm. Dictionaries must have 'wind_turbine'
+        (contains wind turbine object) and 'number_of_turbines' (number of
+        turbine type in wind farm) as keys.
+    cache_folder : String, optional
+        Folder for pickle dumps of the power curves. Default: None.
+
+    Other Parameters
+    ----------------
+    smoothing, density_correction, wake_losses_method, block_width,
+    standard_deviation_method, wind_farm_efficiency, roughness_length,
+    turbulence_intensity :
+        See :py:func:`~.windpowerlib.power_output.summarized_power_curve`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Summarized power curve with 'wind_speed' and 'power' columns.
+
+    """
+    key = get_power_curve_key(wind_turbine_fleet, **kwargs)
+    with _power_curve_cache_lock:
+        if key in _power_curve_cache:
+            _power_curve_cache.move_to_end(key)
+            return _power_curve_cache[key]
+    filename = (os.path.join(cache_folder, 'power_curve_{0}.p'.format(key)) if
+                cache_folder is not None else None)
+    if (filename is not None and os.path.exists(filename)):
+        with open(filename, 'rb') as file:
+            summarized_curve = pickle.load(file)
+    else:
+        summarized_curve = power_output.summarized_power_curve(
+            wind_turbine_fleet=wind_turbine_fleet, **kwargs)
+        if filename is not None:
+            # Dump to a temporary file that is renamed afterwards, so other
+            # workers never load a partly written power curve
+            file_descriptor, temp_filename = tempfile.mkstemp(
+                suffix='.tmp', dir=cache_folder)
+            try:
+                with os.fdopen(file_descriptor, 'wb') as file:
+                    pickle.dump(summarized_curve, file)
+                os.replace(temp_filename, filename)
+            except BaseException:
+                os.remove(temp_filename)
+                raise
+    with _power_curve_cache_lock:
+        _power_curve_cache[key] = summarized_curve
+        if len(_power_curve_cache) > power_curve_cache_size:
+            _power_curve_cache.popitem(last=False)
+    return summarized_curve
+
+
+def calculate_approach(wind_farm, weather_df, approach,
+                       power_curve_cache_folder=None):
+    r"""
+    Calculates the power output of a wind farm with a certain approach.
+
+    Parameters
+    ----------
+    wind_farm : object
+        A :class:`~.wind_farm.WindFarm` object representing the wind farm.
+    weather_df : pandas.DataFrame
+        Weather data of the wind farm location. See
+        :py:func:`~.tools.get_weather_data_of_farms`.
+    approach : String
+        Approach for the calculation of the power output. Options: 'simple',
+        'density_correction', 'smooth_wf', 'constant_efficiency_90_%',
+        'constant_efficiency_80_%', 'efficiency_curve', 'eff_curve_smooth',
+        'linear_interpolation'.
+    power_curve_cache_folder : String, optional
+        Folder for pickle dumps of the summarized power curves. See
+        :py:func:`~.get_summarized_power_curve`. Default: None.
+
+    Returns
+    -------
+    pd.Series or None
+        Simulated power output of wind farm in W. None if the approach is not
+        applicable ('linear_interpolation' with wind speed of one height only).
+
+    """
+    if approach == 'simple':
+        return power_output_simple(wind_farm.wind_turbine_fleet, weather_df)
+    if approach == 'density_correction':
+        return power_output_simple(wind_farm.wind_turbine_fleet, weather_df,
+                                   density_correction=True)
+    if approach == 'smooth_wf':
+        return power_output_wind_farm(
+            wind_farm, weather_df, cluster=False, density_correction=False,
+            power_curve_cache_folder=power_curve_cache_folder,
+            wake_losses_method=None, smoothing=True, block_width=0.5,
+            roughness_length=weather_df['roughness_length'][0].mean(),
+            standard_deviation_method='turbulence_intensity',
+            wind_farm_efficiency=None)
+    if approach in ['constant_efficiency_90_%', 'constant_efficiency_80_%']:
+        return power_output_wind_farm(
+            wind_farm, weather_df, cluster=False, density_correction=False,
+            power_curve_cache_folder=power_curve_cache_folder,
+            wake_losses_method='constant_efficiency', smoothing=False,
+            wind_farm_efficiency=int(approach.split('_')[2]) / 100)
+    if approach == 'efficiency_curve':
+        return power_output_wind_farm(
+            wind_farm, weather_df, cluster=False, density_correction=False,
+            power_curve_cache_folder=power_curve_cache_folder,
+            wake_losses_method='wind_efficiency_curve', smoothing=False,
+            wind_farm_efficiency=tools.get_wind_efficiency_curve())
+    if approach == 'eff_curve_smooth':
+        return power_output_wind_farm(
+            wind_farm, weather_df, cluster=False, density_correction=False,
+            power_curve_cache_folder=power_curve_cache_folder,
+            wake_losses_method='wind_efficiency_curve', smoothing=True,
+            wind_farm_efficiency=tools.get_wind_efficiency_curve(),
+            roughness_length=weather_df['roughness_length'][0].mean())
+    if approach == 'linear_interpolation':
+        if len(list(weather_df['wind_speed'])) > 1:
+            return power_output_wind_farm(
+                wind_farm, weather_df, cluster=False,
+                density_correction=False,
+                power_curve_cache_folder=power_curve_cache_folder,
+                wake_losses_method='wind_efficiency_curve', smoothing=True,
+                wind_farm_efficiency=tools.get_wind_efficiency_curve(),
+                wind_speed_model='interpolation_extrapolation',
+                roughness_length=weather_df['roughness_length'][0].mean())
+        return None
+    raise ValueError("'{0}' is an invalid value for `approach`.".format(
+        approach))
+
+
+def _initialize_task_data(wind_farm_list, weather_list,
+                          power_curve_cache_folder):
+    _task_data['wind_farm_list'] = wind_farm_list
+    _task_data['weather_list'] = weather_list
+    _task_data['power_curve_cache_folder'] = power_curve_cache_folder
+
+
+def _calculate_task(task):
+    farm_number, approach = task
+    return calculate_approach(_task_data['wind_farm_list'][farm_number],
+                              _task_data['weather_list'][farm_number],
+                              approach,
+                              _task_data['power_curve_cache_folder'])
+
+
+def calculate_approaches(wind_farm_list, weather_list, approach_list,
+                         processes=1, threads=False,
+                         power_curve_cache_folder=None, tasks=None):
+    r"""
+    Calculates the power output of wind farms with several approaches.
+
+    The (wind farm, approach) tasks are distributed to `processes` worker
+    processes. The wind farms and weather data frames are handed to the
+    workers once when they are started (with the 'fork' start method they are
+    inherited and not pickled at all), the tasks themselves only contain the
+    number of the wind farm and the approach. As the simulation functions do
+    not change the wind farm and wind turbine objects, the tasks can also be
+    distributed to threads (`threads` True).
+
+    Parameters
+    ----------
+    wind_farm_list : List
+        Contains :class:`~.windpowerlib.wind_farm.WindFarm` objects.
+    weather_list : List
+        Contains one weather data frame (pd.DataFrame) for each wind farm in
+        `wind_farm_list`. See :py:func:`~.tools.get_weather_data_of_farms`.
+    approach_list : List
+        Contains the approaches (see :py:func:`~.calculate_approach`).
+    processes : Integer
+        Number of worker processes. If 1 the tasks are calculated in the
+        current process. Default: 1.
+    threads : Boolean
+        If True the tasks are distributed to `processes` threads instead of
+        processes. Default: False.
+    power_curve_cache_folder : String, optional
+        Folder for pickle dumps of the summarized power curves. See
+        :py:func:`~.get_summarized_power_curve`. Default: None.
+    tasks : List, optional
+        Contains the tasks to be calculated as tuples (number of the wind farm
+        in `wind_farm_list`, approach). If None all approaches of
+        `approach_list` are calculated for all wind farms. Default: None.
+
+    Returns
+    -------
+    List
+        Contains the simulated power output in W as pd.DataFrame with one
+        column named '{wind farm}_calculated_{approach}' for each task. The
+        order is deterministic: wind farms in the order of `wind_farm_list`,
+        approaches in the order of `approach_list` (or the order of `tasks`).
+
+    """
+    if tasks is None:
+        tasks = [(farm_number, approach) for
+                 farm_number in range(len(wind_farm_list)) for
+                 approach in approach_list]
+    if processes == 1:
+        _initialize_task_data(wind_farm_list, weather_list,
+                              power_curve_cache_folder)
+        outputs = [_calculate_task(task) for task in tasks]
+    else:
+        pool = (ThreadPool if threads else multiprocessing.Pool)(
+            processes, initializer=_initialize_task_data,
+            initargs=(wind_farm_list, weather_list,
+                      power_curve_cache_folder))
+        try:
+            # Results are returned in the order of `tasks`
+            outputs = pool.map(_calculate_task, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    return [output.to_frame(name='{0}_calculated_{1}'.format(
+                wind_farm_list[farm_number].object_name, approach)) for
+            (farm_number, approach), output in zip(tasks, outputs) if
+            output is not None]
@@ -7,7 +7,11 @@ Try is this would work with the whole dataframe (with all locations) - took lots
 
 """
 
-# Imports
+# Imports from lib_validation
+import weather_store
+import grid_index
+
+# Other imports
 import pandas as pd
 import os
 import pickle
@@ -18,6 +22,9 @@ def get_open_fred_data(filename='fred_data_2015_sh.csv',
     r"""
     Reads csv file containing weather data and dumps it as data frame.
 
+    The data frame is additionally dumped into a weather store (see
+    :py:mod:`~.weather_store`) next to `pickle_filename`.
+
     Parameters
     ----------
     filename : String
@@ -33,7 +40,8 @@ def get_open_fred_data(filename='fred_data_2015_sh.csv',
 
     """
     if pickle_load:
-        weather_df = pickle.load(open(pickle_filename, 'rb'))
+        with open(pickle_filename, 'rb') as file:
+            weather_df = pickle.load(file)
     else:
         # Load data from csv file
         weather_df = pd.read_csv(filename,
@@ -44,7 +52,12 @@ def get_open_fred_data(filename='fred_data_2015_sh.csv',
                                   weather_df.axes[1].labels[0]],
                               weather_df.axes[1].levels[1][
                                   weather_df.axes[1].labels[1]].astype(int)]
-        pickle.dump(weather_df, open(pickle_filename, 'wb'))
+        with open(pickle_filename, 'wb') as file:
+            pickle.dump(weather_df, file)
+        weather_store.dump_weather_store(
+            weather_df, weather_store.get_store_folder(pickle_filename))
+        grid_index.dump_grid_index(weather_store.load_coordinates(
+            weather_store.get_store_folder(pickle_filename)), pickle_filename)
     return weather_df
 
 if __name__ == "__main__":
@@ -1,88 +1,331 @@
+"""
+The ``read_of_weather_data`` module contains functions to extract open_FRED
+weather data from the monthly NetCDF files into a weather store (see
+:py:mod:`~.weather_store`).
+
+The monthly files of a variable are opened lazily as one dataset. The grid
+cells of a bounding box are selected by index slicing of the rotated grid
+(2D `lat` and `lon` coordinates), optionally only the cells closest to given
+locations (wind farms) are extracted. The time series are read in chunks of
+time steps and written into the memory-mapped arrays of the weather store, so
+the data of a year is never held in memory completely. The variables are
+extracted in parallel.
+
+"""
+
+# Imports from lib_validation
+import weather_store
+import grid_index
+
+# Other imports
 import xarray
+import multiprocessing
 import os
 import pandas as pd
+import numpy as np
 
 
-def get_of_weather_data_from_netcdf(year, lat_min, lat_max, lon_min, lon_max,
-                                    load_data_list):
+# Variables of the weather store needed by the approaches of the simulation
+# (see :py:func:`~.modelchain_usage.calculate_approach`)
+required_variables = ['wind_speed', 'temperature', 'pressure',
+                      'roughness_length']
+
+
+def get_helper_dict(year, main_path=None):
+    r"""
+    Returns path, filename prefix and weather store column of the variables.
+
+    Parameters
+    ----------
+    year : Integer
+        Year of the data.
+    main_path : String, optional
+        Folder of the open_FRED NetCDF files. Default: None (folder of the
+        open_FRED project data).
+
+    Returns
+    -------
+    Dictionary
+        Contains for each variable (keys like 'wss_10m') a dictionary with the
+        folder of the files ('path'), the start of their filenames
+        ('startswith') and the name and height of the variable in the weather
+        store ('variable', 'height').
 
-    # set up helper dictionary for path to netcdf files and name to save the
-    # dataframes under
-    main_path = os.path.join('/home', 'Birgit.Schachler', 'rli-daten',
-                             'open_FRED_Wetterdaten')
+    """
+    if main_path is None:
+        main_path = os.path.join('/home', 'Birgit.Schachler', 'rli-daten',
+                                 'open_FRED_Wetterdaten')
     main_startswith = 'oF_00625_MERRA2_expC17.'
     helper_dict = {
         # wind speed 10 m
         'wss_10m': {
             'path': os.path.join(main_path, 'WSS_zlevel'),
             'startswith': main_startswith + 'WSS_10M.' + str(year),
-            'filename': 'wss_10m.csv'
+            'variable': 'wind_speed', 'height': 10
         },
         # wind speed 80 m
         'wss_80m': {
             'path': os.path.join(main_path, 'WSS_zlevel'),
             'startswith': main_startswith + 'WSS_80M.' + str(year),
-            'filename': 'wss_80m.csv'
+            'variable': 'wind_speed', 'height': 80
         },
         # temperature 10 m
         'temp_10m': {
             'path': os.path.join(main_path, 'T_zlevel'),
             'startswith': main_startswith + 'T_10M.' + str(year),
-            'filename': 'temp_10m.csv'
+            'variable': 'temperature', 'height': 10
         },
         # temperature 80 m
         'temp_80m': {
             'path': os.path.join(main_path, 'T_zlevel'),
             'startswith': main_startswith + 'T_80M.' + str(year),
-            'filename': 'temp_80m.csv'
+            'variable': 'temperature', 'height': 80
         },
         # pressure 10 m
         'pressure_10m': {
             'path': os.path.join(main_path, 'P_zlevel'),
             'startswith': main_startswith + 'P_10M.' + str(year),
-            'filename': 'pressure_10m.csv'
+            'variable': 'pressure', 'height': 10
         },
         # pressure 80 m
         'pressure_80m': {
             'path': os.path.join(main_path, 'P_zlevel'),
             'startswith': main_startswith + 'P_80M.' + str(year),
-            'filename': 'pressure_80m.csv'
+            'variable': 'pressure', 'height': 80
         },
         # z0
         'z0': {
             'path': os.path.join(main_path, 'Z0'),
             'startswith': main_startswith + 'Z0.' + str(year),
-            'filename': 'z0.csv'
+            'variable': 'roughness_length', 'height': 0
         }
     }
+    return helper_dict
+
+
+def get_paths(helper_entry):
+    r"""
+    Returns the sorted paths of the monthly files of a variable.
+
+    """
+    return sorted([os.path.join(helper_entry['path'], filename) for
+                   filename in os.listdir(helper_entry['path']) if
+                   filename.startswith(helper_entry['startswith'])])
+
+
+def get_bounding_box_slices(lat, lon, lat_min, lat_max, lon_min, lon_max):
+    r"""
+    Returns the index slices of the grid cells in a bounding box.
+
+    Parameters
+    ----------
+    lat : np.array
+        Latitude of the grid cells (2D, rotated grid).
+    lon : np.array
+        Longitude of the grid cells (shape of `lat`).
+    lat_min, lat_max, lon_min, lon_max : Float
+        Bounding box.
+
+    Returns
+    -------
+    Tuple
+        Slices of the two dimensions of the grid containing all cells of the
+        bounding box (the smallest index rectangle around them).
+
+    """
+    mask = ((lat >= lat_min) & (lat <= lat_max) &
+            (lon >= lon_min) & (lon <= lon_max))
+    if not mask.any():
+        raise ValueError("No grid cells in the bounding box.")
+    rows = np.flatnonzero(mask.any(axis=1))
+    columns = np.flatnonzero(mask.any(axis=0))
+    return (slice(rows[0], rows[-1] + 1), slice(columns[0], columns[-1] + 1))
+
+
+def get_cells(lat, lon, coordinates_list=None):
+    r"""
+    Returns the grid cells to be extracted sorted by lat and lon.
+
+    Parameters
+    ----------
+    lat : np.array
+        Latitude of the grid cells (2D).
+    lon : np.array
+        Longitude of the grid cells (shape of `lat`).
+    coordinates_list : List, optional
+        Coordinates [lat, lon] of locations. If given only the cell closest to
+        each location is returned (see :py:class:`~.grid_index.GridIndex`),
+        else all cells. Default: None.
+
+    Returns
+    -------
+    Tuple (np.array, np.array)
+        Positions of the cells in the two dimensions of `lat`.
+
+    """
+    rows, columns = np.indices(lat.shape)
+    rows, columns = rows.ravel(), columns.ravel()
+    if coordinates_list is not None:
+        grid = grid_index.GridIndex(np.array([lat.ravel(),
+                                              lon.ravel()]).transpose())
+        dists, cells = grid.query(coordinates_list)
+        cells = np.unique(cells)
+        rows, columns = rows[cells], columns[cells]
+    # Grid points of a weather store are sorted by lat and lon
+    order = np.lexsort((lon[rows, columns], lat[rows, columns]))
+    return rows[order], columns[order]
+
+
+def extract_variable(paths, variable, height, folder, slices, rows, columns,
+                     chunk_size=744):
+    r"""
+    Extracts the time series of grid cells of a variable into a weather store.
+
+    Parameters
+    ----------
+    paths : List
+        Paths of the (monthly) NetCDF files of the variable.
+    variable : String
+        Name of the variable in the weather store, for example 'wind_speed'.
+    height : Integer
+        Height of the variable.
+    folder : String
+        Folder of the weather store.
+    slices : Tuple
+        Slices of the bounding box. See :py:func:`~.get_bounding_box_slices`.
+    rows, columns : np.array
+        Positions of the grid cells in the bounding box. See
+        :py:func:`~.get_cells`.
+    chunk_size : Integer
+        Number of time steps read at once. Default: 744 (a month of hourly
+        data).
+
+    Returns
+    -------
+    np.array
+        Time stamps of the extracted time series. Time stamps occurring in
+        two files are only extracted once.
+
+    """
+    data = xarray.open_mfdataset(paths, combine='by_coords',
+                                 chunks={'time': chunk_size})
+    try:
+        name = [name for name in data.data_vars if
+                name not in ['rotated_pole', 'time_bnds']][0]
+        dims = data['lat'].dims
+        # Select the bounding box by index slicing and then the grid cells
+        data_array = data[name].isel({dims[0]: slices[0],
+                                      dims[1]: slices[1]}).isel(
+            {dims[0]: xarray.DataArray(rows, dims='cell'),
+             dims[1]: xarray.DataArray(columns, dims='cell')}).transpose(
+            'time', 'cell')
+        times = pd.DatetimeIndex(data_array['time'].values)
+        keep = ~times.duplicated(keep='first')
+        targets = np.cumsum(keep) - 1
+        array = weather_store.create_variable_array(
+            folder, variable, height, (np.count_nonzero(keep), len(rows)))
+        for start in range(0, len(times), chunk_size):
+            stop = min(start + chunk_size, len(times))
+            chunk_keep = keep[start:stop]
+            values = data_array.isel(time=slice(start, stop)).values
+            array[targets[start:stop][chunk_keep]] = values[chunk_keep]
+        array.flush()
+        del array
+    finally:
+        data.close()
+    return times[keep].values
+
+
+def _extract_variable(args):
+    return extract_variable(*args)
+
+
+def get_of_weather_data_from_netcdf(year, lat_min, lat_max, lon_min, lon_max,
+                                    load_data_list, filename,
+                                    coordinates_list=None, main_path=None,
+                                    processes=1, chunk_size=744):
+    r"""
+    Extracts open_FRED weather data from NetCDF files into a weather store.
+
+    The weather store is created next to `filename` (see
+    :py:func:`~.weather_store.get_store_folder`) and the grid index of the
+    extracted cells is dumped (see :py:func:`~.grid_index.dump_grid_index`).
+    No pickle dump of a data frame is created -
+    :py:func:`~.tools.get_weather_data_of_farms` reads the data from the
+    store if `pickle_load` is True. In main.py the extraction is used instead
+    of the csv file if `open_fred_netcdf_folder` is set.
+
+    All `required_variables` have to be extracted, as the simulation
+    approaches need them.
+
+    Parameters
+    ----------
+    year : Integer
+        Year of the data.
+    lat_min, lat_max, lon_min, lon_max : Float
+        Bounding box.
+    load_data_list : List
+        Variables to be extracted (keys of :py:func:`~.get_helper_dict`). Must
+        contain at least one height of each of the `required_variables`.
+    filename : String
+        Name (including path) of the weather data dump, for example
+        'dumps/weather/weather_df_open_FRED_2015.p'.
+    coordinates_list : List, optional
+        Coordinates [lat, lon] of locations. If given only the grid cells
+        closest to the locations are extracted. Default: None (all grid cells
+        of the bounding box).
+    main_path : String, optional
+        See :py:func:`~.get_helper_dict`. Default: None.
+    processes : Integer
+        Number of worker processes the variables are extracted in.
+        Default: 1.
+    chunk_size : Integer
+        See :py:func:`~.extract_variable`. Default: 744.
 
-    # read netcdf files
-    df = pd.DataFrame()
-    for i in load_data_list:
-        for file in os.listdir(helper_dict[i]['path']):
-            if file.startswith(helper_dict[i]['startswith']):
-                print(file)
-                data = xarray.open_dataset(os.path.join(helper_dict[i]['path'],
-                                                        file))
-                # select area
-                data_sel = data.where((data.lat<=lat_max) &
-                                      (data.lat>=lat_min) &
-                                      (data.lon<=lon_max) &
-                                      (data.lon>=lon_min),
-                                      drop=True)
-                # convert to dataframe and reset index
-                data_month = data_sel.to_dataframe().drop(
-                    columns=['rotated_pole', 'time_bnds'])
-                data_month = data_month.set_index(
-                    data_month.index.get_level_values('time'))
-                df = df.append(data_month)
-
-        del data, data_sel, data_month
-        # drop duplicates
-        df = df.reset_index().drop_duplicates().set_index('time')
-        # set datetime index
-        df.index.to_datetime()
-        df.to_csv(helper_dict[i]['filename'])
+    """
+    helper_dict = get_helper_dict(year, main_path=main_path)
+    missing_variables = [
+        variable for variable in required_variables if variable not in
+        [helper_dict[key]['variable'] for key in load_data_list]]
+    if missing_variables:
+        raise ValueError("`load_data_list` does not contain the variables " +
+                         "{0} needed for the simulation.".format(
+                             missing_variables))
+    folder = weather_store.get_store_folder(filename)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    # The grid is read from the first file
+    first_path = get_paths(helper_dict[load_data_list[0]])[0]
+    with xarray.open_dataset(first_path) as data:
+        lat = data['lat'].values
+        lon = data['lon'].values
+    slices = get_bounding_box_slices(lat, lon, lat_min, lat_max, lon_min,
+                                     lon_max)
+    lat, lon = lat[slices], lon[slices]
+    rows, columns = get_cells(lat, lon, coordinates_list=coordinates_list)
+    tasks = [(get_paths(helper_dict[key]), helper_dict[key]['variable'],
+              helper_dict[key]['height'], folder, slices, rows, columns,
+              chunk_size) for key in load_data_list]
+    if processes == 1:
+        times_list = [_extract_variable(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            times_list = pool.map(_extract_variable, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    for key, times in zip(load_data_list, times_list):
+        if not np.array_equal(times, times_list[0]):
+            raise ValueError("Time stamps of {0} differ from {1}.".format(
+                key, load_data_list[0]))
+    coordinates = np.array([lat[rows, columns],
+                            lon[rows, columns]]).transpose()
+    weather_store.dump_meta_data(
+        folder, times_list[0], coordinates,
+        [(helper_dict[key]['variable'], helper_dict[key]['height']) for
+         key in load_data_list])
+    grid_index.dump_grid_index(coordinates, filename)
 
 
 if __name__ == '__main__':
@@ -95,8 +338,11 @@ if __name__ == '__main__':
     lon_max = 9.1
 
     # choose keys from helper_dict for which you want to load open_FRED
-    # weather_data
-    load_data_list = ['wss_10m', 'wss_80m']
+    # weather_data - at least one height of each of `required_variables`
+    load_data_list = ['wss_10m', 'wss_80m', 'temp_10m', 'temp_80m',
+                      'pressure_10m', 'pressure_80m', 'z0']
 
+    filename = os.path.join(os.path.dirname(__file__), 'dumps/weather',
+                            'weather_df_open_FRED_{0}.p'.format(year))
     get_of_weather_data_from_netcdf(year, lat_min, lat_max, lon_min, lon_max,
-                                    load_data_list)
+                                    load_data_list, filename)
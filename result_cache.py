@@ -0,0 +1,284 @@
+"""
+The ``result_cache`` module contains a cache for the results of the stages
+of the validation (weather data, validation data, wind farm data, simulation,
+time series data frame, validation objects).
+
+Each result is stored under a key consisting of the name of its stage and a
+hash of all inputs and parameters of the stage (see :py:func:`~.get_hash`).
+Keys of stages using the results of other stages contain the keys of these
+stages, so a result is calculated again if and only if one of its inputs
+changed - directly or in a preceding stage.
+
+Time series data frames are stored in a columnar store (see
+:py:mod:`~.storage`), so selected columns can be loaded. All other results
+are stored with pickle.
+
+"""
+
+# Imports from lib_validation
+import storage
+
+# Other imports
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+import hashlib
+import tempfile
+import os
+import pickle
+
+
+def update_hash(hash_object, obj):
+    r"""
+    Updates a hash object with the content of (nested) objects.
+
+    Supported are None, strings, numbers, lists, tuples, dictionaries, numpy
+    arrays, pandas objects and objects with a `__dict__` attribute (like
+    wind turbines), whose attributes are hashed.
+
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        hash_object.update(type(obj).__name__.encode())
+        hash_object.update(repr(list(obj.columns) if
+                                isinstance(obj, pd.DataFrame) else
+                                obj.name).encode())
+        hash_object.update(pd.util.hash_pandas_object(obj).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        hash_object.update(repr((obj.dtype.str, obj.shape)).encode())
+        hash_object.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        hash_object.update(b'dict')
+        for key in sorted(obj, key=repr):
+            update_hash(hash_object, key)
+            update_hash(hash_object, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        hash_object.update('{0}{1}'.format(type(obj).__name__,
+                                           len(obj)).encode())
+        for item in obj:
+            update_hash(hash_object, item)
+    elif hasattr(obj, '__dict__'):
+        hash_object.update(type(obj).__name__.encode())
+        update_hash(hash_object, vars(obj))
+    else:
+        hash_object.update(repr(obj).encode())
+
+
+def get_hash(*objects):
+    r"""
+    Returns a SHA1 hash of the content of `objects`.
+
+    See :py:func:`~.update_hash` for the supported objects.
+
+    """
+    hash_object = hashlib.sha1()
+    for obj in objects:
+        update_hash(hash_object, obj)
+    return hash_object.hexdigest()
+
+
+def get_file_signature(paths):
+    r"""
+    Returns path, size and modification time of files.
+
+    Folders in `paths` are searched recursively. The signature is used as an
+    input of stages reading these files - the files themselves are not read.
+
+    Parameters
+    ----------
+    paths : List
+        Paths of files or folders. Paths that do not exist are skipped.
+
+    Returns
+    -------
+    List
+        Contains a tuple (path, size, modification time) for each file.
+
+    """
+    signature = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, folder_names, filenames in os.walk(path):
+                folder_names.sort()
+                for filename in sorted(filenames):
+                    signature.extend(get_file_signature(
+                        [os.path.join(folder, filename)]))
+        elif os.path.exists(path):
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime))
+    return signature
+
+
+class ResultCache(object):
+    r"""
+    Cache of the results of the stages of the validation.
+
+    Parameters
+    ----------
+    folder : String
+        Folder of the cached results. Created if it does not exist.
+    enabled : Boolean
+        If False results are neither loaded nor dumped. Default: True.
+
+    Attributes
+    ----------
+    folder : String
+        Folder of the cached results.
+    enabled : Boolean
+        If False results are neither loaded nor dumped.
+
+    """
+    def __init__(self, folder, enabled=True):
+        self.folder = folder
+        self.enabled = enabled
+        if enabled and not os.path.exists(folder):
+            os.makedirs(folder)
+
+    def get_key(self, stage, *inputs):
+        r"""
+        Returns the key of a result of `stage` calculated from `inputs`.
+
+        Parameters
+        ----------
+        stage : String
+            Name of the stage, for example 'weather_data'.
+        inputs :
+            All inputs and parameters the result depends on, including the
+            keys of results of other stages it is calculated from.
+
+        Returns
+        -------
+        String
+            Key '{stage}_{hash}'.
+
+        """
+        return '{0}_{1}'.format(stage, get_hash(*inputs))
+
+    def get_filename(self, key):
+        return os.path.join(self.folder, '{0}.p'.format(key))
+
+    def contains(self, key):
+        r"""
+        Returns True if a result is cached for `key`.
+
+        """
+        return self.enabled and os.path.exists(self.get_filename(key))
+
+    def get_columns(self, key):
+        r"""
+        Returns the columns of a cached data frame.
+
+        """
+        filename = self.get_filename(key)
+        with open(filename, 'rb') as file:
+            entry = pickle.load(file)
+        if entry['type'] == 'frame':
+            return storage.get_columns(storage.get_storage_folder(filename))
+        return list(entry['result'].columns)
+
+    def load(self, key, columns=None):
+        r"""
+        Loads a cached result.
+
+        Parameters
+        ----------
+        key : String
+            See :py:meth:`~.get_key`.
+        columns : List, optional
+            Only these columns are loaded if the result is a time series data
+            frame. Default: None (all columns).
+
+        """
+        filename = self.get_filename(key)
+        with open(filename, 'rb') as file:
+            entry = pickle.load(file)
+        if entry['type'] == 'frame':
+            return storage.read_frame(storage.get_storage_folder(filename),
+                                      columns=columns)
+        if columns is not None and isinstance(entry['result'], pd.DataFrame):
+            return entry['result'][columns]
+        return entry['result']
+
+    def dump(self, key, result):
+        r"""
+        Dumps a result.
+
+        Time series data frames that can be stored (see
+        :py:func:`~.storage.is_storable`) are dumped into a columnar store,
+        all other results with pickle.
+
+        """
+        if not self.enabled:
+            return
+        filename = self.get_filename(key)
+        if storage.is_storable(result):
+            storage.dump_frame(result, storage.get_storage_folder(filename))
+            entry = {'type': 'frame'}
+        else:
+            entry = {'type': 'pickle', 'result': result}
+        # The entry is written last and moved into place when it is complete,
+        # so an interrupted dump is not used
+        file_descriptor, temp_filename = tempfile.mkstemp(
+            suffix='.tmp', dir=self.folder)
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                pickle.dump(entry, file)
+            os.replace(temp_filename, filename)
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+
+    def get(self, key, function, columns=None):
+        r"""
+        Loads a cached result or calculates and dumps it.
+
+        Parameters
+        ----------
+        key : String
+            See :py:meth:`~.get_key`.
+        function : callable
+            Calculates the result if it is not cached. Called without
+            arguments.
+        columns : List, optional
+            See :py:meth:`~.load`. Only used if the result is loaded.
+
+        """
+        if self.contains(key):
+            return self.load(key, columns=columns)
+        result = function()
+        self.dump(key, result)
+        return result
+
+    def get_results(self, keys, function):
+        r"""
+        Loads the cached results of several keys and calculates the others.
+
+        The results that are not cached are calculated by one call of
+        `function`, so they can be calculated together.
+
+        Parameters
+        ----------
+        keys : collections.OrderedDict
+            Keys (see :py:meth:`~.get_key`) with the names of the results as
+            keys.
+        function : callable
+            Called with the list of the names of the results that are not
+            cached. Returns a dictionary with these names as keys and the
+            results as values.
+
+        Returns
+        -------
+        collections.OrderedDict
+            Results with their names as keys in the order of `keys`.
+
+        """
+        missing_names = [name for name, key in keys.items() if
+                         not self.contains(key)]
+        calculated = function(missing_names) if missing_names else {}
+        results = OrderedDict()
+        for name, key in keys.items():
+            if name in calculated:
+                results[name] = calculated[name]
+                self.dump(key, results[name])
+            else:
+                results[name] = self.load(key)
+        return results
@@ -0,0 +1,247 @@
+"""
+The ``storage`` module contains functions to dump time series data frames
+(validation data, time series of measured and simulated feed-in) into a
+columnar, compressed and partitioned store and to read selected columns and
+time ranges from it.
+
+A store is a folder containing
+- one compressed numpy archive per year ('{year}.npz') with the time stamps
+  in UTC ('time') and one array per column. The arrays of an archive are
+  only decompressed when they are accessed, so reading some columns does not
+  read the others,
+- a small pickle dump with the column names, dtypes, time zone and frequency
+  of the data frame ('meta.p').
+
+Weather data of many grid points is stored by :py:mod:`~.weather_store`.
+
+"""
+
+# Other imports
+import pandas as pd
+import numpy as np
+import os
+import pickle
+
+
+def get_storage_folder(filename):
+    r"""
+    Returns the folder of the store belonging to a pickle dump filename.
+
+    For example: 'dumps/validation_data/enertrag_data_2016_store' for
+    'dumps/validation_data/enertrag_data_2016.p'.
+
+    """
+    return '{0}_store'.format(os.path.splitext(filename)[0])
+
+
+def get_partition_filename(folder, year):
+    return os.path.join(folder, '{0}.npz'.format(year))
+
+
+def exists(folder):
+    r"""
+    Returns True if a store exists in `folder`.
+
+    """
+    return os.path.exists(os.path.join(folder, 'meta.p'))
+
+
+def load_meta(folder):
+    r"""
+    Loads the meta data of a store.
+
+    Returns
+    -------
+    Dictionary
+        Column names ('columns'), dtypes ('dtypes'), time zone ('tz'),
+        frequency ('freq'), index name ('index_name') and years of the
+        partitions ('years').
+
+    """
+    with open(os.path.join(folder, 'meta.p'), 'rb') as file:
+        return pickle.load(file)
+
+
+def get_columns(folder):
+    r"""
+    Returns the column names of a store.
+
+    """
+    return load_meta(folder)['columns']
+
+
+def is_storable(df):
+    r"""
+    Returns True if a data frame can be dumped into a store.
+
+    Stores contain time series data frames (DatetimeIndex, one column level)
+    with numpy dtypes of numbers, booleans, time stamps or time deltas only.
+    Object columns (e.g. strings) can not be read from the numpy archives
+    without pickle and extension dtypes (e.g. categorical or time zone aware
+    time stamps) would be lost.
+
+    """
+    return (isinstance(df, pd.DataFrame) and
+            isinstance(df.index, pd.DatetimeIndex) and
+            not isinstance(df.columns, pd.MultiIndex) and
+            all(isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM' for
+                dtype in df.dtypes))
+
+
+def dump_frame(df, folder):
+    r"""
+    Dumps a time series data frame into a store partitioned by years.
+
+    Existing partitions in `folder` are replaced. The data frame is only
+    partitioned by years, all columns of a year are in the same partition
+    (but are read separately, see :py:func:`~.read_frame`).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Time series (columns) with DatetimeIndex. See
+        :py:func:`~.is_storable`.
+    folder : String
+        Folder of the store. Created if it does not exist.
+
+    """
+    if not is_storable(df):
+        raise TypeError(
+            "Data frame can not be dumped into a store. Only data frames "
+            "with DatetimeIndex, one column level and numeric, boolean or "
+            "datetime64 columns are supported. Invalid dtypes: {0}".format(
+                sorted(set(str(dtype) for dtype in df.dtypes if
+                           not isinstance(dtype, np.dtype) or
+                           dtype.kind not in 'biufcmM'))))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    for filename in os.listdir(folder):
+        if filename.endswith('.npz'):
+            os.remove(os.path.join(folder, filename))
+    index = df.index
+    tz = None if index.tz is None else str(index.tz)
+    utc_index = index.tz_convert('UTC') if tz is not None else index
+    times = utc_index.tz_localize(None).values.astype('datetime64[ns]')
+    years = np.asarray(index.year)
+    columns = list(df.columns)
+    for year in np.unique(years):
+        rows = years == year
+        arrays = {'column_{0}'.format(number): df.iloc[rows, number].values
+                  for number in range(len(columns))}
+        np.savez_compressed(get_partition_filename(folder, year),
+                            time=times[rows], **arrays)
+    with open(os.path.join(folder, 'meta.p'), 'wb') as file:
+        pickle.dump({'columns': columns,
+                     'dtypes': [df[column].dtype for column in columns],
+                     'tz': tz, 'freq': index.freqstr,
+                     'index_name': index.name,
+                     'years': [int(year) for year in np.unique(years)]},
+                    file)
+
+
+def read_frame(folder, columns=None, start=None, end=None):
+    r"""
+    Reads columns and a time range of a store.
+
+    Only the partitions of the years between `start` and `end` and only the
+    arrays of `columns` are read.
+
+    Parameters
+    ----------
+    folder : String
+        Folder of the store.
+    columns : List, optional
+        Columns to be read. If None all columns are read. Default: None.
+    start : String or pd.Timestamp, optional
+        First time step to be read. Time stamps without time zone are
+        interpreted in the time zone of the store. Default: None.
+    end : String or pd.Timestamp, optional
+        Last time step to be read (see `start`). Default: None.
+
+    Returns
+    -------
+    pd.DataFrame
+        Time series with DatetimeIndex in the time zone of the dumped data
+        frame.
+
+    """
+    meta = load_meta(folder)
+    if columns is None:
+        columns = meta['columns']
+    positions = [meta['columns'].index(column) for column in columns]
+
+    def get_utc_time(time_stamp):
+        time_stamp = pd.Timestamp(time_stamp)
+        if time_stamp.tzinfo is None and meta['tz'] is not None:
+            time_stamp = time_stamp.tz_localize(meta['tz'])
+        if time_stamp.tzinfo is not None:
+            time_stamp = time_stamp.tz_convert('UTC').tz_localize(None)
+        return time_stamp
+
+    start = get_utc_time(start) if start is not None else None
+    end = get_utc_time(end) if end is not None else None
+    time_parts = []
+    data_parts = []
+    for year in meta['years']:
+        # Partitions are skipped by their year (one year of tolerance for
+        # the difference between local time and UTC)
+        if ((start is not None and year < start.year - 1) or
+                (end is not None and year > end.year + 1)):
+            continue
+        with np.load(get_partition_filename(folder, year)) as partition:
+            times = partition['time']
+            rows = np.ones(len(times), dtype=bool)
+            if start is not None:
+                rows &= times >= start.to_datetime64()
+            if end is not None:
+                rows &= times <= end.to_datetime64()
+            if not rows.any():
+                continue
+            time_parts.append(times[rows])
+            data_parts.append([partition['column_{0}'.format(position)][rows]
+                               for position in positions])
+    index = pd.DatetimeIndex(
+        np.concatenate(time_parts) if time_parts else
+        np.array([], dtype='datetime64[ns]'), name=meta['index_name'])
+    if meta['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+    df = pd.DataFrame(
+        {column: (np.concatenate([part[number] for part in data_parts]) if
+                  data_parts else
+                  np.array([], dtype=meta['dtypes'][positions[number]]))
+         for number, column in enumerate(columns)},
+        index=index, columns=columns)
+    if meta['freq'] is not None:
+        df.index.freq = pd.tseries.frequencies.to_offset(meta['freq'])
+    return df
+
+
+def load_frame(filename, columns=None):
+    r"""
+    Reads columns of the store belonging to a pickle dump.
+
+    If the store does not exist yet but the pickle dump `filename` (dumped
+    before stores were used) does, the data frame is loaded from the pickle
+    dump and the store is created from it for subsequent calls.
+
+    Parameters
+    ----------
+    filename : String
+        Name (including path) of the pickle dump. See
+        :py:func:`~.get_storage_folder`.
+    columns : List, optional
+        Columns to be read. If None all columns are read. Default: None.
+
+    Returns
+    -------
+    pd.DataFrame
+        Time series with DatetimeIndex.
+
+    """
+    folder = get_storage_folder(filename)
+    if not exists(folder) and os.path.exists(filename):
+        with open(filename, 'rb') as file:
+            df = pickle.load(file)
+        dump_frame(df, folder)
+        return df[columns] if columns is not None else df
+    return read_frame(folder, columns=columns)
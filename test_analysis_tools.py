@@ -1,4 +1,6 @@
 import pandas as pd
+import numpy as np
+import pytest
 import analysis_tools
 
 
@@ -10,18 +12,20 @@ class TestValidationObject:
         series_4 = pd.Series([2., 4., 6.])
         series_5 = pd.Series([2., 4., 5.])
         # Identical series
-        val_obj_1 = analysis_tools.ValidationObject('Test', series_1, series_2)
+        val_obj_1 = analysis_tools.ValidationObject(
+            'Test', pd.concat([series_1, series_2], axis=1))
         r_exp = 1.0
         mean_bias_exp = 0
         std_dev_exp = 0
         rmse_exp = 0
-        assert r_exp == val_obj_1.pearson_s_r
+        assert r_exp == pytest.approx(val_obj_1.pearson_s_r)
         assert mean_bias_exp == val_obj_1.mean_bias
         assert std_dev_exp == val_obj_1.standard_deviation
         assert rmse_exp == val_obj_1.rmse
 
         # Simulated series fully correlate but with bias
-        val_obj_2 = analysis_tools.ValidationObject('Test', series_1, series_3)
+        val_obj_2 = analysis_tools.ValidationObject(
+            'Test', pd.concat([series_1, series_3], axis=1))
         r_exp = 1.0
         mean_bias_exp = 2.0
         std_dev_exp = 0
@@ -32,15 +36,16 @@ class TestValidationObject:
         assert rmse_exp == val_obj_2.rmse
 
         # Simulated series = 2 * validation series
-        val_obj_3 = analysis_tools.ValidationObject('Test', series_1, series_4)
+        val_obj_3 = analysis_tools.ValidationObject(
+            'Test', pd.concat([series_1, series_4], axis=1))
         r_exp = 1.0
         mean_bias_exp = 2.0
         std_dev_exp = 0.81649658092772603
         rmse_exp = 2.1602468994692869
-        assert r_exp == val_obj_3.pearson_s_r
-        assert mean_bias_exp == val_obj_3.mean_bias
-        assert std_dev_exp == val_obj_3.standard_deviation
-        assert rmse_exp == val_obj_3.rmse
+        assert r_exp == pytest.approx(val_obj_3.pearson_s_r)
+        assert mean_bias_exp == pytest.approx(val_obj_3.mean_bias)
+        assert std_dev_exp == pytest.approx(val_obj_3.standard_deviation)
+        assert rmse_exp == pytest.approx(val_obj_3.rmse)
      
 #        # Not linear
 #        val_obj_4 = analysis_tools.ValidationObject('Test', series_1, series_5)
@@ -56,3 +61,89 @@ class TestValidationObject:
 #        series_2 = pd.Series([3., 1.8, 4.])
 #        r_exp = 0.45392064950160177
 #        assert r_exp == analysis_tools.pearson_s_r(series_1, series_2)
+
+
+class TestKeyFigureAccumulator:
+    def test_chunks(self):
+        data = pd.DataFrame({'validation': [1., 2., 3., 5., np.nan, 4., 2.],
+                             'simulation': [2., 2., 4., 3., 1., np.nan, 3.]})
+        val_obj = analysis_tools.ValidationObject('Test', data)
+        accumulator_1 = analysis_tools.KeyFigureAccumulator('Test').update(
+            data['validation'][:3], data['simulation'][:3])
+        accumulator_2 = analysis_tools.KeyFigureAccumulator('Test').update(
+            data['validation'][3:], data['simulation'][3:])
+        accumulator = analysis_tools.merge_key_figure_accumulators(
+            [accumulator_1, accumulator_2])
+        assert accumulator.count == 5
+        for key in ['mean_bias', 'rmse', 'standard_deviation',
+                    'pearson_s_r']:
+            assert accumulator.key_figures[key] == pytest.approx(
+                val_obj.key_figures[key])
+
+
+class TestGroupedKeyFigures:
+    def test_monthly(self):
+        index = pd.date_range('2015-01-30', '2016-02-02', freq='D')
+        data = pd.DataFrame({'validation': np.arange(len(index), dtype=float),
+                             'simulation': np.arange(len(index)) * 2.},
+                            index=index)
+        data.iloc[3, 1] = np.nan
+        grouped = analysis_tools.get_grouped_key_figures(data, 'month')
+        assert list(grouped['month']) == list(range(1, 13))
+        january = data[data.index.month == 1].dropna()
+        assert grouped['count'][0] == len(january)
+        assert grouped['rmse'][0] == pytest.approx(np.sqrt(
+            ((january['simulation'] - january['validation']) ** 2).mean()))
+        grouped = analysis_tools.get_grouped_key_figures(
+            data, 'season', by_year=True)
+        assert list(grouped['year']) == [2015] * 4 + [2016]
+        assert grouped['count'].sum() == len(data.dropna())
+        # December 2015 belongs to winter 2016
+        assert grouped['count'].iloc[-1] == len(
+            data['2015-12-01':].dropna())
+
+    def test_period_codes(self):
+        index = pd.date_range('2015-12-27', '2016-01-04', freq='D')
+        codes, labels = analysis_tools.get_period_codes(index, 'week',
+                                                        by_year=True)
+        # 2016-01-01 to 2016-01-03 belong to week 53 of 2015
+        assert list(labels.iloc[codes]['year']) == [2015] * 8 + [2016]
+        assert list(labels.iloc[codes]['week']) == [52] + [53] * 7 + [1]
+        codes, labels = analysis_tools.get_period_codes(
+            pd.DatetimeIndex(['2015-02-01', '2015-12-01', '2016-01-01']),
+            'season', by_year=True)
+        assert list(labels.iloc[codes]['year']) == [2015, 2016, 2016]
+        assert list(labels.iloc[codes]['season']) == ['winter'] * 3
+
+
+class TestCorrelations:
+    def test_get_correlations(self):
+        index = pd.date_range('2015-01-01', periods=24 * 60, freq='h')
+        validation = pd.Series(np.sin(np.arange(len(index))), index=index)
+        simulation = validation ** 2 + np.cos(np.arange(len(index)))
+        validation_df = pd.DataFrame({'a': validation, 'b': simulation})
+        simulation_df = pd.DataFrame({'a': simulation, 'b': validation})
+        data = pd.concat([validation, simulation], axis=1)
+        correlations = analysis_tools.get_correlations(
+            validation_df, simulation_df, sample_resolution='D')
+        expected = data.resample('D').apply(lambda x: x[0].corr(x[1]))
+        assert np.allclose(correlations['a'].values, expected.values)
+        assert np.allclose(correlations['b'].values, expected.values)
+        mask = (index.hour >= 4) & (index.hour <= 8)
+        correlations = analysis_tools.get_correlations(
+            validation_df, simulation_df, mask=mask, method='spearman')
+        assert correlations['a'].iloc[0] == pytest.approx(
+            data[mask].corr(method='spearman').iloc[0, 1])
+        correlations = analysis_tools.get_correlations(
+            validation_df, simulation_df, window=24)
+        assert np.allclose(correlations['a'].values,
+                           validation.rolling(24).corr(simulation)[23:])
+
+    def test_mask(self):
+        data = pd.DataFrame({'validation': [1., 2., 3., 4.],
+                             'simulation': [2., 2., 5., 6.]})
+        mask = np.array([True, True, False, False])
+        val_obj = analysis_tools.ValidationObject('Test', data, mask=mask)
+        assert val_obj.mean_bias == pytest.approx(0.5)
+        assert val_obj.rmse == pytest.approx(np.sqrt(0.5))
+        assert len(val_obj.validation_series) == 2
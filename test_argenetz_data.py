@@ -0,0 +1,53 @@
+import argenetz_data
+
+import pandas as pd
+import numpy as np
+import os
+
+
+def write_file(path, index, values):
+    with open(path, 'w') as file:
+        file.write('Zeit;Bredstedt :: Elektrische Wirkleistung :: [kW]\n')
+        for time_step, value in zip(index, values):
+            file.write('{0}PT1M;{1}\n'.format(
+                time_step.isoformat(), str(value).replace('.', ',')))
+
+
+class TestArgeNetzData:
+
+    def test_get_partitions(self, tmp_path):
+        datapath = tmp_path / 'data'
+        datapath.mkdir()
+        index = pd.date_range('2016-01-01', periods=40, freq='min', tz='UTC')
+        values = np.random.RandomState(0).randint(100, 1000, 40).astype(float)
+        # Linear ramp crossing the boundary of the two files
+        values[14:26] = np.arange(12) * 10. + 100.
+        write_file(str(datapath / '2016_01.csv'), index[:20], values[:20])
+        write_file(str(datapath / '2016_02.csv'), index[20:], values[20:])
+        filenames = ['2016_01.csv', '2016_02.csv']
+        partition_folder = str(tmp_path / 'partitions')
+        df, intervals = argenetz_data.get_partitions(
+            filenames, 2016, partition_folder, datapath=str(datapath))
+        assert np.array_equal(df['wf_1_power_output'].values, values)
+        interpolated = intervals[intervals['check'] == 'interpolated']
+        assert list(interpolated['start']) == [index[16]]
+        assert list(interpolated['end']) == [index[25]]
+        # Changed file with the same time range - intervals are scanned again
+        # even if the file is parsed in a run without filtering
+        values[20:26] = np.random.RandomState(1).randint(100, 1000, 6)
+        write_file(str(datapath / '2016_02.csv'), index[20:], values[20:])
+        os.utime(str(datapath / '2016_02.csv'), (0, 0))
+        df, intervals = argenetz_data.get_partitions(
+            filenames, 2016, partition_folder, datapath=str(datapath),
+            filter_interpolated_data=False)
+        assert intervals is None
+        df, intervals = argenetz_data.get_partitions(
+            filenames, 2016, partition_folder, datapath=str(datapath))
+        assert np.array_equal(df['wf_1_power_output'].values, values)
+        assert intervals[intervals['check'] == 'interpolated'].empty
+
+    def test_get_partition_filename(self):
+        assert (argenetz_data.get_partition_filename(
+                    'partitions', os.path.join('2015', 'data.csv')) !=
+                argenetz_data.get_partition_filename(
+                    'partitions', os.path.join('2016', 'data.csv')))
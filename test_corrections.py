@@ -0,0 +1,54 @@
+import corrections
+import storage
+
+import pandas as pd
+import numpy as np
+
+
+class TestCorrections:
+
+    def setup_class(self):
+        self.index = pd.date_range('2016-01-01', periods=4, freq='30min',
+                                   tz='Europe/Berlin')
+        self.arge_data = pd.DataFrame(
+            {'wf_1_power_output': [10.0, 5.0, 0.0, np.nan],
+             'wf_1_theoretical_power': [10.0, 10.0, 0.0, 10.0],
+             'wf_1_installed_power': [20.0, 20.0, 10.0, 20.0],
+             'wf_3_power_output': [1.0, 1.0, 1.0, 1.0]},
+            index=self.index)
+
+    def test_get_factors(self):
+        factors = corrections.get_factors(self.arge_data, ['wf_1', 'wf_3'])
+        assert list(factors) == ['wf_1']
+        np.testing.assert_allclose(factors['wf_1'].values,
+                                   [1.0, 0.5, 0.5, 1.0])
+        curtailment = corrections.get_factors(
+            self.arge_data, ['wf_1', 'wf_3'], factors=['curtailment'])
+        np.testing.assert_allclose(curtailment['wf_1'].values,
+                                   [1.0, 0.5, 1.0, np.nan])
+
+    def test_join_and_apply_factors(self, tmp_path):
+        enertrag_factors = pd.DataFrame({'wf_9': [1.0, 0.5, 0.0, 1.0]},
+                                        index=self.index)
+        factor_df = corrections.join_factors(
+            [enertrag_factors, corrections.get_factors(
+                self.arge_data, ['wf_1'], factors=['availability'])], '60min')
+        assert sorted(factor_df) == ['wf_1', 'wf_9']
+        calculation_df = pd.DataFrame(
+            {'wf_1_calculated_simple': [2.0, 2.0],
+             'wf_9_calculated_simple': [2.0, 2.0],
+             'wf_9_calculated_smooth_wf': [4.0, 4.0],
+             'wf_3_calculated_simple': [2.0, 2.0]},
+            index=pd.date_range('2016-01-01', periods=2, freq='60min',
+                                tz='Europe/Berlin'))
+        corrected_df = corrections.apply_factors(calculation_df, factor_df)
+        assert list(corrected_df) == list(calculation_df)
+        np.testing.assert_allclose(
+            corrected_df.values,
+            [[2.0, 1.5, 3.0, 2.0], [1.5, 1.0, 2.0, 2.0]])
+        # Without factors (also after a round trip through the store)
+        empty_df = corrections.join_factors([], '60min')
+        storage.dump_frame(empty_df, str(tmp_path / 'store'))
+        empty_df = storage.read_frame(str(tmp_path / 'store'))
+        assert corrections.apply_factors(calculation_df, empty_df).equals(
+            calculation_df)
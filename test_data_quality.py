@@ -0,0 +1,48 @@
+import pandas as pd
+import numpy as np
+import data_quality
+
+
+class TestDataQuality:
+    def test_scan_data_quality(self):
+        index = pd.date_range('2016-01-01', periods=60, freq='min',
+                              tz='Europe/Berlin')
+        power_output = np.abs(np.sin(np.arange(60.))) * 5
+        power_output[20:32] = 2.5
+        power_output[40] = -1.
+        power_output[50:52] = 9.
+        df = pd.DataFrame({'wf_1_power_output': power_output,
+                           'wf_1_installed_power': 6.}, index=index)
+        intervals = data_quality.scan_data_quality(df)
+        report = data_quality.get_quality_report(intervals)
+        assert report.loc['wf_1_power_output', ('sum', 'constant')] == 12
+        assert report.loc['wf_1_power_output', ('sum', 'negative')] == 1
+        assert report.loc['wf_1_power_output',
+                          ('sum', 'above_capacity')] == 2
+        corrected_df = data_quality.apply_intervals(
+            df, intervals, checks=['negative', 'above_capacity'])
+        assert corrected_df['wf_1_power_output'].isnull().sum() == 3
+        assert corrected_df['wf_1_installed_power'].isnull().sum() == 0
+
+    def test_get_quality_intervals(self, tmpdir, monkeypatch):
+        index = pd.date_range('2016-01-01', periods=60, freq='min',
+                              tz='Europe/Berlin')
+        df = pd.DataFrame(
+            {'wf_1_power_output': np.abs(np.sin(np.arange(60.))) * 5,
+             'wf_1_installed_power': 6.}, index=index)
+        filename = str(tmpdir.join('data.p'))
+        intervals = data_quality.get_quality_intervals(df, filename)
+        assert intervals.empty
+        # Same time range and columns but changed values are scanned again
+        changed_df = df.copy()
+        changed_df.iloc[10:20, 0] = -1.
+        assert (data_quality.get_data_signature(changed_df) !=
+                data_quality.get_data_signature(df))
+        intervals = data_quality.get_quality_intervals(changed_df, filename)
+        report = data_quality.get_quality_report(intervals)
+        assert report.loc['wf_1_power_output', ('sum', 'negative')] == 10
+        # Unchanged data is loaded from the dump
+        monkeypatch.setattr(data_quality, 'scan_data_quality', None)
+        loaded_intervals = data_quality.get_quality_intervals(
+            changed_df.copy(), filename)
+        pd.testing.assert_frame_equal(loaded_intervals, intervals)
@@ -0,0 +1,78 @@
+import enertrag_data
+import storage
+
+import pandas as pd
+import numpy as np
+
+
+class TestEnertragData:
+
+    def setup_class(self):
+        self.index = pd.date_range('2016-01-01', periods=12, freq='10min')
+        self.turbine_data = {
+            'Erfassungsdaten_B1.csv': pd.DataFrame(
+                {'Leistung[kW]': np.arange(12, dtype=float),
+                 'Windgeschwindigkeit[m/s]': np.arange(12) / 2.0},
+                index=self.index),
+            # Other time stamps and a missing value
+            'Erfassungsdaten_E1.csv': pd.DataFrame(
+                {'Leistung[kW]': [1.0, np.nan, 3.0, 4.0],
+                 'Windgeschwindigkeit[m/s]': [2.0, 2.0, 2.0, 2.0]},
+                index=self.index[2:6])}
+
+    def test_read_and_resample_turbine_files(self, tmp_path):
+        for filename, df in self.turbine_data.items():
+            df.to_csv(str(tmp_path / filename))
+        variables = ['Leistung[kW]', 'Windgeschwindigkeit[m/s]']
+        times, arrays = enertrag_data.read_turbine_files(
+            sorted(self.turbine_data), variables, datapath=str(tmp_path))
+        assert arrays['Leistung[kW]'].shape == (2, 12)
+        times, arrays = enertrag_data.resample_arrays(times, arrays, '30min')
+        for number, filename in enumerate(sorted(self.turbine_data)):
+            expected = self.turbine_data[filename].resample(
+                '30min').mean().reindex(pd.DatetimeIndex(times))
+            for variable in variables:
+                np.testing.assert_allclose(arrays[variable][number],
+                                           expected[variable].values)
+
+    def test_get_enertrag_curtailment_data(self, monkeypatch):
+        calls = []
+
+        def read_data(filename):
+            calls.append(filename)
+            index = pd.date_range('2016-01-01', periods=4, freq='15min')
+            return pd.DataFrame({'power_rel': 1.0, 'wind_mean': 5.0,
+                                 'curtail_rel': [1.0, 0.5, 0.0, 1.0]},
+                                index=index.strftime('%Y-%m-%d %H:%M:%S'))
+
+        monkeypatch.setattr(enertrag_data, 'read_data', read_data)
+        monkeypatch.setattr(enertrag_data, '_curtailment_cache', {})
+        curtailment = enertrag_data.get_enertrag_curtailment_data('30min')
+        assert list(curtailment) == ['curtail_rel']
+        assert list(curtailment['curtail_rel']) == [0.75, 0.5]
+        assert enertrag_data.get_enertrag_curtailment_data(
+            pd.tseries.frequencies.to_offset('30min')) is curtailment
+        assert len(enertrag_data.get_enertrag_curtailment_data()) == 4
+        assert len(calls) == 1
+
+    def test_get_enertrag_data_farm_output_only(self, tmp_path, monkeypatch):
+        def read_turbine_files(names, variables, processes=1):
+            times = pd.date_range('2016-01-01', periods=12,
+                                  freq='10min').values.astype('datetime64[ns]')
+            return times, {variable: np.ones((len(names), len(times))) for
+                           variable in variables}
+
+        monkeypatch.setattr(enertrag_data, 'read_turbine_files',
+                            read_turbine_files)
+        filename = str(tmp_path / 'enertrag_data.p')
+        enertrag_df = enertrag_data.get_enertrag_data(filename=filename,
+                                                      frequency='30min')
+        farm_df = enertrag_data.get_enertrag_data(
+            filename=filename, frequency='30min', farm_output_only=True)
+        assert list(farm_df) == ['wf_9_power_output']
+        # The store of the complete data is not replaced
+        assert storage.load_frame(filename).equals(enertrag_df)
+        assert len(list(enertrag_df)) > 1
+        assert enertrag_data.get_enertrag_data(
+            pickle_load=True, filename=filename,
+            farm_output_only=True).equals(farm_df)
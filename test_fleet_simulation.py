@@ -0,0 +1,49 @@
+import fleet_simulation
+import tools
+
+from types import SimpleNamespace
+import pandas as pd
+import numpy as np
+
+
+class TestFleetSimulation:
+
+    def test_power_output_simple_farms(self):
+        power_curve = pd.DataFrame({'wind_speed': [0., 3., 10., 25.],
+                                    'power': [0., 0., 2.e6, 2.e6]})
+        turbine_a = SimpleNamespace(object_name='turbine_a', hub_height=100,
+                                    power_curve=power_curve)
+        turbine_b = SimpleNamespace(object_name='turbine_b', hub_height=50,
+                                    power_curve=power_curve * [1., 0.5])
+        wind_farms = [
+            SimpleNamespace(object_name='wf_1', wind_turbine_fleet=[
+                {'wind_turbine': turbine_a, 'number_of_turbines': 3}]),
+            SimpleNamespace(object_name='wf_2', wind_turbine_fleet=[
+                {'wind_turbine': turbine_b, 'number_of_turbines': 2}]),
+            SimpleNamespace(object_name='wf_3', wind_turbine_fleet=[
+                {'wind_turbine': turbine_a, 'number_of_turbines': 1},
+                {'wind_turbine': turbine_b, 'number_of_turbines': 4}])]
+        index = pd.date_range('2015-01-01', periods=24, freq='h', tz='UTC')
+        random_state = np.random.RandomState(0)
+        flat_weather = [pd.DataFrame(
+            {'wind_speed': random_state.uniform(0, 20, len(index)),
+             'roughness_length': random_state.uniform(0.01, 0.2, len(index))},
+            index=index) for cell in range(2)]
+        weather_list = []
+        # wf_1 and wf_2 have the same closest grid point
+        for cell in [0, 0, 1]:
+            weather = flat_weather[cell].copy()
+            weather.columns = pd.MultiIndex.from_tuples(
+                [('wind_speed', 50), ('roughness_length', 0)])
+            weather_list.append(weather)
+        farm_power_output = fleet_simulation.power_output_simple_farms(
+            wind_farms, weather_list)
+        assert list(farm_power_output) == ['wf_1', 'wf_2', 'wf_3']
+        for wind_farm, cell in zip(wind_farms, [0, 0, 1]):
+            expected = tools.power_output_simple(
+                wind_farm.wind_turbine_fleet, flat_weather[cell],
+                {'wind_speed': 50})
+            np.testing.assert_allclose(
+                farm_power_output[wind_farm.object_name].values,
+                np.asarray(expected, dtype=float))
+            assert (farm_power_output[wind_farm.object_name] > 0).any()
@@ -0,0 +1,71 @@
+import greenwind_data
+
+import pandas as pd
+import numpy as np
+
+
+class TestGreenWindData:
+
+    def test_get_new_time_step_mask(self):
+        times = np.array([1, 2, 2, 3, 1, 2, 4, 5])
+        assert list(greenwind_data.get_new_time_step_mask(times)) == [
+            True, True, False, True, False, False, True, True]
+        assert list(greenwind_data.get_new_time_step_mask(
+            times, last_time=3)) == [
+                False, False, False, False, False, False, True, True]
+
+    def test_get_partitions(self, tmp_path):
+        index = pd.date_range('2015-01-01', periods=12, freq='10min')
+        # Repeated time steps in the file of the first wind farm
+        df = pd.DataFrame({'wea_1_power_output': np.arange(12.0),
+                           'wea_2_power_output': np.ones(12),
+                           'wea_1_theoretical_power': np.ones(12) * 50},
+                          index=index)
+        df_duplicates = pd.concat([df.iloc[:8], df.iloc[5:7] * 100,
+                                   df.iloc[8:]])
+        df_duplicates.to_csv(str(tmp_path / 'WF1_2015.csv'))
+        df.to_csv(str(tmp_path / 'WF2_2015.csv'))
+        kwargs = {'partition_folder': str(tmp_path / 'partitions'),
+                  'datapath': str(tmp_path)}
+        filenames = ['WF1_2015.csv', 'WF2_2015.csv']
+        raw_df = greenwind_data.get_partitions(filenames, **kwargs)
+        assert len(raw_df) == 12
+        np.testing.assert_allclose(raw_df['wf_6_power_output'].values,
+                                   np.arange(12.0) + 1)
+        # Chunks smaller than the intervals
+        expected = df.resample('30min').mean()
+        resampled_df = greenwind_data.read_file(
+            'WF1_2015.csv', frequency='30min', datapath=str(tmp_path),
+            chunksize=4)
+        np.testing.assert_allclose(resampled_df.values, expected.values)
+        resampled_df = greenwind_data.get_partitions(
+            filenames, frequency='30min', **kwargs)
+        assert list(resampled_df) == [
+            'wf_6_wea_1_power_output', 'wf_6_wea_2_power_output',
+            'wf_6_wea_1_theoretical_power', 'wf_6_power_output',
+            'wf_7_wea_1_power_output', 'wf_7_wea_2_power_output',
+            'wf_7_wea_1_theoretical_power', 'wf_7_power_output']
+        np.testing.assert_allclose(
+            resampled_df['wf_7_power_output'].values,
+            expected[['wea_1_power_output', 'wea_2_power_output']].sum(
+                axis=1).values)
+
+    def test_get_turbine_power_output_columns(self):
+        columns = ['wf_6_wea_1_power_output', 'wf_6_wea_1_theoretical_power',
+                   'wf_6_wea_2_reactive_power', 'wf_6_installed_power',
+                   'wf_6_wea_2_power_output', 'wf_6_power_output',
+                   'wf_7_wea_1_power_output']
+        assert greenwind_data.get_turbine_power_output_columns(
+            columns, 'wf_6') == ['wf_6_wea_1_power_output',
+                                 'wf_6_wea_2_power_output']
+
+    def test_read_empty_file(self, tmp_path):
+        with open(str(tmp_path / 'WF1_2015.csv'), 'w') as file:
+            file.write(',wea_1_power_output\n')
+        open(str(tmp_path / 'WF2_2015.csv'), 'w').close()
+        for filename in ['WF1_2015.csv', 'WF2_2015.csv']:
+            for frequency in [None, '30min']:
+                df = greenwind_data.read_file(
+                    filename, frequency=frequency, datapath=str(tmp_path))
+                assert df.empty
+                assert str(df.index.tz) == 'UTC'
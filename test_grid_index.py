@@ -0,0 +1,23 @@
+import grid_index
+
+import numpy as np
+
+
+class TestGridIndex:
+
+    def test_get_grid_index(self, tmp_path):
+        filename = str(tmp_path / 'weather_df_MERRA_2015.p')
+        coordinates = np.array([[54.0, 8.0], [54.0, 8.5], [54.5, 8.0]])
+        grid = grid_index.get_grid_index(filename, coordinates=coordinates)
+        assert list(grid.query([[54.4, 8.1]])[1]) == [2]
+        # Loaded without check
+        grid = grid_index.get_grid_index(filename)
+        assert np.array_equal(grid.coordinates, coordinates)
+        # Weather data dumped again with another grid - index is rebuilt
+        new_coordinates = np.array([[54.0, 8.0], [54.5, 8.5]])
+        grid = grid_index.get_grid_index(filename,
+                                         coordinates=new_coordinates)
+        assert np.array_equal(grid.coordinates, new_coordinates)
+        assert list(grid.query([[54.4, 8.4]])[1]) == [1]
+        assert np.array_equal(grid_index.get_grid_index(
+            filename).coordinates, new_coordinates)
@@ -0,0 +1,134 @@
+import pytest
+
+# Skip if the windpowerlib version does not provide the wind farm modelchain
+# (the summarized power curve functions are part of the same version)
+try:
+    from windpowerlib.wind_farm_modelchain import WindFarmModelChain
+    from windpowerlib.wind_turbine import WindTurbine
+    from windpowerlib.wind_farm import WindFarm
+    import modelchain_usage
+except ImportError:
+    pytest.skip('windpowerlib with wind farm modelchain is not installed',
+                allow_module_level=True)
+
+from pandas.testing import assert_frame_equal, assert_series_equal
+import pandas as pd
+import numpy as np
+import os
+
+
+def get_wind_farms():
+    power_curve = pd.DataFrame({'wind_speed': np.arange(0., 26.),
+                                'power': np.append(np.clip(
+                                    (np.arange(0., 25.) - 3.) ** 3 * 2.e3,
+                                    0., 2.e6), 2.e6)})
+    turbine_a = WindTurbine(object_name='turbine_a', hub_height=100,
+                            rotor_diameter=80, nominal_power=2.e6,
+                            power_curve=power_curve)
+    turbine_b = WindTurbine(object_name='turbine_b', hub_height=65,
+                            rotor_diameter=70, nominal_power=1.e6,
+                            power_curve=power_curve * [1., 0.5])
+    return [
+        WindFarm(object_name='wf_1', coordinates=[54.6, 9.0],
+                 wind_turbine_fleet=[{'wind_turbine': turbine_a,
+                                      'number_of_turbines': 3}]),
+        WindFarm(object_name='wf_2', coordinates=[54.7, 9.1],
+                 wind_turbine_fleet=[{'wind_turbine': turbine_a,
+                                      'number_of_turbines': 1},
+                                     {'wind_turbine': turbine_b,
+                                      'number_of_turbines': 4}])]
+
+
+def get_weather_list(number_of_farms):
+    index = pd.date_range('2015-01-01', periods=48, freq='h', tz='UTC')
+    random_state = np.random.RandomState(0)
+    weather_list = []
+    for farm_number in range(number_of_farms):
+        weather = pd.DataFrame(
+            np.column_stack([
+                random_state.uniform(0., 20., len(index)),
+                random_state.uniform(0., 25., len(index)),
+                np.full(len(index), 0.05),
+                np.full(len(index), 283.),
+                np.full(len(index), 101300.)]),
+            index=index, columns=pd.MultiIndex.from_tuples(
+                [('wind_speed', 10), ('wind_speed', 80),
+                 ('roughness_length', 0), ('temperature', 2),
+                 ('pressure', 0)]))
+        weather_list.append(weather)
+    return weather_list
+
+
+class TestModelchainUsage:
+
+    def setup_method(self):
+        modelchain_usage._power_curve_cache.clear()
+
+    def test_calculate_approach_like_wind_farm_modelchain(self):
+        wind_farm = get_wind_farms()[1]
+        weather = get_weather_list(1)[0]
+        power_output = modelchain_usage.calculate_approach(
+            wind_farm, weather, 'constant_efficiency_90_%')
+        # Calculation of the approach before the power curves were cached
+        expected = WindFarmModelChain(
+            wind_farm, cluster=False, density_correction=False,
+            wake_losses_method='constant_efficiency', smoothing=False,
+            block_width=0.5,
+            standard_deviation_method='turbulence_intensity',
+            wind_farm_efficiency=0.9).run_model(weather).power_output
+        assert_series_equal(power_output, expected, check_names=False)
+
+    def test_summarized_power_curve_cache(self, monkeypatch, tmpdir):
+        calls = []
+        summarized_power_curve = (
+            modelchain_usage.power_output.summarized_power_curve)
+
+        def counted_summarized_power_curve(**kwargs):
+            calls.append(kwargs)
+            return summarized_power_curve(**kwargs)
+
+        monkeypatch.setattr(modelchain_usage.power_output,
+                            'summarized_power_curve',
+                            counted_summarized_power_curve)
+        wind_farm = get_wind_farms()[1]
+        weather = get_weather_list(1)[0]
+        first = modelchain_usage.calculate_approach(
+            wind_farm, weather, 'constant_efficiency_90_%',
+            power_curve_cache_folder=str(tmpdir))
+        # Second call is served by the in-memory cache
+        second = modelchain_usage.calculate_approach(
+            wind_farm, weather, 'constant_efficiency_90_%',
+            power_curve_cache_folder=str(tmpdir))
+        assert len(calls) == 1
+        assert len(os.listdir(str(tmpdir))) == 1
+        # Third call is served by the dump in the cache folder
+        modelchain_usage._power_curve_cache.clear()
+        third = modelchain_usage.calculate_approach(
+            wind_farm, weather, 'constant_efficiency_90_%',
+            power_curve_cache_folder=str(tmpdir))
+        assert len(calls) == 1
+        assert_series_equal(first, second)
+        assert_series_equal(first, third)
+        # Other parameters lead to a new power curve
+        modelchain_usage.calculate_approach(
+            wind_farm, weather, 'constant_efficiency_80_%',
+            power_curve_cache_folder=str(tmpdir))
+        assert len(calls) == 2
+
+    @pytest.mark.parametrize('threads', [False, True])
+    def test_calculate_approaches_processes(self, threads):
+        wind_farms = get_wind_farms()
+        weather_list = get_weather_list(len(wind_farms))
+        approaches = ['simple', 'constant_efficiency_90_%', 'smooth_wf']
+        sequential = modelchain_usage.calculate_approaches(
+            wind_farms, weather_list, approaches, processes=1)
+        parallel = modelchain_usage.calculate_approaches(
+            wind_farms, weather_list, approaches, processes=2,
+            threads=threads)
+        expected_columns = [
+            '{0}_calculated_{1}'.format(wind_farm.object_name, approach) for
+            wind_farm in wind_farms for approach in approaches]
+        assert [list(df)[0] for df in sequential] == expected_columns
+        assert [list(df)[0] for df in parallel] == expected_columns
+        for sequential_df, parallel_df in zip(sequential, parallel):
+            assert_frame_equal(sequential_df, parallel_df)
@@ -0,0 +1,78 @@
+import pytest
+
+xarray = pytest.importorskip('xarray')
+
+import read_of_weather_data
+import weather_store
+
+import os
+import pandas as pd
+import numpy as np
+
+
+class TestReadOfWeatherData:
+
+    def setup_class(self):
+        # Rotated grid: lat and lon depend on both dimensions
+        rlat, rlon = np.meshgrid(np.arange(4), np.arange(5), indexing='ij')
+        self.lat = 54.0 + 0.1 * rlat + 0.01 * rlon
+        self.lon = 8.5 + 0.1 * rlon
+        self.times = pd.date_range('2015-01-31 22:00', periods=6, freq='h')
+
+    def get_values(self, times):
+        hours = ((times - self.times[0]) / pd.Timedelta('1h')).values
+        return (hours[:, np.newaxis, np.newaxis] * 100 +
+                np.arange(20).reshape(4, 5)[np.newaxis])
+
+    def write_files(self, main_path, folder, name, factor=1):
+        path = main_path / folder
+        path.mkdir()
+        # Monthly files with a time step occurring in both files
+        for month, times in [('01', self.times[:3]), ('02', self.times[2:])]:
+            dataset = xarray.Dataset(
+                {name: (('time', 'rlat', 'rlon'),
+                        self.get_values(times) * factor)},
+                coords={'time': times, 'lat': (('rlat', 'rlon'), self.lat),
+                        'lon': (('rlat', 'rlon'), self.lon)})
+            dataset.to_netcdf(str(path / (
+                'oF_00625_MERRA2_expC17.{0}.2015{1}.nc'.format(
+                    name, month))))
+
+    def test_get_of_weather_data_from_netcdf(self, tmp_path):
+        for folder, name, factor in [('WSS_zlevel', 'WSS_10M', 1),
+                                     ('T_zlevel', 'T_10M', 2),
+                                     ('P_zlevel', 'P_10M', 3),
+                                     ('Z0', 'Z0', 4)]:
+            self.write_files(tmp_path, folder, name, factor=factor)
+        filename = str(tmp_path / 'weather_df_open_FRED_2015.p')
+        # Temperature, pressure and roughness length are needed
+        with pytest.raises(ValueError):
+            read_of_weather_data.get_of_weather_data_from_netcdf(
+                2015, 54.05, 54.25, 8.5, 8.75, ['wss_10m'], filename,
+                main_path=str(tmp_path))
+        read_of_weather_data.get_of_weather_data_from_netcdf(
+            2015, 54.05, 54.25, 8.5, 8.75,
+            ['wss_10m', 'temp_10m', 'pressure_10m', 'z0'], filename,
+            coordinates_list=[[54.2, 8.7], [54.21, 8.71], [54.1, 8.6]],
+            main_path=str(tmp_path), processes=2, chunk_size=2)
+        folder = weather_store.get_store_folder(filename)
+        coordinates = weather_store.load_coordinates(folder)
+        np.testing.assert_allclose(coordinates, [[54.11, 8.6], [54.22, 8.7]])
+        weather_dfs = weather_store.read_weather_store(folder, [0, 1])
+        assert sorted(weather_dfs[0]) == [
+            ('pressure', 10), ('roughness_length', 0), ('temperature', 10),
+            ('wind_speed', 10)]
+        assert (weather_dfs[0].index.tz_localize(None) ==
+                self.times).all()
+        # Cells (1, 1) and (2, 2) of the grid
+        np.testing.assert_allclose(
+            weather_dfs[1][('wind_speed', 10)].values,
+            self.get_values(self.times)[:, 2, 2])
+        np.testing.assert_allclose(
+            weather_dfs[0][('wind_speed', 10)].values,
+            self.get_values(self.times)[:, 1, 1])
+        assert os.path.exists(str(tmp_path /
+                                  'weather_df_open_FRED_2015_grid_index.p'))
+        np.testing.assert_allclose(
+            weather_dfs[0][('roughness_length', 0)].values,
+            self.get_values(self.times)[:, 1, 1] * 4)
@@ -0,0 +1,113 @@
+import result_cache
+
+import pandas as pd
+import numpy as np
+import pytest
+import os
+from collections import OrderedDict
+
+
+class TestResultCache:
+
+    def test_get_hash(self):
+        df = pd.DataFrame({'a': [1.0, 2.0]})
+        assert (result_cache.get_hash('simple', {'b': 2, 'a': [1]}, df) ==
+                result_cache.get_hash('simple', {'a': [1], 'b': 2},
+                                      df.copy()))
+        assert (result_cache.get_hash(df) !=
+                result_cache.get_hash(df.rename(columns={'a': 'b'})))
+        assert (result_cache.get_hash(np.array([1.0, 2.0])) !=
+                result_cache.get_hash(np.array([1.0, 2.5])))
+        assert result_cache.get_hash([1, 2]) != result_cache.get_hash((1, 2))
+
+    def test_get(self, tmp_path):
+        cache = result_cache.ResultCache(str(tmp_path / 'cache'))
+        index = pd.date_range('2015-12-31 23:00', periods=4, freq='60min',
+                              tz='Europe/Berlin')
+        df = pd.DataFrame({'wf_1_measured': [1.0, 2.0, np.nan, 4.0],
+                           'wf_1_calculated_simple': [1.5, 2.5, 3.5, 4.5]},
+                          index=index)
+        calls = []
+
+        def calculate():
+            calls.append(1)
+            return df
+
+        key = cache.get_key('time_series', 'MERRA', 2015)
+        assert key != cache.get_key('time_series', 'MERRA', 2016)
+        assert not cache.contains(key)
+        assert cache.get(key, calculate).equals(df)
+        assert cache.contains(key)
+        # Loaded from the cache - only selected columns
+        loaded_df = cache.get(key, calculate, columns=['wf_1_measured'])
+        assert len(calls) == 1
+        assert loaded_df.equals(df[['wf_1_measured']])
+        assert cache.get_columns(key) == list(df)
+        # Other results are pickled
+        other_key = cache.get_key('validation_objects', key)
+        cache.get(other_key, lambda: {None: {'hourly': [1, 2]}})
+        assert cache.load(other_key) == {None: {'hourly': [1, 2]}}
+        # Data frames with object columns can not be stored - pickled
+        object_df = df.assign(wf_1_name='wf_1')
+        object_key = cache.get_key('time_series', 'open_FRED', 2015)
+        assert cache.get(object_key, lambda: object_df).equals(object_df)
+        assert cache.load(object_key).equals(object_df)
+        assert cache.get_columns(object_key) == list(object_df)
+        assert cache.load(object_key, columns=['wf_1_name']).equals(
+            object_df[['wf_1_name']])
+
+    def test_disabled(self, tmp_path):
+        cache = result_cache.ResultCache(str(tmp_path / 'cache'),
+                                         enabled=False)
+        key = cache.get_key('wind_farm_data', 2015)
+        assert cache.get(key, lambda: [1]) == [1]
+        assert not cache.contains(key)
+
+    def test_interrupted_dump(self, tmp_path, monkeypatch):
+        cache = result_cache.ResultCache(str(tmp_path / 'cache'))
+        key = cache.get_key('validation_objects', 2015)
+
+        def fail(entry, file):
+            file.write(b'partial')
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(result_cache.pickle, 'dump', fail)
+        with pytest.raises(KeyboardInterrupt):
+            cache.dump(key, [1])
+        assert not cache.contains(key)
+        assert os.listdir(cache.folder) == []
+
+    def test_get_results(self, tmp_path):
+        cache = result_cache.ResultCache(str(tmp_path / 'cache'))
+        index = pd.date_range('2016-01-01', periods=3, freq='60min',
+                              tz='Europe/Berlin')
+        calls = []
+
+        def calculate_power_output(column_names):
+            calls.append(column_names)
+            return {column_name: (
+                None if 'linear_interpolation' in column_name else
+                pd.DataFrame({column_name: [1.0, 2.0, 3.0]}, index=index))
+                for column_name in column_names}
+
+        keys = OrderedDict(
+            (column_name, cache.get_key('simulation', column_name)) for
+            column_name in ['wf_1_calculated_simple',
+                            'wf_1_calculated_linear_interpolation'])
+        results = cache.get_results(keys, calculate_power_output)
+        assert list(results) == list(keys)
+        assert results['wf_1_calculated_linear_interpolation'] is None
+        # Approach enabled again - only its time series is calculated
+        keys['wf_1_calculated_smooth_wf'] = cache.get_key(
+            'simulation', 'wf_1_calculated_smooth_wf')
+        results = cache.get_results(keys, calculate_power_output)
+        assert calls == [list(keys)[:2], ['wf_1_calculated_smooth_wf']]
+        assert list(results) == list(keys)
+        assert results['wf_1_calculated_simple'].equals(
+            results['wf_1_calculated_smooth_wf'].rename(
+                columns={'wf_1_calculated_smooth_wf':
+                         'wf_1_calculated_simple'}))
+        assert results['wf_1_calculated_linear_interpolation'] is None
+        # Everything cached
+        cache.get_results(keys, calculate_power_output)
+        assert len(calls) == 2
@@ -0,0 +1,58 @@
+import pytest
+import pandas as pd
+import numpy as np
+import storage
+import pickle
+import os
+
+
+class TestStorage:
+    def test_dump_and_read_frame(self, tmp_path):
+        index = pd.date_range('2015-12-31 20:00', periods=48, freq='30min',
+                              tz='Europe/Berlin')
+        df = pd.DataFrame({'wf_1_measured': np.arange(48.),
+                           'wf_2_measured': np.arange(48.) * 2},
+                          index=index)
+        folder = str(tmp_path / 'store')
+        storage.dump_frame(df, folder)
+        assert storage.read_frame(folder).equals(df)
+        df_read = storage.read_frame(
+            folder, columns=['wf_2_measured'], start='2016-01-01 00:00',
+            end='2016-01-01 01:00')
+        assert list(df_read) == ['wf_2_measured']
+        assert df_read['wf_2_measured'].tolist() == [16., 18., 20.]
+
+    def test_load_frame(self, tmp_path):
+        index = pd.date_range('2016-01-01', periods=4, freq='15min',
+                              tz='Europe/Berlin')
+        df = pd.DataFrame({'wf_9_measured': np.arange(4.),
+                           'wf_10_measured': np.arange(4.) * 3},
+                          index=index)
+        filename = str(tmp_path / 'enertrag_data_2016.p')
+        # Pickle dump of an earlier run - the store is created from it
+        with open(filename, 'wb') as file:
+            pickle.dump(df, file)
+        assert storage.load_frame(filename).equals(df)
+        assert storage.exists(storage.get_storage_folder(filename))
+        os.remove(filename)
+        assert storage.load_frame(filename, columns=['wf_9_measured']).equals(
+            df[['wf_9_measured']])
+
+    def test_dump_frame_object_columns(self, tmp_path):
+        index = pd.date_range('2016-01-01', periods=3, freq='h', tz='UTC')
+        df = pd.DataFrame({'wf_1_measured': np.arange(3.),
+                           'wf_1_name': ['a', 'b', 'c']}, index=index)
+        assert not storage.is_storable(df)
+        with pytest.raises(TypeError):
+            storage.dump_frame(df, str(tmp_path / 'store'))
+        assert storage.is_storable(df[['wf_1_measured']])
+
+    def test_read_frame_frequency(self, tmp_path):
+        folder = str(tmp_path / 'store')
+        for periods in [1, 2, 3]:
+            index = pd.date_range('2016-01-01', periods=periods, freq='15min',
+                                  tz='Europe/Berlin')
+            df = pd.DataFrame({'wf_1_measured': np.arange(float(periods))},
+                              index=index)
+            storage.dump_frame(df, folder)
+            assert storage.read_frame(folder).index.freq == index.freq
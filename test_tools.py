@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+import pickle
+import os
+import tools
+import weather_store
+
+
+class TestTools:
+    def test_align_missing_data(self):
+        time_series_df = pd.DataFrame(
+            {'wf_1_measured': [1., np.nan, 3., 4.],
+             'wf_1_calculated_simple': [1., 2., np.nan, 4.],
+             'wf_10_measured': [np.nan, 1., 1., 1.]})
+        aligned_df, availability_df = tools.align_missing_data(
+            time_series_df, ['wf_1', 'wf_10'])
+        assert aligned_df['wf_1_measured'].isnull().tolist() == [
+            False, True, True, False]
+        assert aligned_df['wf_1_calculated_simple'].isnull().tolist() == [
+            False, True, True, False]
+        # Columns of 'wf_10' are not affected by the mask of 'wf_1'
+        assert aligned_df['wf_10_measured'].isnull().sum() == 1
+        assert availability_df.loc['wf_1', 'available'] == 2
+        assert availability_df.loc['wf_10', 'availability [%]'] == 75.0
+
+    def test_get_time_filter_masks(self):
+        index = pd.date_range('2016-05-27', periods=96, freq='h')
+        masks = tools.get_time_filter_masks(
+            index, [None, (8, 16), (22, 4)], weekdays=[0, 1, 2, 3, 4])
+        # Friday to Monday
+        assert masks[None].sum() == 48
+        assert masks[(8, 16)].sum() == 18
+        assert masks[(22, 4)].sum() == 14
+
+    def test_filter_interpolated_data(self):
+        series = pd.Series(np.sin(np.arange(40.)),
+                           index=pd.date_range('2016-01-01', periods=40,
+                                               freq='min'))
+        series[10:25] = np.linspace(1., 3., 15)
+        corrected_series, gaps = tools.filter_interpolated_data(
+            series, return_gaps=True)
+        # Second differences are zero from the third interpolated value on
+        assert corrected_series.isnull().sum() == 13
+        assert gaps['length'].tolist() == [13]
+        assert gaps['start'][0] == series.index[12]
+
+    def test_get_changed_files(self, tmp_path):
+        paths = [str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv')]
+        for path in paths:
+            with open(path, 'w') as file:
+                file.write('1;2\n')
+        changed_paths, manifest = tools.get_changed_files(paths, {})
+        assert changed_paths == paths
+        with open(paths[1], 'w') as file:
+            file.write('1;3\n')
+        changed_paths, manifest = tools.get_changed_files(paths, manifest)
+        assert changed_paths == [paths[1]]
+
+    def test_get_weather_data_of_farms(self, tmp_path):
+        times = pd.date_range('2015-01-01', periods=6, freq='h', tz='UTC')
+        index = pd.MultiIndex.from_product(
+            [times, [54.0, 54.5], [8.0, 8.5]], names=['time', 'lat', 'lon'])
+        columns = pd.MultiIndex.from_tuples(
+            [('wind_speed', 50), ('roughness_length', 0), ('temperature', 2)])
+        weather_df = pd.DataFrame(
+            np.arange(len(index) * 3, dtype=float).reshape(-1, 3),
+            index=index, columns=columns).sample(frac=1, random_state=0)
+        filename = str(tmp_path / 'weather_df_MERRA_2015.p')
+        with open(filename, 'wb') as file:
+            pickle.dump(weather_df, file)
+        coordinates_list = [[54.1, 8.1], [54.0, 8.05], [54.4, 8.4]]
+        expected_dfs = []
+        for lat, lon in [(54.0, 8.0), (54.0, 8.0), (54.5, 8.5)]:
+            expected_df = weather_df.xs((lat, lon), level=[1, 2]).sort_index()
+            expected_df.index = expected_df.index.tz_convert('Europe/Berlin')
+            expected_df.index.freq = 'h'
+            expected_dfs.append(expected_df)
+        # First call: pickle dump is loaded and the weather store created,
+        # second call: data is read from the store
+        for call in range(2):
+            weather_dfs = tools.get_weather_data_of_farms(
+                'MERRA', coordinates_list, pickle_load=True,
+                filename=filename)
+            assert os.path.exists(weather_store.get_store_folder(filename))
+            for weather, expected_df in zip(weather_dfs, expected_dfs):
+                # The weather store keeps time stamps in nanoseconds
+                pd.testing.assert_frame_equal(weather, expected_df,
+                                              check_names=False,
+                                              check_index_type=False)
+                assert weather.index.freq == 'h'
+            # Locations with the same grid point get their own data frames
+            assert weather_dfs[0] is not weather_dfs[1]
+            weather_dfs[0].index = weather_dfs[0].index.tz_convert('UTC')
+            weather_dfs[0][('wind_speed', 50)] = 0.
+            pd.testing.assert_frame_equal(weather_dfs[1], expected_dfs[1],
+                                          check_names=False,
+                                          check_index_type=False)
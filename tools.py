@@ -5,14 +5,19 @@ from windpowerlib import (power_output, wind_speed, density, temperature)
 # Imports from lib_validation
 from merra_weather_data import get_merra_data
 from open_fred_weather_data import get_open_fred_data
+import weather_store
+import grid_index
 import matplotlib.pyplot as plt
 
 # Other imports
 import pandas as pd
-from scipy.spatial import cKDTree
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import multiprocessing
+import hashlib
 import pickle
 import os
+from collections import OrderedDict
 
 
 def get_weather_data(weather_data_name, coordinates, pickle_load=False,
@@ -21,6 +26,9 @@ def get_weather_data(weather_data_name, coordinates, pickle_load=False,
     r"""
     Gets MERRA-2 or open_FRED weather data for the specified coordinates.
 
+    See :py:func:`~.get_weather_data_of_farms` for loading the weather data
+    of several locations at once.
+
     Parameters
     ----------
     weather_data_name : String
@@ -46,38 +54,116 @@ def get_weather_data(weather_data_name, coordinates, pickle_load=False,
         wind speed as columns.
 
     """
-    if pickle_load:
-        data_frame = pickle.load(open(filename, 'rb'))
+    return get_weather_data_of_farms(
+        weather_data_name, [coordinates], pickle_load=pickle_load,
+        filename=filename, year=year,
+        temperature_heights=temperature_heights)[0]
+
+
+def get_weather_data_of_farms(weather_data_name, coordinates_list,
+                              pickle_load=False, filename='pickle_dump.p',
+                              year=None, temperature_heights=None):
+    r"""
+    Gets MERRA-2 or open_FRED weather data for several locations at once.
+
+    The weather data set is loaded only once and the closest grid points of
+    all locations are found by one nearest neighbour query of the grid index
+    (see :py:mod:`~.grid_index`) that is dumped next to `filename`. If a
+    weather store (see :py:mod:`~.weather_store`) exists next to the pickle
+    dump `filename` and `pickle_load` is True, only the time series of the
+    closest grid points are read from the store. Otherwise the pickle dump is
+    loaded (and the weather store is created for subsequent calls) and the
+    data frame is sorted once by grid point, so that the weather data frame of
+    each location is a view on a contiguous block of this data frame.
+
+    The weather data of a grid point is only read or selected once, but each
+    location gets its own copy of it, so changes to the weather data frame of
+    one location do not affect the others.
+
+    Parameters
+    ----------
+    weather_data_name : String
+        String specifying if open_FRED or MERRA data is retrieved in case
+        `pickle_load` is False.
+    coordinates_list : List
+        Contains coordinates [lat, lon] of the locations for loading data.
+    pickle_load : Boolean
+        True if data has already been dumped before. Default: False.
+    filename : String
+        Name (including path) of file to load data from or if MERRA data is
+        retrieved function 'create_merra_df' is used. Default: 'pickle_dump.p'.
+    year : int
+        Specifies which year the weather data is retrieved for. Default: None.
+    temperature_heights : List
+        Contains heights for which the temperature of the MERRA-2 data shall be
+        calculated. Default: None (as not needed for open_FRED data).
+
+    Returns
+    -------
+    List
+        Contains one weather data frame (pandas.DataFrame) with datetime index
+        and data like temperature and wind speed as columns for each location
+        in `coordinates_list`.
+
+    """
+    store_folder = weather_store.get_store_folder(filename)
+    if (pickle_load and os.path.exists(store_folder)):
+        # Find closest grid points of all locations
+        grid = grid_index.get_grid_index(
+            filename, coordinates=weather_store.load_coordinates(store_folder))
+        dists, cells = grid.query(coordinates_list)
+        # Read only the time series of the closest grid points from the store
+        unique_cells, positions = np.unique(cells, return_inverse=True)
+        weather_dfs = weather_store.read_weather_store(store_folder,
+                                                       unique_cells)
     else:
-        if weather_data_name == 'MERRA':
-            data_frame = get_merra_data(
-                year, heights=temperature_heights,
-                filename=filename, pickle_load=pickle_load)
-        if weather_data_name == 'open_FRED':
-            fred_path = os.path.join(
-                os.path.dirname(__file__), 'data/open_FRED',
-                'fred_data_{0}_sh.csv'.format(year))
-            data_frame = get_open_fred_data(
-                year, filename=fred_path, pickle_filename=filename)
-        pickle.dump(data_frame, open(filename, 'rb'))
-    # Find closest coordinates to weather data point and create weather_df
-    closest_coordinates = get_closest_coordinates(data_frame, coordinates)
-    data_frame = data_frame
-    data_frame.sortlevel(inplace=True)
-    # Select coordinates from data frame
-    weather_df = data_frame.loc[(slice(None),
-                                 [closest_coordinates['lat']],
-                                 [closest_coordinates['lon']]),:].reset_index(
-                                level=[1,2], drop=True)
-    if weather_data_name == 'open_FRED':
-        # Localize open_FRED data index
-        weather_df.index = weather_df.index.tz_localize('UTC')
-    # Add frequency attribute
-    freq = pd.infer_freq(weather_df.index)
-    weather_df.index.freq = pd.tseries.frequencies.to_offset(freq)
-    # Convert index to local time zone
-    weather_df.index = weather_df.index.tz_convert('Europe/Berlin')
-    return weather_df
+        if pickle_load:
+            with open(filename, 'rb') as file:
+                data_frame = pickle.load(file)
+            # Create weather store for subsequent calls
+            weather_store.dump_weather_store(data_frame, store_folder)
+        else:
+            # Pickle dump and weather store are created by the functions
+            if weather_data_name == 'MERRA':
+                data_frame = get_merra_data(
+                    year, heights=temperature_heights,
+                    filename=filename, pickle_load=pickle_load)
+            if weather_data_name == 'open_FRED':
+                fred_path = os.path.join(
+                    os.path.dirname(__file__), 'data/open_FRED',
+                    'fred_data_{0}_sh.csv'.format(year))
+                data_frame = get_open_fred_data(
+                    filename=fred_path, pickle_filename=filename)
+        # Sort by grid point (lat, lon) and time so that the data of each grid
+        # point is a contiguous block of rows
+        data_frame = data_frame.reorder_levels([1, 2, 0]).sort_index()
+        lat = data_frame.index.get_level_values(0).values
+        lon = data_frame.index.get_level_values(1).values
+        block_starts = np.flatnonzero(np.concatenate((
+            [True], (lat[1:] != lat[:-1]) | (lon[1:] != lon[:-1]))))
+        block_ends = np.append(block_starts[1:], len(data_frame))
+        # Find closest grid points of all locations - the grid points are
+        # sorted like the blocks
+        grid = grid_index.get_grid_index(filename, coordinates=np.array(
+            [lat[block_starts], lon[block_starts]]).transpose())
+        dists, blocks = grid.query(coordinates_list)
+        unique_blocks, positions = np.unique(blocks, return_inverse=True)
+        weather_dfs = []
+        for block in unique_blocks:
+            weather_df = data_frame.iloc[block_starts[block]:
+                                         block_ends[block]]
+            weather_df.index = weather_df.index.get_level_values(2)
+            if weather_data_name == 'open_FRED':
+                # Localize open_FRED data index
+                weather_df.index = weather_df.index.tz_localize('UTC')
+            weather_dfs.append(weather_df)
+    for weather_df in weather_dfs:
+        # Add frequency attribute
+        freq = pd.infer_freq(weather_df.index)
+        weather_df.index.freq = pd.tseries.frequencies.to_offset(freq)
+        # Convert index to local time zone
+        weather_df.index = weather_df.index.tz_convert('Europe/Berlin')
+    return [weather_dfs[position].copy() for position in positions]
 
 
 def return_unique_pairs(df, column_names):
@@ -93,20 +179,33 @@ def return_unique_pairs(df, column_names):
     return df.groupby(column_names).size().reset_index().drop([0], axis=1)
 
 
-def get_closest_coordinates(df, coordinates, column_names=['lat', 'lon']):
+def get_closest_coordinates(df, coordinates, column_names=['lat', 'lon'],
+                            grid=None):
     r"""
     Finds the coordinates of a data frame that are closest to `coordinates`.
 
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Weather data with MultiIndex (time, lat, lon) as index.
+    coordinates : List
+        Coordinates [lat, lon] of location.
+    column_names : List
+        Names of the latitude and longitude. Default: ['lat', 'lon'].
+    grid : GridIndex, optional
+        Grid index of `df` (see :py:func:`~.grid_index.get_grid_index`). If
+        None, the grid index is created from `df`. Default: None.
+
     Returns
     -------
     pd.Series
         Contains closest coordinates with `column_names`as indices.
 
     """
-    coordinates_df = return_unique_pairs(df, column_names)
-    tree = cKDTree(coordinates_df)
-    dists, index = tree.query(np.array(coordinates), k=1)
-    return coordinates_df.iloc[index]
+    if grid is None:
+        grid = grid_index.GridIndex(grid_index.get_grid_coordinates(df))
+    dists, positions = grid.query(coordinates)
+    return pd.Series(grid.coordinates[positions[0]], index=column_names)
 
 
 def power_output_simple(wind_turbine_fleet, weather_df, data_height):
@@ -142,17 +241,19 @@ def power_output_simple(wind_turbine_fleet, weather_df, data_height):
         Simulated power output of wind farm.
 
     """
+    turbine_power_outputs = []
     for turbine_type in wind_turbine_fleet:
         wind_speed_hub = wind_speed.logarithmic_profile(
             weather_df.wind_speed, data_height['wind_speed'],
             turbine_type['wind_turbine'].hub_height,
             weather_df.roughness_length, obstacle_height=0.0)
-        turbine_type['wind_turbine'].power_output = (
+        turbine_power_outputs.append(
             power_output.power_curve(
                 wind_speed_hub,
                 turbine_type['wind_turbine'].power_curve['wind_speed'],
                 turbine_type['wind_turbine'].power_curve['power']))
-    return power_output_simple_aggregation(wind_turbine_fleet)
+    return power_output_simple_aggregation(wind_turbine_fleet,
+                                           turbine_power_outputs)
 
 
 def power_output_density_corr(wind_turbine_fleet, weather_df, data_height):
@@ -183,6 +284,7 @@ def power_output_density_corr(wind_turbine_fleet, weather_df, data_height):
         Simulated power output of wind farm.
 
     """
+    turbine_power_outputs = []
     for turbine_type in wind_turbine_fleet:
         wind_speed_hub = wind_speed.logarithmic_profile(
             weather_df.wind_speed, data_height['wind_speed'],
@@ -194,17 +296,18 @@ def power_output_density_corr(wind_turbine_fleet, weather_df, data_height):
         density_hub = density.ideal_gas(
             weather_df.pressure, data_height['pressure'],
             turbine_type['wind_turbine'].hub_height, temperature_hub)
-        turbine_type['wind_turbine'].power_output = (
+        turbine_power_outputs.append(
             power_output.power_curve_density_correction(
                 wind_speed_hub,
                 turbine_type['wind_turbine'].power_curve['wind_speed'],
                 turbine_type['wind_turbine'].power_curve['power'],
                 density_hub))
-    return power_output_simple_aggregation(wind_turbine_fleet, weather_df,
-                                           data_height)
+    return power_output_simple_aggregation(wind_turbine_fleet,
+                                           turbine_power_outputs)
 
 
-def power_output_simple_aggregation(wind_turbine_fleet):
+def power_output_simple_aggregation(wind_turbine_fleet,
+                                    turbine_power_outputs):
     r"""
     Calulate power output of wind farm by simple aggregation.
 
@@ -214,11 +317,20 @@ def power_output_simple_aggregation(wind_turbine_fleet):
         Wind turbines of wind farm. Dictionaries must have 'wind_turbine'
         (contains wind turbine object) and 'number_of_turbines' (number of
         turbine type in wind farm) as keys.
+    turbine_power_outputs : List
+        Contains the power output (pd.Series) of one turbine of each turbine
+        type in the order of `wind_turbine_fleet`.
+
+    Returns
+    -------
+    pd.Series
+        Simulated power output of wind farm.
 
     """
     farm_power_output = 0
-    for turbine_type in wind_turbine_fleet:
-        farm_power_output += (turbine_type['wind_turbine'].power_output *
+    for turbine_type, turbine_power_output in zip(wind_turbine_fleet,
+                                                  turbine_power_outputs):
+        farm_power_output += (turbine_power_output *
                               turbine_type['number_of_turbines'])
     return farm_power_output
 
@@ -411,6 +523,120 @@ def get_indices_for_series(temporal_resolution, time_zone, year=None,
                           tz=time_zone, closed='left'))
 
 
+def align_missing_data(time_series_df, wind_farm_names):
+    r"""
+    Sets all time series of a wind farm to nan where one of them is nan.
+
+    One missing-data mask is built per wind farm from all its columns
+    (measured and calculated) and applied to these columns at once.
+
+    Parameters
+    ----------
+    time_series_df : pd.DataFrame
+        Measured and calculated time series. Column names start with the name
+        of the wind farm, for example: 'wf_1_measured',
+        'wf_1_calculated_simple'.
+    wind_farm_names : List
+        Names of the wind farms, for example: ['wf_1', 'wf_3'].
+
+    Returns
+    -------
+    time_series_df : pd.DataFrame
+        `time_series_df` with aligned nan values (changed in place).
+    availability_df : pd.DataFrame
+        Number of time steps ('time_steps'), number of time steps with data of
+        all time series ('available') and the share of available time steps in
+        % ('availability [%]') with the wind farm names as index.
+
+    """
+    availability = {}
+    for wf_name in wind_farm_names:
+        column_names = [column_name for column_name in list(time_series_df)
+                        if column_name.startswith('{0}_'.format(wf_name))]
+        if not column_names:
+            continue
+        missing = np.isnan(time_series_df[column_names].values).any(axis=1)
+        time_series_df.loc[missing, column_names] = np.nan
+        available = len(missing) - np.count_nonzero(missing)
+        availability[wf_name] = {
+            'time_steps': len(missing), 'available': available,
+            'availability [%]': available / len(missing) * 100}
+    availability_df = pd.DataFrame(availability).transpose()
+    return time_series_df, availability_df
+
+
+def get_time_of_day_mask(index, time_period):
+    r"""
+    Returns a mask of the time steps lying in a time period of the day.
+
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+        Time steps.
+    time_period : Tuple (Int, Int)
+        Indicates time period for selection. Format (h, h) example (9, 12) will
+        select all time steps whose time lies between 9 and 12 o'clock. Time
+        periods over midnight like (22, 4) are possible.
+
+    Returns
+    -------
+    np.array
+        Boolean mask with True for the time steps in `time_period`.
+
+    """
+    hours = np.asarray(index.hour)
+    if time_period[0] <= time_period[1]:
+        return (time_period[0] <= hours) & (hours <= time_period[1])
+    return (time_period[0] <= hours) | (hours <= time_period[1])
+
+
+def get_time_filter_masks(index, time_periods=None, weekdays=None,
+                          months=None):
+    r"""
+    Returns masks of the time steps to be observed for several times of day.
+
+    The masks are calculated once for an index and can be used for all time
+    series with this index instead of selecting time steps from each series.
+
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+        Time steps.
+    time_periods : List, optional
+        Contains time periods of the day (see
+        :py:func:`~.get_time_of_day_mask`) or None for the whole day. Default:
+        None (whole day only).
+    weekdays : List, optional
+        Weekdays (0: Monday, ..., 6: Sunday) to be observed. If None all
+        weekdays are observed. Default: None.
+    months : List, optional
+        Months (1 - 12) to be observed. If None all months are observed.
+        Default: None.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Boolean masks (np.array) with the time periods in `time_periods` as
+        keys.
+
+    """
+    if time_periods is None:
+        time_periods = [None]
+    calendar_mask = np.ones(len(index), dtype=bool)
+    if weekdays is not None:
+        calendar_mask &= np.isin(np.asarray(index.weekday), weekdays)
+    if months is not None:
+        calendar_mask &= np.isin(np.asarray(index.month), months)
+    masks = OrderedDict()
+    for time_period in time_periods:
+        if time_period is None:
+            masks[time_period] = calendar_mask
+        else:
+            masks[time_period] = calendar_mask & get_time_of_day_mask(
+                index, time_period)
+    return masks
+
+
 def select_certain_time_steps(series, time_period):
     r"""
     Selects certain time steps from series by a specified time period.
@@ -427,8 +653,7 @@ def select_certain_time_steps(series, time_period):
     # Save frequency attribute of `series`
     freq = series.index.freq
     # freq = pd.infer_freq(series.index)
-    selected_series = series[(time_period[0] <= series.index.hour) &
-                             (series.index.hour <= time_period[1])]
+    selected_series = series[get_time_of_day_mask(series.index, time_period)]
     selected_series.index.freq = pd.tseries.frequencies.to_offset(freq)
     return selected_series
 
@@ -504,40 +729,267 @@ def summarize_output_of_farms(farm_list):
     return wind_farm_sum
 
 
+def get_interpolation_mask(values, window_size=10, tolerance=0.0011):
+    r"""
+    Flags linearly interpolated time steps.
+
+    The sum of the second differences of `values` over `window_size` time
+    steps is calculated for all windows at once (strided view of the
+    differences). If it is within `tolerance` the data of the window is
+    assumed to be interpolated, unless all values of the window are negative.
+
+    Parameters
+    ----------
+    values : np.array
+        Time series values.
+    window_size : Integer
+        Number of time steps of a window. Default: 10.
+    tolerance : Float
+        Tolerance of the sum of the second differences. Default: 0.0011.
+
+    Returns
+    -------
+    np.array
+        Boolean mask with True for the time steps of interpolated windows.
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mask = np.zeros(len(values), dtype=bool)
+    if len(values) < window_size + 2:
+        return mask
+    second_differences = np.full(len(values), np.nan)
+    second_differences[2:] = np.diff(values, n=2)
+    # Windows containing nan values (like the first two time steps) are not
+    # taken into account
+    gradient_sums = sliding_window_view(second_differences,
+                                        window_size).sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        all_negative = sliding_window_view(values < 0,
+                                           window_size).all(axis=1)
+        flagged = (np.abs(gradient_sums) <= tolerance) & ~all_negative
+    # Mark all time steps covered by a flagged window
+    window_starts = np.flatnonzero(flagged)
+    coverage = np.zeros(len(values) + 1, dtype=np.int64)
+    np.add.at(coverage, window_starts, 1)
+    np.add.at(coverage, window_starts + window_size, -1)
+    return np.cumsum(coverage[:-1]) > 0
+
+
+def get_runs(mask, index):
+    r"""
+    Returns the runs of consecutive True values of a mask as a table.
+
+    Parameters
+    ----------
+    mask : np.array
+        Boolean mask.
+    index : pd.Index
+        Index belonging to `mask`.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per run with the columns 'start' and 'end' (first and last
+        index entry of the run) and 'length' (number of time steps).
+
+    """
+    changes = np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8),
+                                      [0])))
+    starts = np.flatnonzero(changes == 1)
+    ends = np.flatnonzero(changes == -1)
+    return pd.DataFrame({'start': index[starts], 'end': index[ends - 1],
+                         'length': ends - starts},
+                        columns=['start', 'end', 'length'])
+
+
 def filter_interpolated_data(series, window_size=10, tolerance=0.0011,
-                             replacement_character=np.nan, plot=False):
+                             replacement_character=np.nan, plot=False,
+                             return_gaps=False):
     """
+    Sets linearly interpolated values of a series to `replacement_character`.
+
+    See :py:func:`~.get_interpolation_mask` for the detection of interpolated
+    values.
 
     Parameters
     ----------
     series : pd.Series
     replacement_character : Integer, Float or np.nan
+    return_gaps : Boolean
+        If True the removed gaps are returned, too. Default: False.
 
     Returns
     -------
-    corrected_df : pd.DataFrame
-        Corrected data frame with interpolated values set to
+    corrected_series : pd.Series
+        Corrected series with interpolated values set to
         `replacement_character`.
+    gaps : pd.DataFrame
+        Only returned if `return_gaps` is True. Removed gaps. See
+        :py:func:`~.get_runs`.
 
     """
+    mask = get_interpolation_mask(series.values, window_size=window_size,
+                                  tolerance=tolerance)
     data_corrected = series.copy()
-    # calculate the sum of the gradient of the feed-in data over |window_size| time
-    # steps, if it is about zero over the whole time window the data is assumed to
-    # be interpolated
-    data_gradient_sum = series.diff().diff().rolling(
-        window=window_size, min_periods=window_size).sum()
-    for i, v in data_gradient_sum.iteritems():
-        # if the sum of the gradient is within the set tolerance and
-        if abs(v) <= tolerance:
-            if not (series[i - window_size + 1:i + 1] < 0).all():
-                data_corrected[i - window_size + 1:i + 1] = replacement_character
+    data_corrected[mask] = replacement_character
     if plot:
         series.plot()
         data_corrected.plot()
         plt.show()
+    if return_gaps:
+        return data_corrected, get_runs(mask, series.index)
     return data_corrected
 
 
+def _filter_interpolated_column(series, kwargs):
+    return filter_interpolated_data(series, return_gaps=True, **kwargs)
+
+
+def filter_interpolated_data_frame(df, column_names=None, processes=1,
+                                   **kwargs):
+    r"""
+    Filters interpolated values of several columns of a data frame.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Time series (columns).
+    column_names : List, optional
+        Columns to be filtered. If None all columns are filtered. Default:
+        None.
+    processes : Integer
+        Number of worker processes the columns are distributed to. If 1 the
+        columns are filtered in the current process. Default: 1.
+    kwargs :
+        Parameters of :py:func:`~.filter_interpolated_data` like
+        `window_size`, `tolerance` and `replacement_character`.
+
+    Returns
+    -------
+    corrected_df : pd.DataFrame
+        Copy of `df` with interpolated values of the filtered columns set to
+        `replacement_character`.
+    gaps : pd.DataFrame
+        Removed gaps of all filtered columns (see :py:func:`~.get_runs`) with
+        the additional column 'column_name'.
+
+    """
+    if column_names is None:
+        column_names = list(df)
+    tasks = [(df[column_name], kwargs) for column_name in column_names]
+    if processes == 1:
+        results = [_filter_interpolated_column(*task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.starmap(_filter_interpolated_column, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    corrected_df = df.copy()
+    gaps_list = []
+    for column_name, (corrected_series, gaps) in zip(column_names, results):
+        corrected_df[column_name] = corrected_series
+        gaps.insert(0, 'column_name', column_name)
+        gaps_list.append(gaps)
+    gaps = (pd.concat(gaps_list, ignore_index=True) if gaps_list else
+            pd.DataFrame(columns=['column_name', 'start', 'end', 'length']))
+    return corrected_df, gaps
+
+
+def get_file_hash(path, chunk_size=2 ** 20):
+    r"""
+    Returns the SHA1 hash of the content of a file.
+
+    """
+    file_hash = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_file_fingerprint(path, previous_fingerprint=None):
+    r"""
+    Returns path, size, modification time and content hash of a file.
+
+    Parameters
+    ----------
+    path : String
+        Path of the file.
+    previous_fingerprint : Dictionary, optional
+        Fingerprint of the file from an earlier run. Its hash is reused if
+        size and modification time did not change. Default: None.
+
+    Returns
+    -------
+    Dictionary
+        Fingerprint with the keys 'path', 'size', 'mtime' and 'hash'.
+
+    """
+    stat = os.stat(path)
+    fingerprint = {'path': path, 'size': stat.st_size,
+                   'mtime': stat.st_mtime}
+    if (previous_fingerprint is not None and
+            previous_fingerprint['size'] == fingerprint['size'] and
+            previous_fingerprint['mtime'] == fingerprint['mtime']):
+        fingerprint['hash'] = previous_fingerprint['hash']
+    else:
+        fingerprint['hash'] = get_file_hash(path)
+    return fingerprint
+
+
+def load_manifest(filename):
+    r"""
+    Loads a manifest of source files (see :py:func:`~.get_changed_files`).
+
+    Returns an empty manifest if `filename` does not exist.
+
+    """
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'rb') as file:
+        return pickle.load(file)
+
+
+def dump_manifest(manifest, filename):
+    r"""
+    Dumps a manifest of source files (see :py:func:`~.get_changed_files`).
+
+    """
+    with open(filename, 'wb') as file:
+        pickle.dump(manifest, file)
+
+
+def get_changed_files(paths, manifest):
+    r"""
+    Finds new or changed source files by their fingerprints.
+
+    Parameters
+    ----------
+    paths : List
+        Paths of the source files.
+    manifest : Dictionary
+        Fingerprints (see :py:func:`~.get_file_fingerprint`) of the source
+        files from an earlier run with the paths as keys.
+
+    Returns
+    -------
+    changed_paths : List
+        Paths of the files that are not in `manifest` or whose content
+        changed.
+    fingerprints : Dictionary
+        Current fingerprints of all files in `paths` with the paths as keys.
+
+    """
+    fingerprints = {path: get_file_fingerprint(path, manifest.get(path))
+                    for path in paths}
+    changed_paths = [path for path in paths if
+                     path not in manifest or
+                     manifest[path]['hash'] != fingerprints[path]['hash']]
+    return changed_paths, fingerprints
+
+
 def get_wind_efficiency_curve():
     path = os.path.join(os.path.dirname(__file__), 'helper_files',
                         'wind_efficiency_curve_1.csv')
@@ -6,7 +6,6 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import pandas as pd
 import os
-from copy import deepcopy
 
 # TODO's:
 # write small tool for display of all turbines of a wind farm
@@ -112,7 +111,7 @@ def box_plots_bias(df, filename='Tests/test.pdf', title='Test'):
 
 def plot_feedin_comparison(data, method=None, filename='Tests/feedin_test.pdf',
                            title='Test', tick_label=None,
-                           start=None, end=None):
+                           start=None, end=None, mask=None):
     r"""
     Plot simulation and validation feedin time series.
 
@@ -141,6 +140,9 @@ def plot_feedin_comparison(data, method=None, filename='Tests/feedin_test.pdf',
         End date of time period to be plotted in the format 'yyyy-mm-dd' or
         'yyyy-mm-dd hh:mm:ss' or 'yyyy-mm-dd hh:mm:ss+hh:mm'. If `start`
         and/or `end` is None the whole time series is plotted. Default: None.
+    mask : np.array
+        Boolean mask with one entry per row of `data`. Time steps with False
+        are not plotted. Default: None.
 
     """
 #    def label_bars(bars, labels):
@@ -161,8 +163,10 @@ def plot_feedin_comparison(data, method=None, filename='Tests/feedin_test.pdf',
 #            ax.text(bar.get_x() + bar.get_width()/2.,  height + 3, label,
 #                    ha='center', va='bottom', fontsize=6)
 
+    if mask is not None:
+        data = data.where(pd.Series(mask, index=data.index), axis=0)
     # Drop nans and rename columns
-    data = deepcopy(data).rename(columns={ # TODO: remove deepcopy if not necessary
+    data = data.rename(columns={
         old_name: new_name.replace('_', ' ') for old_name, new_name in
         zip(list(data), list(data))})
     fig, ax = plt.subplots()
@@ -194,7 +198,8 @@ def plot_feedin_comparison(data, method=None, filename='Tests/feedin_test.pdf',
 
 
 def plot_correlation(data, method=None, filename='Tests/correlation_test.pdf',
-                     title='Test', color='darkblue', marker_size=3):
+                     title='Test', color='darkblue', marker_size=3,
+                     mask=None):
     r"""
     Visualize the correlation between two feedin time series.
 
@@ -209,8 +214,13 @@ def plot_correlation(data, method=None, filename='Tests/correlation_test.pdf',
         the figure. Default: 'Tests/correlation_test.pdf'.
     title : String
         Title of figure. Default: 'Test'.
+    mask : np.array
+        Boolean mask with one entry per row of `data`. Time steps with False
+        are not plotted. Default: None.
 
     """
+    if mask is not None:
+        data = data.where(pd.Series(mask, index=data.index), axis=0)
     # TODO: think of bins.. maybe like in Shap's phd
     # Maximum value for xlim and ylim and line
     maximum = max(data.iloc[:, 0].max(), data.iloc[:, 1].max())
@@ -0,0 +1,192 @@
+"""
+The ``weather_store`` module contains functions to dump weather data of many
+grid points into a columnar store and to read the data of single grid points
+from it.
+
+A weather store is a folder containing
+- one memory-mapped numpy array per weather variable and height with the shape
+  (time steps, grid points). The arrays are saved in Fortran order, so the
+  time series of one grid point is contiguous on disk,
+- an array with the coordinates [lat, lon] of the grid points
+  ('coordinates.npy'),
+- an array with the time stamps in UTC ('time.npy'),
+- a small pickle dump with the column names of the weather data frame
+  ('columns.p').
+
+The time stamps are in UTC.
+
+"""
+
+# Other imports
+import pandas as pd
+import numpy as np
+import os
+import pickle
+
+
+def get_store_folder(filename):
+    r"""
+    Returns the folder of the weather store belonging to a pickle dump.
+
+    Parameters
+    ----------
+    filename : String
+        Name (including path) of the pickle dump of the weather data frame.
+        For example: 'dumps/weather/weather_df_MERRA_2015.p'.
+
+    Returns
+    -------
+    String
+        Folder of the weather store. For example:
+        'dumps/weather/weather_df_MERRA_2015_store'.
+
+    """
+    return '{0}_store'.format(os.path.splitext(filename)[0])
+
+
+def get_variable_filename(variable, height):
+    r"""
+    Returns the filename of the array of `variable` at `height`.
+
+    """
+    return '{0}_{1}.npy'.format(variable, height)
+
+
+def dump_weather_store(weather_df, folder):
+    r"""
+    Dumps a MultiIndex weather data frame into a weather store.
+
+    Parameters
+    ----------
+    weather_df : pd.DataFrame
+        Weather data with MultiIndex (time, lat, lon) as index and MultiIndex
+        (variable, height) as columns, as returned by
+        :py:func:`~.merra_weather_data.get_merra_data` or
+        :py:func:`~.open_fred_weather_data.get_open_fred_data`.
+    folder : String
+        Folder of the weather store. Created if it does not exist.
+
+    """
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    # Positions of the rows in the (time steps, grid points) arrays
+    time_codes, times = pd.factorize(
+        weather_df.index.get_level_values(0), sort=True)
+    cell_codes, cells = pd.factorize(weather_df.index.droplevel(0),
+                                     sort=True)
+    if times.tz is not None:
+        times = times.tz_convert('UTC').tz_localize(None)
+    columns = list(weather_df.columns)
+    for variable, height in columns:
+        array = create_variable_array(folder, variable, height,
+                                      (len(times), len(cells)))
+        array[time_codes, cell_codes] = weather_df[variable][height].values
+        array.flush()
+        del array
+    dump_meta_data(folder, times.values, np.array(
+        [cells.get_level_values(0), cells.get_level_values(1)],
+        dtype=np.float64).transpose(), columns)
+
+
+def create_variable_array(folder, variable, height, shape):
+    r"""
+    Creates the array of `variable` at `height` in a weather store.
+
+    Parameters
+    ----------
+    folder : String
+        Folder of the weather store.
+    variable : String
+        Name of the weather variable, for example 'wind_speed'.
+    height : Integer
+        Height of the variable.
+    shape : Tuple
+        Number of time steps and grid points.
+
+    Returns
+    -------
+    np.memmap
+        Memory-mapped array filled with nan. Values written into it are
+        flushed to the disk, so the array can be filled in parts.
+
+    """
+    array = np.lib.format.open_memmap(
+        os.path.join(folder, get_variable_filename(variable, height)),
+        mode='w+', dtype=np.float64,
+        shape=tuple(int(number) for number in shape), fortran_order=True)
+    array[:] = np.nan
+    return array
+
+
+def dump_meta_data(folder, times, coordinates, columns):
+    r"""
+    Dumps time stamps, coordinates and columns of a weather store.
+
+    Parameters
+    ----------
+    folder : String
+        Folder of the weather store.
+    times : np.array
+        Time stamps in UTC (without time zone).
+    coordinates : np.array
+        Coordinates [lat, lon] of the grid points sorted by lat and lon with
+        shape (grid points, 2).
+    columns : List
+        Tuples (variable, height) of the arrays of the weather store.
+
+    """
+    np.save(os.path.join(folder, 'time.npy'),
+            np.asarray(times).astype('datetime64[ns]'))
+    np.save(os.path.join(folder, 'coordinates.npy'),
+            np.asarray(coordinates, dtype=np.float64))
+    with open(os.path.join(folder, 'columns.p'), 'wb') as file:
+        pickle.dump(columns, file)
+
+
+def load_coordinates(folder):
+    r"""
+    Returns the coordinates of the grid points of a weather store.
+
+    Returns
+    -------
+    np.array
+        Coordinates [lat, lon] of the grid points with shape (grid points, 2).
+
+    """
+    return np.load(os.path.join(folder, 'coordinates.npy'))
+
+
+def read_weather_store(folder, cells):
+    r"""
+    Reads the weather data of single grid points from a weather store.
+
+    Only the time series of the requested grid points are read from disk.
+
+    Parameters
+    ----------
+    folder : String
+        Folder of the weather store.
+    cells : List or np.array
+        Positions of the grid points in the weather store arrays (see
+        :py:class:`~.grid_index.GridIndex`).
+
+    Returns
+    -------
+    weather_dfs : List
+        Contains one weather data frame (pd.DataFrame) per grid point in
+        `cells` with a UTC DatetimeIndex and MultiIndex (variable, height)
+        as columns.
+
+    """
+    with open(os.path.join(folder, 'columns.p'), 'rb') as file:
+        columns = pickle.load(file)
+    index = pd.DatetimeIndex(
+        np.load(os.path.join(folder, 'time.npy'))).tz_localize('UTC')
+    arrays = [np.load(os.path.join(folder, get_variable_filename(
+        variable, height)), mmap_mode='r') for variable, height in columns]
+    weather_dfs = []
+    for cell in cells:
+        weather_dfs.append(pd.DataFrame(
+            data=np.array([array[:, cell] for array in arrays]).transpose(),
+            index=index, columns=pd.MultiIndex.from_tuples(columns)))
+    return weather_dfs
@@ -84,7 +84,8 @@ def get_wind_farm_data(filename, save_folder='', pickle_load=False):
     """
     pickle_path = os.path.join(save_folder, filename)
     if pickle_load:
-        wind_farm_data = pickle.load(open(pickle_path, 'rb'))
+        with open(pickle_path, 'rb') as file:
+            wind_farm_data = pickle.load(file)
     else:
         if (filename == 'farm_specification_argenetz_2015.p' or
                 filename == 'farm_specification_argenetz_2016.p'):
@@ -163,7 +164,8 @@ def get_wind_farm_data(filename, save_folder='', pickle_load=False):
                                # 'coordinates': []
             }
             wind_farm_data = [wf_9]
-        pickle.dump(wind_farm_data, open(pickle_path, 'wb'))
+        with open(pickle_path, 'wb') as file:
+            pickle.dump(wind_farm_data, file)
     return wind_farm_data
 
 